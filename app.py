@@ -1,28 +1,21 @@
 #pylint: disable-all
 #!/usr/bin/env python3
-import os
-
 import aws_cdk as cdk
 
-from aws_cdk import Environment
-
-from vpc_architecture_demos.site_to_site_vpn.site_to_site_vpn_stack import SiteToSiteVpnStack
-from vpc_architecture_demos.private_access.private_access_demo_stack import PrivateAccessDemoStack
-
-app = cdk.App()
+from vpc_architecture_demos import synth
+from vpc_architecture_demos.app_stacks import add_stacks
 
-# SiteToSiteVpnStack(
-#     scope=app, 
-#     construct_id="SiteToSiteVpnStack",
-#     stack_name="site-to-site-vpn-stack",
-#     env=Environment(region="us-east-1")
-# )
+# the guard keeps the synth worker processes, which re-import this module,
+# from building the app themselves
+if __name__ == "__main__":
+    app = cdk.App()
 
-PrivateAccessDemoStack(
-    scope=app,
-    construct_id='PrivateAccessDemoStack',
-    stack_name="vpc-architecture-demos-nat-gateway",
-    env=Environment(region='us-east-1')
-)
+    # pass e.g. -c regions=us-east-1,eu-west-1 to synthesize several regions,
+    # each in its own worker process
+    regions = synth.regions_from_context(app)
 
-app.synth()
+    if len(regions) == 1:
+        add_stacks(app, regions[0])
+        app.synth()
+    else:
+        synth.synthesize(add_stacks, regions, outdir=app.outdir)
@@ -0,0 +1,65 @@
+import json
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos import lookups
+from vpc_architecture_demos.site_to_site_vpn.site_to_site_vpn_stack import SiteToSiteVpnStack
+
+
+@pytest.fixture
+def lookup_cache(tmp_path):
+    """
+    Returns a function that writes a lookup cache with two availability zones and a
+    placeholder router AMI for each of the given regions and returns its path.
+    """
+    def write(regions):
+        path = tmp_path / "cache.json"
+        path.write_text(json.dumps({
+            "version": lookups.CACHE_VERSION,
+            "regions": {
+                region: {
+                    "availability_zones": [f"{region}a", f"{region}b"],
+                    "amis": {"router": "ami-00000000000000000"}
+                }
+                for region in regions
+            }
+        }))
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def site_to_site_vpn_stack():
+    """
+    Returns a function that creates a site-to-site VPN stack with the given options in
+    a new app, in us-east-1 unless another region is given.
+    """
+    def create(region="us-east-1", context=None, **kwargs):
+        app = core.App(context=context)
+        return SiteToSiteVpnStack(app, "site-to-site-vpn", env=core.Environment(region=region), **kwargs)
+    return create
+
+
+@pytest.fixture
+def site_to_site_vpn_template(site_to_site_vpn_stack):
+    """
+    Returns a function that synthesizes a site-to-site VPN stack with the given options
+    and returns its template.
+    """
+    def synthesize(**kwargs):
+        return assertions.Template.from_stack(site_to_site_vpn_stack(**kwargs))
+    return synthesize
+
+
+@pytest.fixture
+def cached_site_to_site_vpn_template(lookup_cache, site_to_site_vpn_template):
+    """
+    Returns a function that synthesizes a site-to-site VPN stack with the given options
+    against a lookup cache of its region only, see :func:`lookup_cache`.
+    """
+    def synthesize(region="us-east-1", **kwargs):
+        context = {lookups.CACHE_FILE_CONTEXT_KEY: lookup_cache([region])}
+        return site_to_site_vpn_template(region=region, context=context, **kwargs)
+    return synthesize
@@ -0,0 +1,80 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.app_stacks import add_stacks
+from vpc_architecture_demos.client_vpn import client_vpn_stack
+from vpc_architecture_demos.client_vpn.client_vpn_stack import ClientVpnStack
+from vpc_architecture_demos.site_to_site_vpn import cidr_config
+
+CERTIFICATE_ARN = "arn:aws:acm:us-east-1:111111111111:certificate/00000000-0000-0000-0000-000000000000"
+
+
+def _template(**kwargs):
+    app = core.App()
+    stack = ClientVpnStack(
+        app, "client-vpn", server_certificate_arn=CERTIFICATE_ARN, env=core.Environment(region="us-east-1"), **kwargs
+    )
+    return assertions.Template.from_stack(stack)
+
+
+def test_split_tunnel_endpoint_in_both_azs():
+    template = _template()
+
+    template.has_resource_properties("AWS::EC2::ClientVpnEndpoint", {
+        "SplitTunnel": True,
+        "ClientCidrBlock": client_vpn_stack.CLIENT_CIDR
+    })
+    template.resource_count_is("AWS::EC2::ClientVpnTargetNetworkAssociation", 2)
+
+
+def test_only_the_vpc_is_routed_by_default():
+    template = _template()
+
+    template.resource_count_is("AWS::EC2::ClientVpnAuthorizationRule", 1)
+    template.has_resource_properties("AWS::EC2::ClientVpnAuthorizationRule", {
+        "TargetNetworkCidr": cidr_config.AWS_VPC_CIDR
+    })
+    template.resource_count_is("AWS::EC2::ClientVpnRoute", 0)
+
+
+def test_authorization_rule_per_prefix_and_onprem_routes():
+    template = _template(split_tunnel_prefixes=[cidr_config.AWS_VPC_CIDR, cidr_config.ONPREM_CIDR])
+
+    for prefix in (cidr_config.AWS_VPC_CIDR, cidr_config.ONPREM_CIDR):
+        template.has_resource_properties("AWS::EC2::ClientVpnAuthorizationRule", {
+            "TargetNetworkCidr": prefix,
+            "AuthorizeAllGroups": True
+        })
+    template.resource_count_is("AWS::EC2::ClientVpnRoute", 2)
+    template.all_resources_properties("AWS::EC2::ClientVpnRoute", {
+        "DestinationCidrBlock": cidr_config.ONPREM_CIDR
+    })
+
+
+def test_access_group_limits_the_rules():
+    template = _template(access_group_id="network-admins")
+
+    template.all_resources_properties("AWS::EC2::ClientVpnAuthorizationRule", {
+        "AccessGroupId": "network-admins",
+        "AuthorizeAllGroups": assertions.Match.absent()
+    })
+
+
+def test_client_cidr_must_not_overlap_the_prefixes():
+    with pytest.raises(ValueError):
+        _template(client_cidr="10.16.0.0/22")
+    with pytest.raises(ValueError):
+        _template(client_cidr="192.168.8.0/22", split_tunnel_prefixes=[cidr_config.AWS_VPC_CIDR, cidr_config.ONPREM_CIDR])
+    with pytest.raises(ValueError):
+        _template(client_cidr="172.16.0.0/24")
+
+
+def test_app_adds_the_stack_only_with_a_certificate():
+    app = core.App()
+    add_stacks(app, "us-east-1")
+    assert app.node.try_find_child("ClientVpnStack-us-east-1") is None
+
+    app = core.App(context={client_vpn_stack.SERVER_CERTIFICATE_CONTEXT_KEY: CERTIFICATE_ARN})
+    add_stacks(app, "us-east-1")
+    assert app.node.try_find_child("ClientVpnStack-us-east-1") is not None
@@ -0,0 +1,46 @@
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn import cidr_config, dns_cache
+
+
+def test_render_unbound_conf():
+    conf = dns_cache.render_unbound_conf(allowed_cidrs=["192.168.8.0/21"], min_ttl=120, prefetch=False)
+
+    assert "    access-control: 192.168.8.0/21 allow\n" in conf
+    assert "    cache-min-ttl: 120\n" in conf
+    assert "    prefetch: no\n" in conf
+    assert conf.endswith(f"    forward-addr: {dns_cache.AMAZON_DNS_IP}\n")
+
+
+def test_render_unbound_conf_rejects_negative_ttl():
+    with pytest.raises(ValueError):
+        dns_cache.render_unbound_conf(allowed_cidrs=[], min_ttl=-1)
+
+
+def test_dns_cache_is_opt_in(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::EC2::DHCPOptions", 0)
+
+
+def test_dns_cache_points_onprem_dhcp_at_routers(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(onprem_dns_cache=True)
+
+    template.has_resource_properties("AWS::EC2::DHCPOptions", {
+        "DomainNameServers": cidr_config.ONPREM_DNS_CACHE_IPS
+    })
+    template.resource_count_is("AWS::EC2::VPCDHCPOptionsAssociation", 1)
+    for ip in cidr_config.ONPREM_DNS_CACHE_IPS:
+        template.has_resource_properties("AWS::EC2::NetworkInterface", {"PrivateIpAddress": ip})
+
+
+def test_routers_resolve_through_amazon_dns_before_bootstrap(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(onprem_dns_cache=True)
+
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-router-A"}],
+        "UserData": {"Fn::Base64": assertions.Match.string_like_regexp(
+            r"^#!/bin/bash\nmkdir -p /etc/systemd/resolved.conf.d\n[\s\S]*systemctl restart systemd-resolved\napt-get update && apt-get install -y strongswan wget\n"
+        )}
+    })
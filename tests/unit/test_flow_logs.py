@@ -0,0 +1,106 @@
+import json
+from datetime import datetime
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos import flow_log_analyzer
+from vpc_architecture_demos.private_access.private_access_demo_stack import PrivateAccessDemoStack
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _write(path, **columns):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.table(columns), str(path))
+
+
+@pytest.fixture
+def flow_log_dir(tmp_path):
+    root = tmp_path / "AWSLogs" / "aws-account-id=123456789012" / "aws-service=vpcflowlogs"
+    _write(
+        root / "year=2023" / "month=03" / "day=01" / "hour=10" / "vpc.parquet",
+        srcaddr=["192.168.10.5", "10.16.32.7", "192.168.10.5", "8.8.8.8"],
+        dstaddr=["10.16.32.7", "192.168.10.5", "10.16.32.7", "10.16.32.7"],
+        bytes=[1000, 400, 600, 50],
+        packets=[10, 4, 6, 1],
+        action=["ACCEPT", "ACCEPT", "ACCEPT", "REJECT"],
+    )
+    _write(
+        root / "year=2023" / "month=03" / "day=01" / "hour=11" / "tgw.parquet",
+        srcaddr=["192.168.11.9"],
+        dstaddr=["10.16.96.3"],
+        bytes=[5000],
+        packets=[5],
+        tgw_attachment_id=["tgw-attach-0123"],
+    )
+    return tmp_path
+
+
+def test_flow_logs_are_opt_in(site_to_site_vpn_template):
+    site_to_site_vpn_template().resource_count_is("AWS::EC2::FlowLog", 0)
+
+
+def test_flow_logs_cover_every_vpc_and_tgw_as_hourly_parquet(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(flow_logs=True)
+
+    template.resource_properties_count_is("AWS::EC2::FlowLog", {"ResourceType": "VPC"}, 2)
+    template.resource_properties_count_is("AWS::EC2::FlowLog", {"ResourceType": "TransitGateway"}, 1)
+    template.all_resources_properties("AWS::EC2::FlowLog", {
+        "LogDestinationType": "s3",
+        "DestinationOptions": {"FileFormat": "parquet", "HiveCompatiblePartitions": True, "PerHourPartition": True}
+    })
+    # Hive-compatible partitions deliver under AWSLogs/aws-account-id=<account>/
+    template.has_resource_properties("AWS::S3::BucketPolicy", {
+        "PolicyDocument": {"Statement": assertions.Match.array_with([assertions.Match.object_like({
+            "Sid": "AWSLogDeliveryWrite",
+            "Resource": {"Fn::Join": ["", assertions.Match.array_with([
+                assertions.Match.string_like_regexp(r"^/AWSLogs/aws-account-id=$")
+            ])]}
+        })])}
+    })
+
+
+def test_private_access_demo_flow_logs():
+    app = core.App()
+    stack = PrivateAccessDemoStack(app, "private-access", flow_logs=True, env=core.Environment(region="us-east-1"))
+
+    assertions.Template.from_stack(stack).resource_count_is("AWS::EC2::FlowLog", 1)
+
+
+def test_summarize_paths_talkers_and_rejects(flow_log_dir):
+    summary = flow_log_analyzer.summarize(flow_log_analyzer.iter_parquet_files(str(flow_log_dir)))
+
+    assert summary.records == 5
+    assert summary.bytes == 7050
+    assert summary.path_bytes == {"onprem->aws": 6600, "aws->onprem": 400, "external->aws": 50}
+    assert summary.attachment_bytes == {"tgw-attach-0123": 5000}
+    assert summary.top_talkers(1) == [("192.168.11.9", "10.16.96.3", 5000)]
+    assert summary.rejected_records == 1
+    assert summary.rejected_talkers == {("8.8.8.8", "10.16.32.7"): 1}
+
+
+def test_partitions_outside_the_window_are_skipped(flow_log_dir):
+    files = list(flow_log_analyzer.iter_parquet_files(
+        str(flow_log_dir), start=datetime(2023, 3, 1, 11), end=datetime(2023, 3, 1, 12)
+    ))
+
+    assert [f.rsplit("/", 1)[-1] for f in files] == ["tgw.parquet"]
+
+
+def test_small_batches_give_the_same_result(flow_log_dir, monkeypatch):
+    monkeypatch.setattr(flow_log_analyzer, "BATCH_SIZE", 1)
+    summary = flow_log_analyzer.summarize(flow_log_analyzer.iter_parquet_files(str(flow_log_dir)))
+
+    assert summary.records == 5
+    assert summary.path_bytes["onprem->aws"] == 6600
+
+
+def test_cli_prints_json(flow_log_dir, capsys):
+    flow_log_analyzer.main([str(flow_log_dir), "--top", "2"])
+    report = json.loads(capsys.readouterr().out)
+
+    assert len(report["top_talkers"]) == 2
+    assert report["rejected"]["bytes"] == 50
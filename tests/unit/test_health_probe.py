@@ -0,0 +1,131 @@
+import asyncio
+import socket
+import struct
+import time
+
+from vpc_architecture_demos.site_to_site_vpn import health_probe
+from vpc_architecture_demos.site_to_site_vpn.health_probe import Probe
+
+
+class _IkeResponder(asyncio.DatagramProtocol):
+    """
+    Answers every IKE_SA_INIT request with a NO_PROPOSAL_CHOSEN notify, like strongSwan does for unknown peers.
+    """
+
+    def __init__(self, nat_traversal=False):
+        self.nat_traversal = nat_traversal
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        prefix = b""
+        if self.nat_traversal:
+            prefix, data = data[:4], data[4:]
+        notify = struct.pack("!BBHBBH", 0, 0, 8, 0, 0, 14)
+        header = data[:8] + bytes(8) + struct.pack("!BBBBII", 41, 0x20, 34, 0x20, 0, 28 + len(notify))
+        self.transport.sendto(prefix + header + notify, addr)
+
+
+class _Silent(asyncio.DatagramProtocol):
+    pass
+
+
+def _free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _serve(concurrency=32, timeout=0.5):
+    loop = asyncio.get_event_loop()
+    ike, _ = await loop.create_datagram_endpoint(_IkeResponder, local_addr=("127.0.0.1", 0))
+    ike_nat, _ = await loop.create_datagram_endpoint(lambda: _IkeResponder(True), local_addr=("127.0.0.1", 0))
+    silent, _ = await loop.create_datagram_endpoint(_Silent, local_addr=("127.0.0.1", 0))
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    try:
+        probes = [
+            Probe("ike", "ike", "127.0.0.1", ike.get_extra_info("sockname")[1]),
+            Probe("silent", "ike", "127.0.0.1", silent.get_extra_info("sockname")[1]),
+            Probe("closed-udp", "ike", "127.0.0.1", _free_port(socket.SOCK_DGRAM)),
+            Probe("tcp", "tcp", "127.0.0.1", server.sockets[0].getsockname()[1]),
+            Probe("closed-tcp", "tcp", "127.0.0.1", _free_port()),
+            Probe("icmp", "icmp", "127.0.0.1", None),
+        ]
+        report = await health_probe.run_probes(probes, concurrency=concurrency, timeout=timeout)
+        nat_traversal = await health_probe.probe_ike(
+            "127.0.0.1", ike_nat.get_extra_info("sockname")[1], timeout, nat_traversal=True
+        )
+        return report, nat_traversal
+    finally:
+        for transport in (ike, ike_nat, silent):
+            transport.close()
+        server.close()
+
+
+def test_probes_against_local_servers():
+    report, nat_traversal = asyncio.run(_serve())
+    statuses = {result["name"]: result["status"] for result in report["results"]}
+
+    assert statuses["ike"] == "open"
+    assert report["results"][0]["detail"] == "notify NO_PROPOSAL_CHOSEN"
+    assert nat_traversal == ("open", "notify NO_PROPOSAL_CHOSEN")
+    assert statuses["silent"] == "no-reply"
+    assert statuses["closed-udp"] == "refused"
+    assert statuses["tcp"] == "open"
+    assert statuses["closed-tcp"] == "refused"
+    assert statuses["icmp"] in ("open", "skipped")
+    assert report["ok"] is False
+    assert report["summary"]["open"] >= 2
+
+
+def test_probes_run_concurrently():
+    async def probe_silent_endpoints():
+        silent, _ = await asyncio.get_event_loop().create_datagram_endpoint(_Silent, local_addr=("127.0.0.1", 0))
+        port = silent.get_extra_info("sockname")[1]
+        try:
+            probes = [Probe(f"silent-{index}", "ike", "127.0.0.1", port) for index in range(20)]
+            return await health_probe.run_probes(probes, concurrency=20, timeout=0.3)
+        finally:
+            silent.close()
+
+    started = time.perf_counter()
+    report = asyncio.run(probe_silent_endpoints())
+
+    # 20 sequential timeouts would take 6 seconds
+    assert time.perf_counter() - started < 2
+    assert report["summary"] == {"no-reply": 20}
+
+
+def test_probes_from_outputs():
+    probes = health_probe.probes_from_outputs({
+        "OnPremNetworkRouterAPublicIPA1B2C3D4": "203.0.113.10",
+        "OnPremNetworkServerAPrivateIP0F1E2D3C": "192.168.10.20",
+        "SomethingElse": "ignored",
+    })
+
+    assert probes == [
+        Probe("OnPremNetworkRouterAPublicIP", "ike", "203.0.113.10", 500),
+        Probe("OnPremNetworkRouterAPublicIP", "ike", "203.0.113.10", 4500),
+        Probe("OnPremNetworkRouterAPublicIP", "icmp", "203.0.113.10", None),
+        Probe("OnPremNetworkServerAPrivateIP", "icmp", "192.168.10.20", None),
+        Probe("OnPremNetworkServerAPrivateIP", "tcp", "192.168.10.20", 22),
+    ]
+
+
+def test_tunnel_status_from_telemetry():
+    class _Client:
+        def describe_vpn_connections(self, VpnConnectionIds):
+            return {"VpnConnections": [{"VgwTelemetry": [
+                {"OutsideIpAddress": "198.51.100.1", "Status": "UP"},
+                {"OutsideIpAddress": "198.51.100.2", "Status": "DOWN"},
+            ]}]}
+
+    class _Session:
+        def client(self, service, region_name=None):
+            return _Client()
+
+    status, detail = asyncio.run(health_probe.probe_tunnel("vpn-123", session=_Session()))
+
+    assert status == "degraded"
+    assert detail == "198.51.100.1 UP, 198.51.100.2 DOWN"
@@ -0,0 +1,54 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from vpc_architecture_demos.site_to_site_vpn import cidr_config
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.hybrid_dns import AWS_FORWARDED_SERVICES, HybridDns
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+
+
+def test_hybrid_dns_is_optional(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::Route53Resolver::ResolverEndpoint", 0)
+
+
+def test_inbound_and_outbound_endpoints_in_both_networks(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(hybrid_dns=True)
+
+    template.resource_properties_count_is("AWS::Route53Resolver::ResolverEndpoint", {"Direction": "INBOUND"}, 2)
+    template.resource_properties_count_is("AWS::Route53Resolver::ResolverEndpoint", {"Direction": "OUTBOUND"}, 2)
+    template.has_resource_properties("AWS::Route53Resolver::ResolverEndpoint", {
+        "Direction": "INBOUND",
+        "IpAddresses": assertions.Match.array_with([
+            assertions.Match.object_like({"Ip": cidr_config.resolver_address(cidr)})
+            for cidr in cidr_config.aws_private_subnet_cidrs(cidr_config.AWS_VPC_CIDR)
+        ])
+    })
+
+
+def test_onprem_keeps_its_own_endpoints_by_default(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(hybrid_dns=True)
+
+    template.has_resource_properties("AWS::Route53Resolver::ResolverRule", {
+        "DomainName": cidr_config.ONPREM_DOMAIN,
+        "RuleType": "FORWARD",
+        "TargetIps": [{"Ip": ip, "Port": "53"} for ip in cidr_config.ONPREM_RESOLVER_INBOUND_IPS]
+    })
+    template.resource_count_is("AWS::Route53Resolver::ResolverRule", 1)
+    template.resource_count_is("AWS::Route53Resolver::ResolverRuleAssociation", 1)
+
+
+def test_forwarding_rules_point_across_the_vpn():
+    app = core.App()
+    stack = core.Stack(app, "hybrid-dns", env=core.Environment(region="us-east-1"))
+    aws_network = AWSPrivateNetwork(stack, "AWSPrivateNetwork", azs=["us-east-1a", "us-east-1b"])
+    onprem_network = OnPremNetwork(stack, "OnPremNetwork", azs=["us-east-1a", "us-east-1b"])
+    HybridDns(stack, "HybridDns", aws_network=aws_network, onprem_network=onprem_network, aws_services=AWS_FORWARDED_SERVICES)
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::Route53Resolver::ResolverRule", {
+        "DomainName": "ssmmessages.us-east-1.amazonaws.com",
+        "TargetIps": [{"Ip": cidr_config.resolver_address(cidr), "Port": "53"} for cidr in aws_network.private_subnet_cidrs]
+    })
+    template.resource_count_is("AWS::Route53Resolver::ResolverRuleAssociation", 4)
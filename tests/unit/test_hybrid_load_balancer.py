@@ -0,0 +1,66 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.hybrid_load_balancer import HybridLoadBalancer
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+
+
+def test_hybrid_load_balancer_is_optional(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::ElasticLoadBalancingV2::LoadBalancer", 0)
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-server-a"}],
+        "UserData": assertions.Match.absent()
+    })
+
+
+def test_internal_nlb_targets_the_onprem_servers(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(hybrid_load_balancer=True)
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::LoadBalancer", {
+        "Type": "network",
+        "Scheme": "internal",
+        "LoadBalancerAttributes": [{"Key": "load_balancing.cross_zone.enabled", "Value": "true"}]
+    })
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
+        "TargetType": "ip",
+        "Protocol": "TCP",
+        "HealthCheckProtocol": "TCP",
+        "HealthCheckIntervalSeconds": 10,
+        "Targets": [
+            {"Id": {"Fn::GetAtt": [assertions.Match.string_like_regexp("OnPremServerA"), "PrivateIp"]}, "Port": 80, "AvailabilityZone": "all"},
+            {"Id": {"Fn::GetAtt": [assertions.Match.string_like_regexp("OnPremServerB"), "PrivateIp"]}, "Port": 80, "AvailabilityZone": "all"},
+        ],
+        "TargetGroupAttributes": assertions.Match.array_with([
+            {"Key": "deregistration_delay.timeout_seconds", "Value": "30"}
+        ])
+    })
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::Listener", {
+        "Protocol": "TCP",
+        "Port": 80
+    })
+
+
+def test_servers_listen_on_the_load_balancer_port(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(hybrid_load_balancer=True, hybrid_load_balancer_port=8080)
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::Listener", {"Port": 8080})
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-server-a"}],
+        "UserData": {"Fn::Base64": assertions.Match.string_like_regexp(
+            r"yum install -y httpd\nsed -i 's/\^Listen 80\$/Listen 8080/'"
+        )}
+    })
+
+
+def test_health_check_threshold_is_validated():
+    app = core.App()
+    stack = core.Stack(app, "nlb", env=core.Environment(region="us-east-1"))
+    aws_network = AWSPrivateNetwork(stack, "AWSPrivateNetwork", azs=["us-east-1a", "us-east-1b"])
+    onprem_network = OnPremNetwork(stack, "OnPremNetwork", azs=["us-east-1a", "us-east-1b"])
+
+    with pytest.raises(ValueError):
+        HybridLoadBalancer(stack, "HybridLoadBalancer", aws_network=aws_network, onprem_network=onprem_network, health_check_threshold=1)
@@ -0,0 +1,43 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+from aws_cdk import aws_ec2 as ec2, aws_iam as iam
+
+from vpc_architecture_demos import performance_lint
+from vpc_architecture_demos.iam_policies import instance_policies
+
+
+def test_roles_share_managed_policies(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::IAM::ManagedPolicy", 3)
+    for role_name in ("aws-private-network-ec2-iam-role", "onprem-network-ec2-iam-role"):
+        template.has_resource_properties("AWS::IAM::Role", {
+            "RoleName": role_name,
+            "Policies": assertions.Match.absent(),
+            "ManagedPolicyArns": [
+                {"Ref": assertions.Match.string_like_regexp(f"^InstancePolicies{name}")}
+                for name in ("SessionManager", "S3Access", "SnsAccess")
+            ]
+        })
+
+
+def test_policies_are_created_once_per_stack(site_to_site_vpn_stack):
+    stack = site_to_site_vpn_stack()
+
+    assert instance_policies(stack) is instance_policies(stack.node.find_child("OnPremNetwork"))
+
+
+def test_lint_follows_managed_policies():
+    app = core.App()
+    stack = core.Stack(app, "managed-policy", env=core.Environment(region="us-east-1"))
+    vpc = ec2.CfnVPC(stack, "Vpc", cidr_block="10.0.0.0/16")
+    subnet = ec2.CfnSubnet(stack, "Subnet", vpc_id=vpc.ref, cidr_block="10.0.0.0/24", availability_zone="us-east-1a")
+    role = iam.Role(stack, "Role", assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"), managed_policies=[
+        instance_policies(stack).s3_access
+    ])
+    profile = iam.CfnInstanceProfile(stack, "Profile", roles=[role.role_name])
+    ec2.CfnInstance(stack, "Instance", image_id="ami-00000000000000000", subnet_id=subnet.ref, iam_instance_profile=profile.ref)
+    aspect = performance_lint.enable(stack)
+    app.synth()
+
+    assert "s3-without-gateway-endpoint" in {finding.rule for finding in aspect.findings}
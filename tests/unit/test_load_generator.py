@@ -0,0 +1,136 @@
+import os
+import shutil
+import subprocess
+
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn import load_generator
+
+
+def test_load_generator_is_optional(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::AutoScaling::AutoScalingGroup", 0)
+    template.resource_count_is("AWS::SSM::Document", 0)
+
+
+def test_spot_fleets_on_both_sides(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(load_generator=True, load_generator_fleet_size=3, load_generator_flows=16)
+
+    template.resource_count_is("AWS::AutoScaling::AutoScalingGroup", 2)
+    for side in ("aws", "onprem"):
+        template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+            "MinSize": "3",
+            "MaxSize": "3",
+            "MixedInstancesPolicy": {
+                "InstancesDistribution": {
+                    "OnDemandBaseCapacity": 0,
+                    "OnDemandPercentageAboveBaseCapacity": 0,
+                    "SpotAllocationStrategy": "price-capacity-optimized"
+                }
+            },
+            "Tags": assertions.Match.array_with([
+                {"Key": load_generator.SIDE_TAG, "Value": side, "PropagateAtLaunch": True}
+            ])
+        })
+    template.resource_properties_count_is("AWS::EC2::LaunchTemplate", {
+        "LaunchTemplateData": {"ImageId": {"Ref": assertions.Match.string_like_regexp("amzn2amihvm")}}
+    }, 2)
+    template.has_resource_properties("AWS::SSM::Document", {
+        "DocumentType": "Command",
+        "Content": {"parameters": {"Flows": {"type": "String", "default": "16", "allowedPattern": "^[0-9]+$"}}}
+    })
+
+
+def test_private_subnets_reach_s3_for_packages(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(load_generator=True)
+
+    template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+        "ServiceName": "com.amazonaws.us-east-1.s3",
+        "VpcEndpointType": "Gateway",
+        "RouteTableIds": [{"Fn::GetAtt": [assertions.Match.string_like_regexp("^AWSPrivateNetworkAWSCustomRouteTable"), "RouteTableId"]}]
+    })
+
+
+def test_s3_gateway_endpoint_only_with_load_generator(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    assert not template.find_resources("AWS::EC2::VPCEndpoint", {"Properties": {
+        "VpcEndpointType": "Gateway",
+        "VpcId": {"Ref": assertions.Match.string_like_regexp("^AWSPrivateNetwork")}
+    }})
+
+
+def test_fleet_size_must_be_positive(site_to_site_vpn_template):
+    with pytest.raises(ValueError):
+        site_to_site_vpn_template(load_generator=True, load_generator_fleet_size=0)
+
+
+@pytest.fixture
+def run_client(tmp_path):
+    """
+    Returns a function that runs the document as a client against a stub iperf3 whose
+    daemons on the given ports are busy, and returns the ports it tried and its log.
+    """
+    if shutil.which("bash") is None:
+        pytest.skip("bash is not installed")
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    iperf3 = bin_dir / "iperf3"
+    iperf3.write_text(
+        "#!/bin/bash\n"
+        "PORT=$(echo \"$@\" | sed -E 's/.*--port ([0-9]+).*/\\1/')\n"
+        "echo \"$PORT\" >> \"$ATTEMPTS\"\n"
+        "case \" $BUSY \" in *\" $PORT \"*) echo 'iperf3: error - the server is busy running a test'; exit 1;; esac\n"
+        "echo '[SUM]   0.00-60.00  sec  6.50 GBytes   930 Mbits/sec  sender'\n"
+    )
+    iperf3.chmod(0o755)
+    instance_id = tmp_path / "instance-id"
+    instance_id.write_text("i-0123456789abcdef0\n")
+
+    def run(ports, busy):
+        parameters = {
+            "Action": "client", "Tool": "iperf3", "Flows": "4", "Duration": "1", "Protocol": "tcp",
+            "Bandwidth": "1G", "ServerPorts": str(ports), "Servers": "192.168.10.25"
+        }
+        script = "\n".join(load_generator.render_commands())
+        for name, value in parameters.items():
+            script = script.replace("{{ %s }}" % name, value)
+        script = script.replace(load_generator.LOG_DIR, str(tmp_path / "log"))
+        script = script.replace("/var/lib/cloud/data/instance-id", str(instance_id))
+        attempts = tmp_path / "attempts"
+        attempts.write_text("")
+
+        subprocess.run(["bash", "-c", script], check=True, capture_output=True, env={
+            **os.environ,
+            "PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}",
+            "ATTEMPTS": str(attempts),
+            "BUSY": " ".join(str(load_generator.IPERF_BASE_PORT + port) for port in busy)
+        })
+        return [int(port) for port in attempts.read_text().split()], (tmp_path / "log" / "192.168.10.25.log").read_text()
+    return run
+
+
+def test_clients_move_on_from_busy_iperf_daemons(run_client):
+    attempts, log = run_client(ports=3, busy=[0, 2])
+
+    assert attempts[-1] == load_generator.IPERF_BASE_PORT + 1
+    assert len(set(attempts)) == len(attempts)
+    assert "sender" in log
+
+
+def test_clients_give_up_when_every_iperf_daemon_is_busy(run_client):
+    attempts, log = run_client(ports=3, busy=[0, 1, 2])
+
+    assert sorted(attempts) == [load_generator.IPERF_BASE_PORT + port for port in range(3)]
+    assert "all 3 iperf3 ports of 192.168.10.25 are busy" in log
+
+
+def test_servers_must_be_addresses(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(load_generator=True)
+
+    template.has_resource_properties("AWS::SSM::Document", {
+        "Content": {"parameters": {"Servers": {"type": "String", "allowedPattern": "^[0-9.,]*$"}}}
+    })
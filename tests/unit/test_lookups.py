@@ -0,0 +1,58 @@
+import json
+
+import aws_cdk as core
+import pytest
+
+from vpc_architecture_demos import lookups
+from vpc_architecture_demos.site_to_site_vpn.site_to_site_vpn_stack import SiteToSiteVpnStack
+
+
+def test_checked_in_cache_serves_us_east_1():
+    cache = lookups.load_cache()
+
+    assert "us-east-1" in cache.regions
+    assert cache.availability_zones("us-east-1")[:2] == ["us-east-1a", "us-east-1b"]
+    assert cache.ami("us-east-1", "router").startswith("ami-")
+
+
+def test_unknown_region_raises():
+    with pytest.raises(lookups.LookupCacheError):
+        lookups.load_cache().availability_zones("xx-nowhere-1")
+
+
+def test_version_mismatch_raises(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"version": 0, "regions": {}}))
+
+    with pytest.raises(lookups.LookupCacheError):
+        lookups.LookupCache(str(path))
+
+
+def test_stack_without_region_raises():
+    app = core.App()
+
+    with pytest.raises(lookups.LookupCacheError):
+        SiteToSiteVpnStack(app, "site-to-site-vpn")
+
+
+def test_synth_uses_cached_azs_and_ami(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.has_resource_properties("AWS::EC2::Subnet", {
+        "AvailabilityZone": "us-east-1b"
+    })
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "ImageId": "ami-0ac80df6eff0e70b5"
+    })
+    assert "Fn::GetAZs" not in json.dumps(template.to_json())
+
+
+def test_context_overrides_cache_file(lookup_cache, site_to_site_vpn_template):
+    template = site_to_site_vpn_template(
+        region="eu-west-1",
+        context={lookups.CACHE_FILE_CONTEXT_KEY: lookup_cache(["eu-west-1"])}
+    )
+
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "ImageId": "ami-00000000000000000"
+    })
@@ -0,0 +1,65 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.monitoring import NetworkMonitoring
+from vpc_architecture_demos.private_access.private_access_demo_stack import PrivateAccessDemoStack
+
+
+def _monitoring(**kwargs):
+    stack = core.Stack(core.App(), "monitoring")
+    return stack, NetworkMonitoring(stack, "Monitoring", dashboard_name="test", **kwargs)
+
+
+def test_saturation_threshold_is_a_share_of_capacity_per_period():
+    _, monitoring = _monitoring(saturation_percent=50, period=core.Duration.minutes(5))
+
+    # 50% of 1.25 Gbps for 300 seconds, in bytes
+    assert monitoring.saturation_threshold(1.25 * 10**9) == 0.625 * 10**9 * 300 / 8
+
+
+def test_saturation_percent_must_be_a_percentage():
+    with pytest.raises(ValueError):
+        _monitoring(saturation_percent=0)
+
+
+def test_vpn_connection_alarms_per_tunnel_when_ips_are_known():
+    stack, monitoring = _monitoring()
+    monitoring.add_vpn_connection(name="RouterA", vpn_connection_id="vpn-123", tunnel_ips=["1.1.1.1", "2.2.2.2"])
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "MetricName": "TunnelState",
+        "ComparisonOperator": "LessThanThreshold",
+        "Threshold": 1
+    })
+    template.resource_properties_count_is("AWS::CloudWatch::Alarm", {"MetricName": "TunnelDataIn"}, 2)
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "MetricName": "TunnelDataOut",
+        "Dimensions": [{"Name": "TunnelIpAddress", "Value": "2.2.2.2"}],
+        "Threshold": monitoring.saturation_threshold(1.25 * 10**9)
+    })
+
+
+def test_site_to_site_vpn_monitors_the_tgw_attachment(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(monitoring=True)
+
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 1)
+    for metric_name in ("BytesIn", "BytesOut", "PacketDropCountBlackhole", "PacketDropCountNoRoute"):
+        template.has_resource_properties("AWS::CloudWatch::Alarm", {
+            "Namespace": "AWS/TransitGateway",
+            "MetricName": metric_name,
+            "AlarmActions": [assertions.Match.any_value()]
+        })
+
+
+def test_private_access_demo_monitors_the_nat_gateway():
+    app = core.App()
+    stack = PrivateAccessDemoStack(app, "private-access", monitoring=True, env=core.Environment(region="us-east-1"))
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {"MetricName": "ErrorPortAllocation"})
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {"MetricName": "PacketsDropCount"})
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "Metrics": assertions.Match.array_with([assertions.Match.object_like({"Expression": "bytes_out + bytes_in"})])
+    })
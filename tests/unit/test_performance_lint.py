@@ -0,0 +1,79 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+from aws_cdk import aws_ec2 as ec2
+
+from vpc_architecture_demos import performance_lint
+from vpc_architecture_demos.performance_lint import Severity
+from vpc_architecture_demos.private_access.private_access_demo_stack import PrivateAccessDemoStack
+
+
+def _rules(aspect):
+    return sorted({finding.rule for finding in aspect.findings})
+
+
+def _cross_az_stack(app):
+    stack = core.Stack(app, "cross-az", env=core.Environment(region="us-east-1"))
+    vpc = ec2.CfnVPC(stack, "Vpc", cidr_block="10.0.0.0/16")
+    subnet_a = ec2.CfnSubnet(stack, "SubnetA", vpc_id=vpc.ref, cidr_block="10.0.0.0/24", availability_zone="us-east-1a")
+    subnet_b = ec2.CfnSubnet(stack, "SubnetB", vpc_id=vpc.ref, cidr_block="10.0.1.0/24", availability_zone="us-east-1b")
+    nat_gateway = ec2.CfnNatGateway(stack, "NatGateway", subnet_id=subnet_a.attr_subnet_id, connectivity_type="private")
+    route_table = ec2.CfnRouteTable(stack, "RouteTable", vpc_id=vpc.ref)
+    ec2.CfnSubnetRouteTableAssociation(stack, "Assoc", subnet_id=subnet_b.attr_subnet_id, route_table_id=route_table.ref)
+    ec2.CfnRoute(
+        stack, "Route",
+        route_table_id=route_table.ref,
+        nat_gateway_id=nat_gateway.ref,
+        destination_cidr_block="0.0.0.0/0"
+    )
+    return stack
+
+
+def test_private_access_demo_findings():
+    app = core.App()
+    stack = PrivateAccessDemoStack(app, "private-access", env=core.Environment(region="us-east-1"))
+    aspect = performance_lint.enable(stack)
+    app.synth()
+
+    assert _rules(aspect) == ["s3-without-gateway-endpoint", "single-az-nat", "single-az-subnets"]
+    assertions.Annotations.from_stack(stack).has_warning("/private-access/NatGateway", assertions.Match.string_like_regexp("single-az-nat"))
+
+
+def test_site_to_site_vpn_findings(site_to_site_vpn_stack):
+    stack = site_to_site_vpn_stack()
+    aspect = performance_lint.enable(stack, severities={"s3-without-gateway-endpoint": None})
+    core.Stage.of(stack).synth()
+
+    assert _rules(aspect) == ["burstable-data-path", "single-az-subnets", "vpn-tgw-without-vpn"]
+    assert {finding.path for finding in aspect.findings if finding.rule == "burstable-data-path"} == {
+        "site-to-site-vpn/OnPremNetwork/OnPremRouterA", "site-to-site-vpn/OnPremNetwork/OnPremRouterB"
+    }
+
+
+def test_cross_az_route_target():
+    app = core.App()
+    stack = _cross_az_stack(app)
+    aspect = performance_lint.enable(stack)
+    app.synth()
+
+    assert [(finding.rule, finding.path) for finding in aspect.findings if finding.rule == "cross-az-route-target"] == [
+        ("cross-az-route-target", "cross-az/Route")
+    ]
+
+
+def test_threshold_turns_findings_into_errors():
+    app = core.App()
+    stack = _cross_az_stack(app)
+    performance_lint.enable(stack, fail_at=Severity.MEDIUM)
+    app.synth()
+
+    annotations = assertions.Annotations.from_stack(stack)
+    annotations.has_error("/cross-az/Route", assertions.Match.string_like_regexp(r"\[MEDIUM\] cross-az-route-target"))
+    annotations.has_error("/cross-az/NatGateway", assertions.Match.string_like_regexp("single-az-nat"))
+
+
+def test_threshold_from_context():
+    assert performance_lint.threshold_from_context(core.App()) is None
+    assert performance_lint.threshold_from_context(core.App(context={"performance-lint-fail-at": "medium"})) == Severity.MEDIUM
+    with pytest.raises(ValueError):
+        performance_lint.threshold_from_context(core.App(context={"performance-lint-fail-at": "critical"}))
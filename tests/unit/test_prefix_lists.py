@@ -0,0 +1,95 @@
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn import cidr_config
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+from vpc_architecture_demos.site_to_site_vpn.prefix_lists import NetworkPrefixLists
+
+
+def _prefix_list_ref(template, name):
+    (logical_id,) = template.find_resources("AWS::EC2::PrefixList", {"Properties": {"PrefixListName": name}})
+    return {"Fn::GetAtt": [logical_id, "PrefixListId"]}
+
+
+def test_networks_share_one_pair_of_prefix_lists(cached_site_to_site_vpn_template):
+    template = cached_site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::EC2::PrefixList", 2)
+    template.has_resource_properties("AWS::EC2::PrefixList", {
+        "PrefixListName": "onprem-networks",
+        "Entries": [{"Cidr": cidr_config.ONPREM_CIDR, "Description": "onprem-network"}]
+    })
+    template.has_resource_properties("AWS::EC2::PrefixList", {
+        "PrefixListName": "aws-networks",
+        "Entries": [assertions.Match.object_like({"Cidr": cidr_config.AWS_VPC_CIDR})]
+    })
+
+
+def test_rules_and_routes_reference_the_prefix_lists(cached_site_to_site_vpn_template):
+    template = cached_site_to_site_vpn_template(hybrid_dns=True)
+    aws_networks = _prefix_list_ref(template, "aws-networks")
+    onprem_networks = _prefix_list_ref(template, "onprem-networks")
+
+    template.resource_properties_count_is("AWS::EC2::Route", {"DestinationPrefixListId": aws_networks}, 2)
+    template.resource_properties_count_is("AWS::EC2::Route", {"DestinationCidrBlock": cidr_config.AWS_VPC_CIDR}, 0)
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupName": "aws-vpc-ec2-sg",
+        "SecurityGroupIngress": assertions.Match.array_with([
+            assertions.Match.object_like({"SourcePrefixListId": onprem_networks})
+        ])
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupName": "onprem-network-ec2-sg",
+        "SecurityGroupIngress": [assertions.Match.object_like({"SourcePrefixListId": aws_networks})]
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupName": "aws-private-network-resolver-sg",
+        "SecurityGroupIngress": assertions.Match.array_with([
+            assertions.Match.object_like({"IpProtocol": "udp", "SourcePrefixListId": onprem_networks})
+        ])
+    })
+
+
+def test_peer_cidr_is_added_to_the_aws_prefix_list(cached_site_to_site_vpn_template):
+    template = cached_site_to_site_vpn_template(aws_vpc_cidr="10.17.0.0/16", peer_regions=["eu-west-1"])
+
+    template.has_resource_properties("AWS::EC2::PrefixList", {
+        "PrefixListName": "aws-networks",
+        "Entries": [
+            assertions.Match.object_like({"Cidr": "10.17.0.0/16"}),
+            {"Cidr": assertions.Match.any_value(), "Description": "aws-private-network eu-west-1"}
+        ]
+    })
+    template.resource_count_is("AWS::EC2::SecurityGroupIngress", 2)
+
+
+def test_prefix_list_capacity_is_enforced():
+    prefix_lists = NetworkPrefixLists(core.Stack(), "PrefixLists", max_entries=2)
+    prefix_lists.add_onprem_cidr("192.168.8.0/21")
+    prefix_lists.add_onprem_cidr("192.168.8.0/21")
+    prefix_lists.add_onprem_cidr("172.16.0.0/16")
+
+    assert prefix_lists.onprem_cidrs == ["192.168.8.0/21", "172.16.0.0/16"]
+    with pytest.raises(ValueError):
+        prefix_lists.add_onprem_cidr("172.17.0.0/16")
+
+
+def test_standalone_networks_assume_the_other_default_network():
+    app = core.App()
+    stack = core.Stack(app, "networks", env=core.Environment(region="us-east-1"))
+    AWSPrivateNetwork(stack, "AWSPrivateNetwork", azs=["us-east-1a", "us-east-1b"])
+    OnPremNetwork(stack, "OnPremNetwork", azs=["us-east-1a", "us-east-1b"])
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is("AWS::EC2::PrefixList", 4)
+    template.resource_properties_count_is("AWS::EC2::PrefixList", {
+        "PrefixListName": "onprem-networks",
+        "Entries": [{"Cidr": cidr_config.ONPREM_CIDR, "Description": "onprem-network"}]
+    }, 2)
+    template.resource_properties_count_is("AWS::EC2::PrefixList", {
+        "PrefixListName": "aws-networks",
+        "Entries": [{"Cidr": cidr_config.AWS_VPC_CIDR, "Description": "aws-private-network us-east-1"}]
+    }, 2)
@@ -0,0 +1,57 @@
+import ipaddress
+import random
+
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn import bgp_config, cidr_config
+from vpc_architecture_demos.site_to_site_vpn.prefix_summary import summarize
+
+
+def test_exact_merge_matches_collapse_addresses():
+    rng = random.Random(7)
+    subnets = [f"10.{rng.randrange(4)}.{rng.randrange(256)}.0/24" for _ in range(300)]
+
+    expected = [str(network) for network in ipaddress.collapse_addresses(ipaddress.ip_network(s) for s in subnets)]
+
+    assert summarize(subnets) == expected
+
+
+def test_max_prefixlen_widens_to_the_allocation():
+    assert summarize(["192.168.10.0/24", "192.168.11.0/24"]) == ["192.168.10.0/23"]
+    assert summarize(
+        ["192.168.10.0/24", "192.168.11.0/24", "10.9.1.0/24"], within=[cidr_config.ONPREM_CIDR], max_prefixlen=16
+    ) == ["10.9.1.0/24", cidr_config.ONPREM_CIDR]
+
+
+def test_budget_collapses_the_cheapest_supernet_first():
+    prefixes = ["10.0.0.0/24", "10.0.2.0/24", "10.0.3.0/24", "10.1.0.0/24", "2001:db8::/64", "2001:db8:0:1::/64"]
+
+    assert summarize(prefixes, max_prefixes=2) == ["10.0.0.0/22", "10.1.0.0/24", "2001:db8::/63"]
+    assert summarize(prefixes, max_prefixes=1) == ["10.0.0.0/15", "2001:db8::/63"]
+
+
+def test_budget_respects_within():
+    with pytest.raises(ValueError):
+        summarize(["10.0.0.0/24", "10.1.0.0/24"], within=["10.0.0.0/16", "10.1.0.0/16"], max_prefixes=1)
+
+
+def test_render_bgpd_conf():
+    conf = bgp_config.render_bgpd_conf(["192.168.8.0/21"], neighbors={"169.254.10.1": 64512})
+
+    assert conf.startswith("ip route 192.168.8.0/21 blackhole\n")
+    assert "ip prefix-list SUMMARY-OUT seq 5 permit 192.168.8.0/21\n" in conf
+    assert " neighbor 169.254.10.1 remote-as 64512\n" in conf
+    assert "  network 192.168.8.0/21\n" in conf
+    assert "  neighbor 169.254.10.1 route-map SUMMARY-OUT out\n" in conf
+    with pytest.raises(ValueError):
+        bgp_config.render_bgpd_conf(["2001:db8::/32"])
+
+
+def test_routers_advertise_the_onprem_allocation(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-router-A"}],
+        "UserData": {"Fn::Base64": assertions.Match.string_like_regexp(r"network 192\.168\.8\.0/21")}
+    })
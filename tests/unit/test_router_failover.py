@@ -0,0 +1,97 @@
+import socket
+
+import aws_cdk.assertions as assertions
+
+from vpc_architecture_demos.site_to_site_vpn import bgp_config, connect_config
+from vpc_architecture_demos.site_to_site_vpn.functions.router_failover import index as router_failover
+
+ROUTERS = [
+    {"name": "A", "address": "192.168.9.10", "network_interface_id": "eni-a"},
+    {"name": "B", "address": "192.168.10.10", "network_interface_id": "eni-b"},
+]
+ROUTES = [
+    {"route_table_id": "rtb-a", "preferred": "A"},
+    {"route_table_id": "rtb-b", "preferred": "B"},
+]
+
+
+def test_fast_failover_timers_and_bfd():
+    conf = connect_config.render_bgpd_conf(connect_config.CONNECT_PEERS[0], ["192.168.8.0/21"], fast_failover=True)
+
+    assert f"bfd\n profile {bgp_config.BFD_PROFILE}\n  detect-multiplier 3\n" in conf
+    assert " timers bgp 3 9\n" in conf
+    assert f" neighbor 169.254.100.2 bfd profile {bgp_config.BFD_PROFILE}\n" in conf
+    assert "bfd" not in connect_config.render_bgpd_conf(connect_config.CONNECT_PEERS[0], ["192.168.8.0/21"])
+
+
+def test_load_script_enables_bfdd_after_the_frr_install():
+    commands = bgp_config.install_commands("router bgp 65016\n", bfd=True)
+
+    assert f"if command -v vtysh >/dev/null; then {bgp_config.LOAD_SCRIPT_PATH}; fi" in commands
+    script = bgp_config.render_load_script(bfd=True)
+    assert script.index("sed -i 's/^bfdd=no/bfdd=yes/' /etc/frr/daemons") < script.index(f"vtysh -f {bgp_config.BGPD_CONF_PATH}")
+    assert "bfdd" not in bgp_config.render_load_script()
+
+
+def test_routers_are_down_after_the_threshold_and_up_after_as_many_successes():
+    health, streaks = {}, {}
+    for result in [False, False]:
+        health, streaks = router_failover.update_health(health, streaks, {"A": result, "B": True}, 3)
+    assert health == {}
+
+    health, streaks = router_failover.update_health(health, streaks, {"A": False, "B": True}, 3)
+    assert health == {"A": False, "B": True}
+
+    health, streaks = router_failover.update_health(health, streaks, {"A": True, "B": True}, 3)
+    assert health["A"] is False and streaks["A"] == 1
+
+
+def test_routes_move_to_the_surviving_router_and_back():
+    current = {"rtb-a": "eni-a", "rtb-b": "eni-b"}
+
+    assert router_failover.plan_routes(ROUTES, ROUTERS, {"A": False, "B": True}, current) == [("rtb-a", "eni-b")]
+    assert router_failover.plan_routes(ROUTES, ROUTERS, {"A": True, "B": True}, {"rtb-a": "eni-b", "rtb-b": "eni-b"}) == [("rtb-a", "eni-a")]
+    assert router_failover.plan_routes(ROUTES, ROUTERS, {"A": False, "B": False}, current) == []
+
+
+def test_refused_connections_count_as_up_until_bgp_listened():
+    def refuse(address, timeout):
+        raise ConnectionRefusedError()
+
+    def time_out(address, timeout):
+        raise socket.timeout()
+
+    refused = router_failover.probe("192.168.9.10", 179, connect=refuse)
+    assert refused == router_failover.REFUSED
+    assert router_failover.is_up(refused, listening=False)
+    assert not router_failover.is_up(refused, listening=True)
+    assert router_failover.is_up(router_failover.ACCEPTED, listening=True)
+    assert not router_failover.is_up(router_failover.probe("192.168.9.10", 179, connect=time_out), listening=False)
+
+
+def test_router_failover_is_optional(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::Lambda::Function", 0)
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-router-A"}],
+        "UserData": {"Fn::Base64": assertions.Match.not_(assertions.Match.string_like_regexp("timers bgp"))}
+    })
+
+
+def test_controller_runs_in_the_onprem_network(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(router_failover=True)
+
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "VpcConfig": {"SubnetIds": assertions.Match.any_value()},
+        "Environment": {"Variables": {"PROBE_PORT": "179", "FAILURE_THRESHOLD": "3"}}
+    })
+    template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+        "ServiceName": "com.amazonaws.us-east-1.ec2",
+        "PrivateDnsEnabled": True
+    })
+    template.has_resource_properties("AWS::Events::Rule", {"ScheduleExpression": "rate(1 minute)"})
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-router-A"}],
+        "UserData": {"Fn::Base64": assertions.Match.string_like_regexp(r"timers bgp 3 9")}
+    })
@@ -0,0 +1,80 @@
+import json
+
+import aws_cdk.assertions as assertions
+
+from vpc_architecture_demos.site_to_site_vpn import router_telemetry
+from vpc_architecture_demos.site_to_site_vpn.router_collector import Collector, parse_bgp_summary, parse_ipsec_statusall
+
+STATUSALL = """\
+Security Associations (2 up, 0 connecting):
+AWS-VPC-GW1[1]: ESTABLISHED 20 minutes ago, 192.168.12.10[3.3.3.3]...4.4.4.4[4.4.4.4]
+AWS-VPC-GW1{%s}:  INSTALLED, TUNNEL, reqid 1, ESP in UDP SPIs: %s_i %s_o
+AWS-VPC-GW1{%s}:   AES_CBC_128/HMAC_SHA1_96, %d bytes_i (%d pkts, 2s ago), %d bytes_o (%d pkts, 1s ago), rekeying in 40 minutes
+"""
+
+
+def _statusall(sa_id, spi_in, spi_out, bytes_in, packets_in, bytes_out, packets_out):
+    return STATUSALL % (sa_id, spi_in, spi_out, sa_id, bytes_in, packets_in, bytes_out, packets_out)
+
+
+def test_parse_ipsec_statusall():
+    connections = parse_ipsec_statusall(_statusall(1, "c1", "d1", 1000, 10, 2000, 20))
+
+    assert connections == {
+        "AWS-VPC-GW1": {("c1", "d1"): {"bytes_in": 1000, "packets_in": 10, "bytes_out": 2000, "packets_out": 20}}
+    }
+
+
+def test_collector_reports_deltas_and_rekeys():
+    collector = Collector()
+    collector.ipsec_lines(parse_ipsec_statusall(_statusall(1, "c1", "d1", 1000, 10, 2000, 20)))
+
+    same_sa = collector.ipsec_lines(parse_ipsec_statusall(_statusall(1, "c1", "d1", 1500, 15, 2000, 20)))
+    assert "ipsec_bytes_in:500|c|#connection:AWS-VPC-GW1" in same_sa
+    assert "ipsec_rekeys:0|c|#connection:AWS-VPC-GW1" in same_sa
+
+    rekeyed = collector.ipsec_lines(parse_ipsec_statusall(_statusall(2, "c2", "d2", 300, 3, 100, 1)))
+    assert "ipsec_bytes_in:300|c|#connection:AWS-VPC-GW1" in rekeyed
+    assert "ipsec_rekeys:1|c|#connection:AWS-VPC-GW1" in rekeyed
+
+    down = collector.ipsec_lines({})
+    assert "ipsec_sa_established:0|g|#connection:AWS-VPC-GW1" in down
+
+
+def test_parse_bgp_summary():
+    peers = parse_bgp_summary(json.dumps({
+        "ipv4Unicast": {"peers": {
+            "169.254.10.1": {"state": "Established", "pfxRcd": 2},
+            "169.254.11.1": {"state": "Active"}
+        }}
+    }))
+
+    assert peers == {
+        "169.254.10.1": {"established": 1, "prefixes_received": 2},
+        "169.254.11.1": {"established": 0, "prefixes_received": 0},
+    }
+    assert Collector.bgp_lines(peers)[0] == "bgp_session_established:1|g|#peer:169.254.10.1"
+
+
+def test_agent_config_collects_softirq_and_ena_allowances_at_high_resolution():
+    config = json.loads(router_telemetry.render_agent_config(interval=5))
+    collected = config["metrics"]["metrics_collected"]
+
+    assert collected["cpu"]["totalcpu"] is False
+    assert "usage_softirq" in collected["cpu"]["measurement"]
+    assert collected["cpu"]["metrics_collection_interval"] == 5
+    assert "pps_allowance_exceeded" in collected["ethtool"]["metrics_include"]
+
+
+def test_router_telemetry_adds_dashboard_and_permission(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(router_telemetry=True)
+
+    template.has_resource_properties("AWS::CloudWatch::Dashboard", {
+        "DashboardName": "onprem-routers",
+        "DashboardBody": {"Fn::Join": ["", assertions.Match.array_with([assertions.Match.string_like_regexp(
+            r"SEARCH\('\{OnPremRouters,InstanceId,driver,interface\} \(MetricName=\W+ethtool_bw_in_allowance_exceeded\W+ OR"
+        )])]}
+    })
+    template.has_resource_properties("AWS::IAM::Policy", {
+        "PolicyDocument": {"Statement": [assertions.Match.object_like({"Action": "cloudwatch:PutMetricData"})]}
+    })
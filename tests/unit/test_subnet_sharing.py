@@ -0,0 +1,34 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+
+ORGANIZATIONAL_UNIT = "arn:aws:organizations::111111111111:ou/o-abc123def4/ou-ab12-cd34ef56"
+
+
+def test_subnets_are_not_shared_by_default(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::RAM::ResourceShare", 0)
+
+
+def test_private_subnets_are_shared_within_the_organization(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(share_subnets_with=["222222222222", ORGANIZATIONAL_UNIT])
+
+    template.has_resource_properties("AWS::RAM::ResourceShare", {
+        "AllowExternalPrincipals": False,
+        "Principals": ["222222222222", ORGANIZATIONAL_UNIT],
+        "ResourceArns": [
+            {"Fn::Join": ["", assertions.Match.array_with([assertions.Match.string_like_regexp(":subnet/$")])]},
+            assertions.Match.any_value(),
+        ]
+    })
+
+
+def test_subnets_cannot_be_shared_with_other_principals():
+    app = core.App()
+    stack = core.Stack(app, "sharing", env=core.Environment(region="us-east-1"))
+
+    with pytest.raises(ValueError):
+        AWSPrivateNetwork(stack, "AWSPrivateNetwork", azs=["us-east-1a", "us-east-1b"], share_with=["arn:aws:iam::222222222222:root"])
@@ -0,0 +1,41 @@
+import json
+
+import aws_cdk as core
+
+from vpc_architecture_demos import lookups, synth
+from vpc_architecture_demos.app_stacks import add_stacks
+
+
+def test_regions_from_context():
+    assert synth.regions_from_context(core.App()) == synth.DEFAULT_REGIONS
+    assert synth.regions_from_context(core.App(context={"regions": "us-east-1, eu-west-1"})) == ["us-east-1", "eu-west-1"]
+
+
+def test_parallel_synth_merges_regions_into_one_assembly(tmp_path, lookup_cache):
+    regions = ["us-east-1", "eu-west-1"]
+    outdir = tmp_path / "cdk.out"
+
+    synth.synthesize(
+        add_stacks,
+        regions,
+        outdir=str(outdir),
+        context={lookups.CACHE_FILE_CONTEXT_KEY: lookup_cache(regions)}
+    )
+    manifest = json.loads((outdir / "manifest.json").read_text())
+
+    for region in regions:
+        artifact = manifest["artifacts"][f"PrivateAccessDemoStack-{region}"]
+        assert artifact["environment"] == f"aws://unknown-account/{region}"
+        template = json.loads((outdir / artifact["properties"]["templateFile"]).read_text())
+        subnets = [r for r in template["Resources"].values() if r["Type"] == "AWS::EC2::Subnet"]
+        assert subnets[0]["Properties"]["AvailabilityZone"] == f"{region}a"
+    assert all(artifact["type"] != synth.TREE_ARTIFACT_TYPE for artifact in manifest["artifacts"].values())
+
+
+def test_endpoint_service_names_follow_the_stack_region(lookup_cache, site_to_site_vpn_template):
+    template = site_to_site_vpn_template(
+        region="eu-west-1",
+        context={lookups.CACHE_FILE_CONTEXT_KEY: lookup_cache(["eu-west-1"])}
+    )
+
+    template.resource_properties_count_is("AWS::EC2::VPCEndpoint", {"ServiceName": "com.amazonaws.eu-west-1.ssm"}, 2)
@@ -0,0 +1,103 @@
+import copy
+import json
+
+from vpc_architecture_demos import template_diff
+
+
+def _topology(size):
+    resources = {"Vpc": {"Type": "AWS::EC2::VPC", "Properties": {"CidrBlock": "10.0.0.0/8"}}}
+    for index in range(size):
+        resources[f"Subnet{index}"] = {
+            "Type": "AWS::EC2::Subnet",
+            "Properties": {"VpcId": {"Ref": "Vpc"}, "CidrBlock": f"10.{index // 256}.{index % 256}.0/24"},
+            "Metadata": {"aws:cdk:path": f"stack/Subnet{index}"}
+        }
+        resources[f"Eni{index}"] = {
+            "Type": "AWS::EC2::NetworkInterface",
+            "Properties": {"SubnetId": {"Ref": f"Subnet{index}"}, "Description": f"eni {index}"}
+        }
+    return {"Resources": resources}
+
+
+def test_identical_synth_has_no_changes(site_to_site_vpn_template):
+    old, new = site_to_site_vpn_template().to_json(), site_to_site_vpn_template().to_json()
+
+    assert template_diff.diff_templates(old, new) == []
+
+
+def test_tokens_and_metadata_are_ignored():
+    old = {"Resources": {"Fn": {
+        "Type": "AWS::Lambda::Function",
+        "Properties": {"Code": {"S3Key": "a" * 64 + ".zip"}},
+        "Metadata": {"aws:cdk:path": "old/Fn", "aws:asset:path": "asset." + "a" * 64},
+        "DependsOn": ["A", "B"]
+    }}}
+    new = copy.deepcopy(old)
+    new["Resources"]["Fn"]["Properties"]["Code"]["S3Key"] = "b" * 64 + ".zip"
+    new["Resources"]["Fn"]["Metadata"] = {"aws:cdk:path": "new/Fn"}
+    new["Resources"]["Fn"]["DependsOn"] = ["B", "A"]
+
+    assert template_diff.diff_templates(old, new) == []
+
+
+def test_subnet_cidr_change_replaces_the_interfaces_in_it():
+    old = _topology(3)
+    new = copy.deepcopy(old)
+    new["Resources"]["Subnet1"]["Properties"]["CidrBlock"] = "10.9.0.0/24"
+    new["Resources"]["Eni2"]["Properties"]["Description"] = "renamed"
+    del new["Resources"]["Eni0"]
+    new["Resources"]["Extra"] = {"Type": "AWS::EC2::RouteTable", "Properties": {"VpcId": {"Ref": "Vpc"}}}
+
+    changes = {change.logical_id: change for change in template_diff.diff_templates(old, new)}
+
+    assert changes["Subnet1"].impact == "replace"
+    assert changes["Subnet1"].properties == [template_diff.PropertyChange("CidrBlock", "replace")]
+    assert changes["Eni1"] == template_diff.ResourceChange(
+        "Eni1", "AWS::EC2::NetworkInterface", "changed", "replace",
+        [template_diff.PropertyChange("SubnetId", "replace")], "Subnet1"
+    )
+    assert changes["Eni2"].impact == "update"
+    assert (changes["Eni0"].change, changes["Extra"].change) == ("removed", "added")
+    assert template_diff.summarize(changes.values()) == {
+        "added": 1, "removed": 1, "changed": 3, "update": 1, "interrupt": 0, "replace": 2
+    }
+
+
+def test_vpc_cidr_change_cascades_through_the_stack(site_to_site_vpn_template):
+    old, new = site_to_site_vpn_template().to_json(), site_to_site_vpn_template(aws_vpc_cidr="10.17.0.0/16").to_json()
+    changes = template_diff.diff_templates(old, new)
+    replaced = {change.logical_id for change in changes if change.impact == "replace"}
+
+    assert any(logical_id.startswith("AWSPrivateNetworkAWSVpc") for logical_id in replaced)
+    assert any(logical_id.startswith("AWSPrivateNetworkAWSEC2A") for logical_id in replaced)
+    assert not any(logical_id.startswith("OnPremNetworkOnPremVpc") for logical_id in replaced)
+
+
+def test_large_topology_diff_is_linear(monkeypatch):
+    old = _topology(1000)
+    new = copy.deepcopy(old)
+    new["Resources"]["Vpc"]["Properties"]["CidrBlock"] = "10.0.0.0/9"
+    fingerprinted, compared = [], []
+    fingerprint, diff_resource = template_diff.fingerprint, template_diff._diff_resource
+    monkeypatch.setattr(template_diff, "fingerprint", lambda value: fingerprinted.append(value) or fingerprint(value))
+    monkeypatch.setattr(template_diff, "_diff_resource", lambda logical_id, *args: compared.append(logical_id) or diff_resource(logical_id, *args))
+
+    changes = template_diff.diff_templates(old, new)
+
+    # one hash per resource and side, then per property and attribute of the changed VPC only
+    assert compared == ["Vpc"]
+    assert len(fingerprinted) == 2 * 2001 + 2 * (1 + 6)
+    assert len(changes) == 2001
+    assert all(change.impact == "replace" for change in changes)
+
+
+def test_cli_fails_on_replacements(tmp_path, capsys):
+    old = _topology(2)
+    new = copy.deepcopy(old)
+    new["Resources"]["Subnet0"]["Properties"]["CidrBlock"] = "10.9.0.0/24"
+    (tmp_path / "old.json").write_text(json.dumps(old))
+    (tmp_path / "new.json").write_text(json.dumps(new))
+
+    assert template_diff.main([str(tmp_path / "old.json"), str(tmp_path / "new.json"), "--fail-on", "replace"]) == 1
+    assert "~ Eni0 AWS::EC2::NetworkInterface replace SubnetId (references Subnet0)" in capsys.readouterr().out
+    assert template_diff.main([str(tmp_path / "old.json"), str(tmp_path / "old.json"), "--fail-on", "update"]) == 0
@@ -0,0 +1,69 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn import bgp_config, cidr_config, connect_config
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+from vpc_architecture_demos.site_to_site_vpn.tgw_connect import TransitGatewayConnect
+
+
+def test_inside_addresses():
+    assert connect_config.inside_addresses("169.254.100.8/29") == ("169.254.100.9", ["169.254.100.10", "169.254.100.11"])
+    with pytest.raises(ValueError):
+        connect_config.inside_addresses("169.254.100.0/30")
+
+
+def test_routers_advertise_more_specifics_to_both_tgw_addresses():
+    conf = connect_config.render_bgpd_conf(connect_config.CONNECT_PEERS[0], ["192.168.8.0/21"])
+
+    assert "  network 192.168.8.0/22\n  network 192.168.12.0/22\n" in conf
+    assert "  network 192.168.8.0/21\n" not in conf
+    assert f" neighbor 169.254.100.2 remote-as {bgp_config.TRANSIT_GATEWAY_ASN}\n" in conf
+    assert " neighbor 169.254.100.3 ebgp-multihop 2\n" in conf
+    assert "  maximum-paths 2\n" in conf
+
+
+def test_connect_is_optional(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::EC2::TransitGatewayConnect", 0)
+    template.has_resource_properties("AWS::EC2::TransitGateway", {
+        "TransitGatewayCidrBlocks": assertions.Match.absent()
+    })
+
+
+def test_connect_attachment_over_a_vpc_transport(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(tgw_connect=True)
+
+    template.has_resource_properties("AWS::EC2::TransitGateway", {
+        "TransitGatewayCidrBlocks": [cidr_config.TRANSIT_GATEWAY_CIDR]
+    })
+    template.resource_count_is("AWS::EC2::TransitGatewayAttachment", 2)
+    template.has_resource_properties("AWS::EC2::TransitGatewayConnect", {
+        "Options": {"Protocol": "gre"},
+        "TransportTransitGatewayAttachmentId": {
+            "Fn::GetAtt": [assertions.Match.string_like_regexp("OnPremTGWTransportAttachment"), "Id"]
+        }
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroupIngress", {
+        "IpProtocol": "47",
+        "CidrIp": cidr_config.TRANSIT_GATEWAY_CIDR
+    })
+    template.resource_count_is("Custom::AWS", 2)
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-router-B"}],
+        "UserData": {"Fn::Base64": assertions.Match.string_like_regexp(
+            r"remote 10\.255\.0\.11 [\s\S]*169\.254\.100\.9/29"
+        )}
+    })
+
+
+def test_connect_requires_a_transit_gateway_cidr_block():
+    app = core.App()
+    stack = core.Stack(app, "connect", env=core.Environment(region="us-east-1"))
+    aws_network = AWSPrivateNetwork(stack, "AWSPrivateNetwork", azs=["us-east-1a", "us-east-1b"])
+    onprem_network = OnPremNetwork(stack, "OnPremNetwork", azs=["us-east-1a", "us-east-1b"], tgw_connect=True)
+
+    with pytest.raises(ValueError):
+        TransitGatewayConnect(stack, "TransitGatewayConnect", aws_network=aws_network, onprem_network=onprem_network)
@@ -0,0 +1,125 @@
+import socket
+import threading
+
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn import cidr_config, latency_matrix
+from vpc_architecture_demos.site_to_site_vpn.functions.latency_probe import index as latency_probe
+from vpc_architecture_demos.site_to_site_vpn.functions.peering_routes import index as peering_routes
+
+
+def test_aws_private_subnet_cidrs_match_the_defaults():
+    assert cidr_config.aws_private_subnet_cidrs(cidr_config.AWS_VPC_CIDR) == [
+        cidr_config.AWS_PRIVATE_SUBNET_A_CIDR, cidr_config.AWS_PRIVATE_SUBNET_B_CIDR
+    ]
+    assert cidr_config.aws_private_subnet_cidrs("10.17.0.0/16") == ["10.17.32.0/20", "10.17.96.0/20"]
+    with pytest.raises(ValueError):
+        cidr_config.aws_private_subnet_cidrs("10.17.0.0/20")
+
+
+def test_later_region_requests_the_peering(cached_site_to_site_vpn_template):
+    template = cached_site_to_site_vpn_template(region="us-east-1", aws_vpc_cidr="10.17.0.0/16", peer_regions=["eu-west-1"])
+
+    template.has_resource_properties("AWS::EC2::VPC", {"CidrBlock": "10.17.0.0/16"})
+    template.has_resource_properties("AWS::EC2::TransitGatewayPeeringAttachment", {"PeerRegion": "eu-west-1"})
+    template.has_resource_properties("AWS::CloudFormation::CustomResource", {
+        "LocalRegion": "us-east-1",
+        "PeerRegion": "eu-west-1",
+        "LocalCidrs": ["10.17.0.0/16"],
+        "PeerPrefixListId": {"Fn::GetAtt": [assertions.Match.string_like_regexp("PeerParametereuwest1prefixlistid"), "Parameter.Value"]}
+    })
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "Handler": "index.handler",
+        "Environment": {"Variables": assertions.Match.object_like({"DESTINATION_REGIONS": "eu-west-1"})}
+    })
+
+
+def test_earlier_region_publishes_its_cidr_and_prefix_list(cached_site_to_site_vpn_template):
+    template = cached_site_to_site_vpn_template(region="eu-west-1", peer_regions=["us-east-1"])
+
+    template.resource_count_is("AWS::EC2::TransitGatewayPeeringAttachment", 0)
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/hybrid-network/aws-private-network/vpc-cidr",
+        "Value": cidr_config.AWS_VPC_CIDR
+    })
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/hybrid-network/aws-private-network/prefix-list-id",
+        "Value": {"Fn::GetAtt": [assertions.Match.string_like_regexp("AWSPrefixList"), "PrefixListId"]}
+    })
+
+
+class _PrefixListClient:
+
+    def __init__(self, cidrs):
+        self.cidrs = list(cidrs)
+        self.version = 1
+
+    def get_managed_prefix_list_entries(self, PrefixListId):
+        return {"Entries": [{"Cidr": cidr} for cidr in self.cidrs]}
+
+    def describe_managed_prefix_lists(self, PrefixListIds):
+        return {"PrefixLists": [{"PrefixListId": PrefixListIds[0], "Version": self.version}]}
+
+    def modify_managed_prefix_list(self, PrefixListId, CurrentVersion, AddEntries, RemoveEntries):
+        assert CurrentVersion == self.version
+        removed = [entry["Cidr"] for entry in RemoveEntries]
+        self.cidrs = [cidr for cidr in self.cidrs if cidr not in removed] + [entry["Cidr"] for entry in AddEntries]
+        self.version += 1
+
+
+def test_accepter_prefix_list_admits_the_requester():
+    accepter = _PrefixListClient([cidr_config.AWS_VPC_CIDR])
+
+    peering_routes.update_prefix_list(accepter, "pl-a", add=["10.17.0.0/16"])
+    peering_routes.update_prefix_list(accepter, "pl-a", add=["10.17.0.0/16"])
+    assert accepter.cidrs == [cidr_config.AWS_VPC_CIDR, "10.17.0.0/16"]
+    assert accepter.version == 2
+
+    peering_routes.update_prefix_list(accepter, "pl-a", remove=["10.17.0.0/16"])
+    assert accepter.cidrs == [cidr_config.AWS_VPC_CIDR]
+
+
+def test_route_plan_covers_both_sides():
+    plan = peering_routes.route_plan({
+        "LocalRegion": "us-east-1", "LocalTransitGatewayId": "tgw-a", "LocalCidrs": ["10.17.0.0/16"],
+        "PeerRegion": "eu-west-1", "PeerTransitGatewayId": "tgw-b", "PeerCidrs": ["10.16.0.0/16"],
+    })
+
+    assert plan == [("us-east-1", "tgw-a", "10.16.0.0/16"), ("eu-west-1", "tgw-b", "10.17.0.0/16")]
+
+
+def test_build_matrix_fills_missing_directions():
+    matrix = latency_matrix.build_matrix([
+        {"source": "us-east-1", "rtt_ms": {"eu-west-1": 70.0, "us-west-2": 60.0}},
+        {"source": "eu-west-1", "rtt_ms": {"us-east-1": 72.0}},
+    ])
+
+    assert matrix["eu-west-1"]["us-east-1"] == 72.0
+    assert matrix["us-west-2"]["us-east-1"] == 60.0
+    assert matrix["us-west-2"]["us-west-2"] == 0.0
+
+
+def test_rank_regions_adds_site_and_onward_rtt():
+    matrix = latency_matrix.build_matrix([
+        {"source": "us-east-1", "rtt_ms": {"eu-west-1": 70.0}},
+    ])
+
+    ranking = latency_matrix.rank_regions({"us-east-1": 100.0, "eu-west-1": 20.0}, matrix, targets=["us-east-1"])
+
+    assert ranking == [("eu-west-1", 90.0), ("us-east-1", 100.0)]
+
+
+def test_measure_rtt_against_a_local_listener():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    acceptor = threading.Thread(target=lambda: [server.accept()[0].close() for _ in range(3)], daemon=True)
+    acceptor.start()
+
+    rtt = latency_probe.measure_rtt(server.getsockname(), samples=3)
+    acceptor.join(timeout=5)
+    server.close()
+
+    assert rtt is not None and rtt >= 0
+    assert latency_probe.build_row("us-east-1", {"eu-west-1": 70.123, "us-west-2": None})["rtt_ms"] == {"eu-west-1": 70.12}
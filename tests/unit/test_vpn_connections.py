@@ -0,0 +1,99 @@
+import aws_cdk.assertions as assertions
+import pytest
+
+from vpc_architecture_demos.site_to_site_vpn import bgp_config, ipsec_config
+
+
+def test_strongswan_proposals_match_the_tunnel_options():
+    options = ipsec_config.DEFAULT_TUNNEL_OPTIONS
+
+    assert ipsec_config.proposals(options) == ("aes256gcm16-prfsha256-ecp384!", "aes256gcm16-ecp384!")
+    assert ipsec_config.proposals(options._replace(phase2_encryption="AES128", dh_group=14))[1] == "aes128-sha256-modp2048!"
+
+    conf = ipsec_config.render_ipsec_conf(options, ipsec_config.TUNNEL_INSIDE_CIDRS[0])
+    assert "    keyexchange=ikev2\n" in conf
+    assert "    margintime=540s\n    rekeyfuzz=100%\n" in conf
+    assert "    dpdaction=restart\n" in conf
+    # AWS starts the tunnels, the router only responds
+    assert "    auto=add\n" in conf
+    assert "conn Tunnel2\n    right=%TUNNEL2_OUTSIDE_IP%\n    mark=200\n" in conf
+
+
+def test_vti_updown_clamps_the_tcp_mss():
+    updown = ipsec_config.render_vti_updown(ipsec_config.TUNNEL_INSIDE_CIDRS[0])
+
+    assert "    100) INSIDE=169.254.10.2/30 ;;\n" in updown
+    assert "iptables -t mangle -A FORWARD -o $VTI -p tcp --tcp-flags SYN,RST SYN -j TCPMSS --set-mss 1379\n" in updown
+    assert "iptables -t mangle -D FORWARD -o $VTI -p tcp --tcp-flags SYN,RST SYN -j TCPMSS --set-mss 1379\n" in updown
+
+
+def test_invalid_tunnel_options_are_rejected():
+    options = ipsec_config.DEFAULT_TUNNEL_OPTIONS
+    for invalid in [
+        options._replace(phase2_encryption="AES256-GCM"),
+        options._replace(rekey_margin=options.phase2_lifetime),
+        options._replace(dpd_timeout=10),
+        options._replace(startup_action="initiate"),
+    ]:
+        with pytest.raises(ValueError):
+            ipsec_config.validate(invalid)
+    with pytest.raises(ValueError):
+        ipsec_config.inside_addresses("169.254.10.0/29")
+
+
+def test_vpn_connections_are_optional(site_to_site_vpn_template):
+    template = site_to_site_vpn_template()
+
+    template.resource_count_is("AWS::EC2::VPNConnection", 0)
+
+
+def test_vpn_connections_with_tunnel_options(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(vpn_connections=True)
+
+    template.resource_count_is("AWS::EC2::VPNConnection", 2)
+    template.has_resource_properties("AWS::EC2::VPNConnection", {
+        "StaticRoutesOnly": False,
+        "Tags": [{"Key": "Name", "Value": "onprem-router-B-vpn"}],
+        "VpnTunnelOptionsSpecifications": [
+            assertions.Match.object_like({
+                "TunnelInsideCidr": "169.254.11.0/30",
+                "IKEVersions": [{"Value": "ikev2"}],
+                "Phase2EncryptionAlgorithms": [{"Value": "AES256-GCM-16"}],
+                "Phase1DHGroupNumbers": [{"Value": 20}],
+                "DPDTimeoutAction": "restart",
+                "StartupAction": "start",
+            }),
+            assertions.Match.object_like({"TunnelInsideCidr": "169.254.11.4/30"}),
+        ]
+    })
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-router-B"}],
+        "UserData": {"Fn::Base64": assertions.Match.string_like_regexp(
+            r"esp=aes256gcm16-ecp384![\s\S]*" + f"neighbor 169.254.11.5 remote-as {bgp_config.TRANSIT_GATEWAY_ASN}"
+        )}
+    })
+
+
+def test_vpn_connections_are_monitored_and_probed(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(vpn_connections=True, monitoring=True)
+
+    outputs = template.find_outputs("*")
+    for router in "AB":
+        [value] = [output["Value"] for key, output in outputs.items() if f"Router{router}VpnConnectionId" in key]
+        assert value["Ref"].startswith(f"VpnConnectionsOnPremRouter{router}VpnConnection")
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "MetricName": "TunnelState",
+        "Namespace": "AWS/VPN",
+        "Dimensions": [{"Name": "VpnId", "Value": {"Ref": assertions.Match.string_like_regexp("^VpnConnectionsOnPremRouterBVpnConnection")}}]
+    })
+
+
+def test_vpn_neighbors_join_the_connect_sessions(site_to_site_vpn_template):
+    template = site_to_site_vpn_template(vpn_connections=True, tgw_connect=True)
+
+    template.has_resource_properties("AWS::EC2::Instance", {
+        "Tags": [{"Key": "Name", "Value": "onprem-router-A"}],
+        "UserData": {"Fn::Base64": assertions.Match.string_like_regexp(
+            r"neighbor 169.254.10.1 remote-as[\s\S]*neighbor 169.254.10.5 remote-as[\s\S]*neighbor 169.254.100.2 remote-as"
+        )}
+    })
@@ -0,0 +1,53 @@
+#pylint: disable-all
+import aws_cdk as cdk
+
+from aws_cdk import Environment
+
+from vpc_architecture_demos import performance_lint
+
+from vpc_architecture_demos.client_vpn import client_vpn_stack
+from vpc_architecture_demos.client_vpn.client_vpn_stack import ClientVpnStack
+from vpc_architecture_demos.site_to_site_vpn.site_to_site_vpn_stack import SiteToSiteVpnStack
+from vpc_architecture_demos.private_access.private_access_demo_stack import PrivateAccessDemoStack
+
+
+def add_stacks(app: cdk.App, region: str):
+    """
+    Adds the stacks deployed to one region to an app.
+
+    Construct IDs carry the region so that several regions can share one cloud
+    assembly; stack names do not, since they only need to be unique per region.
+
+    :param app: The app to add the stacks to.
+    :type app: cdk.App
+    :param region: The region the stacks are deployed to.
+    :type region: str
+    """
+    # site_to_site_vpn_stack = SiteToSiteVpnStack(
+    #     scope=app,
+    #     construct_id=f"SiteToSiteVpnStack-{region}",
+    #     stack_name="site-to-site-vpn-stack",
+    #     env=Environment(region=region)
+    # )
+    # performance_lint.enable(site_to_site_vpn_stack)
+
+    private_access_demo_stack = PrivateAccessDemoStack(
+        scope=app,
+        construct_id=f"PrivateAccessDemoStack-{region}",
+        stack_name="vpc-architecture-demos-nat-gateway",
+        env=Environment(region=region)
+    )
+    performance_lint.enable(private_access_demo_stack)
+
+    # the endpoint needs an ACM server certificate, so the stack is only added
+    # once one is passed with -c client-vpn-server-certificate-arn=...
+    server_certificate_arn = app.node.try_get_context(client_vpn_stack.SERVER_CERTIFICATE_CONTEXT_KEY)
+    if server_certificate_arn:
+        client_vpn = ClientVpnStack(
+            scope=app,
+            construct_id=f"ClientVpnStack-{region}",
+            stack_name="client-vpn-stack",
+            server_certificate_arn=server_certificate_arn,
+            env=Environment(region=region)
+        )
+        performance_lint.enable(client_vpn)
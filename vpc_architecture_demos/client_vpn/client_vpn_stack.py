@@ -0,0 +1,188 @@
+#pylint: disable-all
+import ipaddress
+
+from aws_cdk import (
+    Stack,
+    CfnOutput,
+    CfnTag,
+    aws_ec2 as ec2,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos import lookups
+from vpc_architecture_demos.site_to_site_vpn import cidr_config
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+
+CLIENT_CIDR = "172.16.0.0/22"
+"""
+The CIDR block client addresses are assigned from. Must not overlap the VPC or the
+on-prem network, and must be between a /12 and a /22.
+
+:type: str
+"""
+
+SERVER_CERTIFICATE_CONTEXT_KEY = "client-vpn-server-certificate-arn"
+"""
+The CDK context key holding the ACM ARN of the endpoint's server certificate. The
+app only adds the client VPN stack if it is set.
+
+:type: str
+"""
+
+
+class ClientVpnStack(Stack):
+    """
+    Creates an AWS private network with a split-tunnel client VPN endpoint.
+
+    Only the VPC prefix is routed through the VPN by default; clients keep using their
+    local internet connection for everything else, so user traffic does not hairpin
+    through AWS and the endpoint only carries traffic for private networks. The stack
+    has its own AWS private network without a connection to an on-prem network, so
+    on-prem prefixes are only routed when they are passed in ``split_tunnel_prefixes``,
+    once its transit gateway has a route to them.
+    The endpoint is associated with a private subnet in each availability zone, so
+    clients keep their connection if one zone fails, and each prefix gets its own
+    authorization rule.
+
+    Clients authenticate with certificates issued by the CA of
+    ``client_root_certificate_arn``, see the AWS Client VPN mutual authentication guide.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param construct_id: The stack ID.
+    :type construct_id: str
+    :param server_certificate_arn: The ACM ARN of the endpoint's server certificate.
+    :type server_certificate_arn: str
+    :param client_root_certificate_arn: The ACM ARN of the CA that issued the client
+        certificates. The server certificate's if None, for when both share a CA.
+    :type client_root_certificate_arn: str
+    :param client_cidr: The CIDR block client addresses are assigned from.
+    :type client_cidr: str
+    :param split_tunnel_prefixes: The prefixes routed through the VPN. The VPC CIDR
+        block if None.
+    :type split_tunnel_prefixes: list
+    :param access_group_id: The identity provider group authorized for the prefixes.
+        All clients if None.
+    :type access_group_id: str
+    :param dns_servers: The DNS servers pushed to clients. The clients' own if None.
+    :type dns_servers: list
+    :param aws_vpc_cidr: The /16 CIDR block of the VPC.
+    :type aws_vpc_cidr: str
+    """
+
+    @property
+    def endpoint_id(self) -> str:
+        """
+        The ID of the client VPN endpoint.
+        """
+        return self._endpoint.ref
+
+    @property
+    def split_tunnel_prefixes(self) -> list:
+        """
+        The prefixes routed through the VPN.
+        """
+        return list(self._split_tunnel_prefixes)
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        server_certificate_arn: str,
+        client_root_certificate_arn: str = None,
+        client_cidr: str = CLIENT_CIDR,
+        split_tunnel_prefixes: list = None,
+        access_group_id: str = None,
+        dns_servers: list = None,
+        aws_vpc_cidr: str = cidr_config.AWS_VPC_CIDR,
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self._split_tunnel_prefixes = split_tunnel_prefixes or [aws_vpc_cidr]
+
+        client_network = ipaddress.ip_network(client_cidr)
+        if not 12 <= client_network.prefixlen <= 22:
+            raise ValueError(f"the client CIDR block must be between a /12 and a /22, got {client_cidr}")
+        for prefix in self._split_tunnel_prefixes:
+            if ipaddress.ip_network(prefix).overlaps(client_network):
+                raise ValueError(f"the split tunnel prefix {prefix} overlaps the client CIDR block {client_cidr}")
+
+        azs = lookups.availability_zones(self)
+
+        self._aws_private_network = AWSPrivateNetwork(
+            scope=self,
+            id="AWSPrivateNetwork",
+            azs=azs,
+            vpc_cidr=aws_vpc_cidr
+        )
+
+        self._endpoint = ec2.CfnClientVpnEndpoint(
+            scope=self,
+            id="ClientVpnEndpoint",
+            description="Split-tunnel client VPN to the AWS private and on-prem networks",
+            client_cidr_block=client_cidr,
+            server_certificate_arn=server_certificate_arn,
+            authentication_options=[ec2.CfnClientVpnEndpoint.ClientAuthenticationRequestProperty(
+                type="certificate-authentication",
+                mutual_authentication=ec2.CfnClientVpnEndpoint.CertificateAuthenticationRequestProperty(
+                    client_root_certificate_chain_arn=client_root_certificate_arn or server_certificate_arn
+                )
+            )],
+            connection_log_options=ec2.CfnClientVpnEndpoint.ConnectionLogOptionsProperty(enabled=False),
+            split_tunnel=True,
+            dns_servers=dns_servers,
+            vpc_id=self._aws_private_network.vpc_id,
+            security_group_ids=[self._aws_private_network.security_group_id],
+            tag_specifications=[ec2.CfnClientVpnEndpoint.TagSpecificationProperty(
+                resource_type="client-vpn-endpoint",
+                tags=[CfnTag(
+                    key="Name",
+                    value="aws-private-network-client-vpn"
+                )]
+            )]
+        )
+
+        associations = []
+        for index, subnet_id in enumerate(self._aws_private_network.private_subnet_ids):
+            associations.append(ec2.CfnClientVpnTargetNetworkAssociation(
+                scope=self,
+                id=f"ClientVpnAssociation{'AB'[index]}",
+                client_vpn_endpoint_id=self._endpoint.ref,
+                subnet_id=subnet_id
+            ))
+
+        vpc_network = ipaddress.ip_network(aws_vpc_cidr)
+        for prefix in self._split_tunnel_prefixes:
+            name = prefix.replace(".", "-").replace("/", "-")
+            ec2.CfnClientVpnAuthorizationRule(
+                scope=self,
+                id=f"ClientVpnAuthorization-{name}",
+                client_vpn_endpoint_id=self._endpoint.ref,
+                target_network_cidr=prefix,
+                authorize_all_groups=access_group_id is None or None,
+                access_group_id=access_group_id,
+                description=f"Allow clients to reach {prefix}"
+            )
+
+            # each association adds the route to the VPC CIDR block itself
+            if ipaddress.ip_network(prefix).subnet_of(vpc_network):
+                continue
+            for index, association in enumerate(associations):
+                route = ec2.CfnClientVpnRoute(
+                    scope=self,
+                    id=f"ClientVpnRoute-{name}-{'AB'[index]}",
+                    client_vpn_endpoint_id=self._endpoint.ref,
+                    destination_cidr_block=prefix,
+                    target_vpc_subnet_id=self._aws_private_network.private_subnet_ids[index],
+                    description=f"Route {prefix} through the transit gateway"
+                )
+                route.add_dependency(target=association)
+
+        CfnOutput(
+            scope=self,
+            id="ClientVpnEndpointId",
+            description="ID of the client VPN endpoint, for downloading the client configuration",
+            value=self._endpoint.ref
+        )
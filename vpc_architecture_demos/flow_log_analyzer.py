@@ -0,0 +1,273 @@
+#pylint: disable-all
+"""
+Summarizes VPC and transit gateway flow logs delivered as Parquet by :mod:`vpc_architecture_demos.flow_logs`.
+
+Files are read one record batch at a time and only the columns the summary needs
+are decoded, so memory use depends on the number of distinct address pairs, not on
+the number of log records. Hourly Hive partitions (``year=/month=/day=/hour=``) in
+the file paths are used to skip files outside the requested time window without
+opening them::
+
+    $ aws s3 sync s3://<flow-logs-bucket>/AWSLogs/ ./flowlogs/
+    $ python -m vpc_architecture_demos.flow_log_analyzer ./flowlogs --start 2023-03-01T00 --end 2023-03-02T00
+
+VPC flow logs record a flow at every interface it crosses and transit gateway flow
+logs record it again at the attachment, so point the analyzer at one service's
+files at a time when byte totals matter.
+
+Requires ``pyarrow``.
+"""
+import argparse
+import heapq
+import ipaddress
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime
+
+from vpc_architecture_demos.site_to_site_vpn import cidr_config
+
+DEFAULT_NETWORKS = {
+    "onprem": [cidr_config.ONPREM_CIDR],
+    "aws": [cidr_config.AWS_VPC_CIDR],
+}
+"""
+The networks that paths are attributed to, by name.
+
+:type: dict
+"""
+
+BATCH_SIZE = 65536
+"""
+The number of records decoded at a time.
+
+:type: int
+"""
+
+_PARTITION_PATTERN = re.compile(r"year=(\d{4})/month=(\d{2})/day=(\d{2})/hour=(\d{2})")
+
+
+class FlowLogSummary:
+    """
+    Traffic totals accumulated over any number of flow log records.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.bytes = 0
+        self.packets = 0
+        self.talker_bytes = Counter()
+        self.path_bytes = Counter()
+        self.attachment_bytes = Counter()
+        self.rejected_records = 0
+        self.rejected_bytes = 0
+        self.rejected_talkers = Counter()
+
+    def top_talkers(self, n: int = 10) -> list:
+        """
+        Returns the address pairs that sent the most bytes.
+
+        :param n: The number of pairs to return.
+        :type n: int
+        :return: ``(srcaddr, dstaddr, bytes)`` tuples, largest first.
+        :rtype: list
+        """
+        return [(src, dst, total) for (src, dst), total in heapq.nlargest(n, self.talker_bytes.items(), key=lambda item: item[1])]
+
+    def to_dict(self, top: int = 10) -> dict:
+        """
+        Returns the summary as plain data suitable for JSON.
+
+        :param top: The number of top talkers and rejected talkers to include.
+        :type top: int
+        :rtype: dict
+        """
+        rejected = heapq.nlargest(top, self.rejected_talkers.items(), key=lambda item: item[1])
+        return {
+            "records": self.records,
+            "bytes": self.bytes,
+            "packets": self.packets,
+            "top_talkers": [
+                {"srcaddr": src, "dstaddr": dst, "bytes": total} for src, dst, total in self.top_talkers(top)
+            ],
+            "bytes_per_path": dict(sorted(self.path_bytes.items())),
+            "bytes_per_attachment": dict(sorted(self.attachment_bytes.items())),
+            "rejected": {
+                "records": self.rejected_records,
+                "bytes": self.rejected_bytes,
+                "top_talkers": [
+                    {"srcaddr": src, "dstaddr": dst, "records": count} for (src, dst), count in rejected
+                ],
+            },
+        }
+
+
+class PathClassifier:
+    """
+    Attributes addresses to named networks and flows to paths such as ``onprem->aws``.
+
+    :param networks: Lists of CIDR blocks keyed by network name.
+    :type networks: dict
+    """
+
+    def __init__(self, networks: dict = DEFAULT_NETWORKS):
+        self._networks = [
+            (name, ipaddress.ip_network(cidr)) for name, cidrs in networks.items() for cidr in cidrs
+        ]
+        self._cache = {}
+
+    def network(self, address: str) -> str:
+        """
+        Returns the name of the network an address belongs to, or ``external``.
+        """
+        if address not in self._cache:
+            name = "external"
+            try:
+                ip = ipaddress.ip_address(address)
+            except ValueError:
+                ip = None
+            for candidate, network in self._networks:
+                if ip is not None and ip in network:
+                    name = candidate
+                    break
+            self._cache[address] = name
+        return self._cache[address]
+
+    def path(self, srcaddr: str, dstaddr: str) -> str:
+        """
+        Returns the path a flow took, e.g. ``onprem->aws``.
+        """
+        return f"{self.network(srcaddr)}->{self.network(dstaddr)}"
+
+
+def partition_hour(path: str):
+    """
+    Returns the hour encoded in a path's Hive partitions, or None if it has none.
+
+    :param path: A flow log file path.
+    :type path: str
+    :rtype: datetime
+    """
+    match = _PARTITION_PATTERN.search(path.replace(os.sep, "/"))
+    if match is None:
+        return None
+    return datetime(*(int(part) for part in match.groups()))
+
+
+def iter_parquet_files(root: str, start: datetime = None, end: datetime = None):
+    """
+    Yields the Parquet files below a directory in path order, skipping partitions
+    outside ``[start, end)``. Files without partition information are always included.
+
+    :param root: A directory or a single file.
+    :type root: str
+    :param start: The first hour to include.
+    :type start: datetime
+    :param end: The first hour to exclude.
+    :type end: datetime
+    """
+    if os.path.isfile(root):
+        yield root
+        return
+
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for file_name in sorted(files):
+            if not file_name.endswith(".parquet"):
+                continue
+            path = os.path.join(directory, file_name)
+            hour = partition_hour(path)
+            if hour is not None and ((start is not None and hour < start) or (end is not None and hour >= end)):
+                continue
+            yield path
+
+
+def _column_name(name: str) -> str:
+    return name.replace("-", "_")
+
+
+def summarize(paths, classifier: PathClassifier = None, summary: FlowLogSummary = None) -> FlowLogSummary:
+    """
+    Streams flow log Parquet files into a summary.
+
+    :param paths: The files to read.
+    :param classifier: Attributes flows to paths. Defaults to the project networks.
+    :type classifier: PathClassifier
+    :param summary: An existing summary to add to.
+    :type summary: FlowLogSummary
+    :rtype: FlowLogSummary
+    """
+    import pyarrow.parquet as pq
+
+    classifier = classifier or PathClassifier()
+    summary = summary or FlowLogSummary()
+
+    for path in paths:
+        parquet_file = pq.ParquetFile(path)
+        available = {_column_name(name): name for name in parquet_file.schema_arrow.names}
+        wanted = ["srcaddr", "dstaddr", "bytes", "packets", "action", "tgw_attachment_id"]
+        columns = [available[name] for name in wanted if name in available]
+
+        for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE, columns=columns):
+            data = {_column_name(name): column.to_pylist() for name, column in zip(batch.schema.names, batch.columns)}
+            rows = batch.num_rows
+            srcaddrs = data.get("srcaddr", [None] * rows)
+            dstaddrs = data.get("dstaddr", [None] * rows)
+            byte_counts = data.get("bytes", [0] * rows)
+            packet_counts = data.get("packets", [0] * rows)
+            actions = data.get("action", [None] * rows)
+            attachments = data.get("tgw_attachment_id", [None] * rows)
+
+            for srcaddr, dstaddr, byte_count, packet_count, action, attachment in zip(
+                srcaddrs, dstaddrs, byte_counts, packet_counts, actions, attachments
+            ):
+                byte_count = byte_count or 0
+                summary.records += 1
+                summary.bytes += byte_count
+                summary.packets += packet_count or 0
+
+                if srcaddr is None or dstaddr is None:
+                    continue
+                summary.talker_bytes[(srcaddr, dstaddr)] += byte_count
+                summary.path_bytes[classifier.path(srcaddr, dstaddr)] += byte_count
+                if attachment:
+                    summary.attachment_bytes[attachment] += byte_count
+                if action == "REJECT":
+                    summary.rejected_records += 1
+                    summary.rejected_bytes += byte_count
+                    summary.rejected_talkers[(srcaddr, dstaddr)] += 1
+
+    return summary
+
+
+def _hour(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize Parquet flow logs.")
+    parser.add_argument("root", help="directory (or file) containing flow log Parquet files")
+    parser.add_argument("--start", type=_hour, help="first hour to include, e.g. 2023-03-01T00")
+    parser.add_argument("--end", type=_hour, help="first hour to exclude, e.g. 2023-03-02T00")
+    parser.add_argument("--top", type=int, default=10, help="number of top talkers to report")
+    parser.add_argument(
+        "--network", action="append", default=[], metavar="NAME=CIDR",
+        help="attribute a CIDR to a named network instead of the project defaults, can be repeated"
+    )
+    args = parser.parse_args(argv)
+
+    networks = {}
+    for network in args.network:
+        name, cidr = network.split("=", 1)
+        networks.setdefault(name, []).append(cidr)
+
+    summary = summarize(
+        iter_parquet_files(args.root, start=args.start, end=args.end),
+        classifier=PathClassifier(networks or DEFAULT_NETWORKS)
+    )
+    print(json.dumps(summary.to_dict(top=args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#pylint: disable-all
+
+from aws_cdk import (
+    Duration,
+    Stack,
+    CfnTag,
+    aws_ec2 as ec2,
+    aws_iam as iam,
+    aws_s3 as s3,
+)
+
+from constructs import Construct
+
+VPC_LOG_FORMAT = " ".join("${%s}" % field for field in [
+    "version", "account-id", "interface-id", "srcaddr", "dstaddr", "srcport", "dstport",
+    "protocol", "packets", "bytes", "start", "end", "action", "log-status", "vpc-id",
+    "subnet-id", "az-id", "flow-direction", "traffic-path", "pkt-srcaddr", "pkt-dstaddr",
+])
+"""
+The custom VPC flow log format. It extends the default fields with the ones the
+analyzer uses to attribute traffic to a path.
+
+:type: str
+"""
+
+PARQUET_DESTINATION_OPTIONS = {
+    "FileFormat": "parquet",
+    "HiveCompatiblePartitions": True,
+    "PerHourPartition": True,
+}
+"""
+The S3 destination options shared by all flow logs: Parquet files in hourly,
+Hive-compatible partitions so queries and the local analyzer can prune by time.
+
+:type: dict
+"""
+
+
+class FlowLogs(Construct):
+    """
+    Creates an S3 bucket for VPC and transit gateway flow logs and attaches flow logs to it.
+
+    Logs are delivered as Parquet with hourly Hive partitions. Use
+    ``python -m vpc_architecture_demos.flow_log_analyzer`` to summarize a local copy.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param retention: How long log files are kept.
+    :type retention: Duration
+    """
+
+    @property
+    def bucket(self) -> s3.Bucket:
+        """
+        The bucket that receives the flow logs.
+        """
+        return self._bucket
+
+    def __init__(self, scope: Construct, id: str, retention: Duration = Duration.days(30), **kwargs):
+        super().__init__(scope, id, **kwargs)
+
+        self._bucket = s3.Bucket(
+            scope=self,
+            id="FlowLogsBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[s3.LifecycleRule(expiration=retention)]
+        )
+
+        # the same statements the log delivery service would otherwise add on first delivery;
+        # Hive-compatible partitions put the account under an "aws-account-id=" key
+        account = Stack.of(self).account
+        self._bucket.add_to_resource_policy(iam.PolicyStatement(
+            sid="AWSLogDeliveryWrite",
+            principals=[iam.ServicePrincipal("delivery.logs.amazonaws.com")],
+            actions=["s3:PutObject"],
+            resources=[self._bucket.arn_for_objects(f"AWSLogs/aws-account-id={account}/*")],
+            conditions={
+                "StringEquals": {
+                    "s3:x-amz-acl": "bucket-owner-full-control",
+                    "aws:SourceAccount": account
+                }
+            }
+        ))
+        self._bucket.add_to_resource_policy(iam.PolicyStatement(
+            sid="AWSLogDeliveryAclCheck",
+            principals=[iam.ServicePrincipal("delivery.logs.amazonaws.com")],
+            actions=["s3:GetBucketAcl"],
+            resources=[self._bucket.bucket_arn],
+            conditions={
+                "StringEquals": {
+                    "aws:SourceAccount": account
+                }
+            }
+        ))
+
+    def add_vpc(self, id: str, vpc_id: str, name: str) -> ec2.CfnFlowLog:
+        """
+        Enables flow logs for all traffic of a VPC.
+
+        :param id: The construct ID of the flow log.
+        :type id: str
+        :param vpc_id: The ID of the VPC.
+        :type vpc_id: str
+        :param name: The value of the flow log's Name tag.
+        :type name: str
+        :rtype: ec2.CfnFlowLog
+        """
+        flow_log = ec2.CfnFlowLog(
+            scope=self,
+            id=id,
+            resource_id=vpc_id,
+            resource_type="VPC",
+            traffic_type="ALL",
+            log_destination_type="s3",
+            log_destination=self._bucket.bucket_arn,
+            log_format=VPC_LOG_FORMAT,
+            max_aggregation_interval=60,
+            destination_options=PARQUET_DESTINATION_OPTIONS,
+            tags=[CfnTag(
+                key="Name",
+                value=name
+            )]
+        )
+        flow_log.node.add_dependency(self._bucket.policy)
+        return flow_log
+
+    def add_transit_gateway(self, id: str, transit_gateway_id: str, name: str) -> ec2.CfnFlowLog:
+        """
+        Enables flow logs for a transit gateway in the default transit gateway format,
+        which records the attachment each flow entered through.
+
+        :param id: The construct ID of the flow log.
+        :type id: str
+        :param transit_gateway_id: The ID of the transit gateway.
+        :type transit_gateway_id: str
+        :param name: The value of the flow log's Name tag.
+        :type name: str
+        :rtype: ec2.CfnFlowLog
+        """
+        flow_log = ec2.CfnFlowLog(
+            scope=self,
+            id=id,
+            resource_id=transit_gateway_id,
+            resource_type="TransitGateway",
+            log_destination_type="s3",
+            log_destination=self._bucket.bucket_arn,
+            max_aggregation_interval=60,
+            destination_options=PARQUET_DESTINATION_OPTIONS,
+            tags=[CfnTag(
+                key="Name",
+                value=name
+            )]
+        )
+        flow_log.node.add_dependency(self._bucket.policy)
+        return flow_log
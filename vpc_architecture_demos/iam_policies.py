@@ -0,0 +1,155 @@
+#pylint: disable-all
+
+from aws_cdk import (
+    Stack,
+    aws_iam as iam,
+)
+
+from constructs import Construct
+
+CONSTRUCT_ID = "InstancePolicies"
+"""
+The ID of the stack's shared :class:`InstancePolicies`.
+
+:type: str
+"""
+
+
+class InstancePolicies(Construct):
+    """
+    Creates the customer-managed policies that the EC2 roles of a stack attach.
+
+    The policies exist once per stack and roles reference them by ARN, so templates do
+    not repeat the statements for every role, and creating a role does not wait for an
+    inline policy of its own to propagate. Use :func:`instance_policies` to get the
+    stack's instance instead of creating one.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    """
+
+    @property
+    def session_manager(self) -> iam.ManagedPolicy:
+        """
+        Lets instances register with Systems Manager and accept Session Manager sessions.
+        """
+        return self._session_manager
+
+    @property
+    def s3_access(self) -> iam.ManagedPolicy:
+        """
+        Allows all S3 actions, for the demo assets and tests.
+        """
+        return self._s3_access
+
+    @property
+    def sns_access(self) -> iam.ManagedPolicy:
+        """
+        Allows all SNS actions, for the demo notifications.
+        """
+        return self._sns_access
+
+    @property
+    def all(self) -> list:
+        """
+        All of the policies, for the roles of the demo instances.
+        """
+        return [self._session_manager, self._s3_access, self._sns_access]
+
+    def __init__(self, scope: Construct, id: str, **kwargs):
+        super().__init__(scope, id, **kwargs)
+
+        self._session_manager = iam.ManagedPolicy(
+            scope=self,
+            id="SessionManager",
+            description="Systems Manager and Session Manager access for the demo instances",
+            statements=[
+                iam.PolicyStatement(
+                    actions=[
+                        "ssm:DescribeAssociation",
+                        "ssm:GetDeployablePatchSnapshotForInstance",
+                        "ssm:GetDocument",
+                        "ssm:DescribeDocument",
+                        "ssm:GetManifest",
+                        "ssm:GetParameter",
+                        "ssm:GetParameters",
+                        "ssm:ListAssociations",
+                        "ssm:ListInstanceAssociations",
+                        "ssm:PutInventory",
+                        "ssm:PutComplianceItems",
+                        "ssm:PutConfigurePackageResult",
+                        "ssm:UpdateAssociationStatus",
+                        "ssm:UpdateInstanceAssociationStatus",
+                        "ssm:UpdateInstanceInformation"
+                    ],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW
+                ),
+                iam.PolicyStatement(
+                    actions=[
+                        "ssmmessages:CreateControlChannel",
+                        "ssmmessages:CreateDataChannel",
+                        "ssmmessages:OpenControlChannel",
+                        "ssmmessages:OpenDataChannel",
+                    ],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW
+                ),
+                iam.PolicyStatement(
+                    actions=[
+                        "ec2messages:AcknowledgeMessage",
+                        "ec2messages:DeleteMessage",
+                        "ec2messages:FailMessage",
+                        "ec2messages:GetEndpoint",
+                        "ec2messages:GetMessages",
+                        "ec2messages:SendReply"
+                    ],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW
+                )
+            ]
+        )
+
+        self._s3_access = iam.ManagedPolicy(
+            scope=self,
+            id="S3Access",
+            description="S3 access for the demo instances",
+            statements=[
+                iam.PolicyStatement(
+                    actions=["s3:*"],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW
+                )
+            ]
+        )
+
+        self._sns_access = iam.ManagedPolicy(
+            scope=self,
+            id="SnsAccess",
+            description="SNS access for the demo instances",
+            statements=[
+                iam.PolicyStatement(
+                    actions=["sns:*"],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW
+                )
+            ]
+        )
+
+
+def instance_policies(scope: Construct) -> InstancePolicies:
+    """
+    Returns the shared instance policies of the stack that contains ``scope``,
+    creating them on first use.
+
+    :param scope: Any construct in the stack.
+    :type scope: Construct
+    :rtype: InstancePolicies
+    """
+    stack = Stack.of(scope)
+    policies = stack.node.try_find_child(CONSTRUCT_ID)
+    if policies is None:
+        policies = InstancePolicies(scope=stack, id=CONSTRUCT_ID)
+    return policies
@@ -0,0 +1,232 @@
+#pylint: disable-all
+"""
+Offline lookups for values that would otherwise need calls to AWS during synth.
+
+Availability zone lists and AMI IDs are served from a checked-in, versioned
+cache file (``lookup_cache.json``) so that ``cdk synth`` never touches the
+network and produces the same template on every host. The cache is only
+refreshed from AWS when explicitly asked to::
+
+    $ python -m vpc_architecture_demos.lookups --region us-east-1
+
+A different cache file can be used by setting the ``lookup-cache-file``
+context value, e.g. ``cdk synth -c lookup-cache-file=path/to/cache.json``.
+"""
+import argparse
+import json
+import os
+
+from aws_cdk import Stack, Token
+from constructs import Construct
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lookup_cache.json")
+"""
+The default location of the lookup cache file.
+
+:type: str
+"""
+
+CACHE_VERSION = 1
+"""
+The cache file format version understood by this module.
+
+:type: int
+"""
+
+CACHE_FILE_CONTEXT_KEY = "lookup-cache-file"
+"""
+The CDK context key that overrides the location of the lookup cache file.
+
+:type: str
+"""
+
+_loaded_caches = {}
+
+
+class LookupCacheError(Exception):
+    """
+    Raised when a value cannot be served from the lookup cache.
+    """
+
+
+class LookupCache:
+    """
+    A versioned cache of lookup values keyed by region.
+
+    :param path: The location of the cache file.
+    :type path: str
+    """
+
+    def __init__(self, path: str = CACHE_FILE):
+        self._path = path
+        with open(path) as cache_file:
+            self._data = json.load(cache_file)
+
+        if self._data.get("version") != CACHE_VERSION:
+            raise LookupCacheError(
+                f"{path} has cache version {self._data.get('version')}, expected {CACHE_VERSION}"
+            )
+
+    @property
+    def path(self) -> str:
+        """
+        The location of the cache file.
+        """
+        return self._path
+
+    @property
+    def regions(self) -> list:
+        """
+        The regions that have cached values, sorted by name.
+        """
+        return sorted(self._data["regions"])
+
+    def _region(self, region: str) -> dict:
+        try:
+            return self._data["regions"][region]
+        except KeyError:
+            raise LookupCacheError(
+                f"region {region} is not in {self._path}; refresh it with "
+                f"'python -m vpc_architecture_demos.lookups --region {region}'"
+            ) from None
+
+    def availability_zones(self, region: str) -> list:
+        """
+        Returns the cached availability zone names for a region.
+
+        :param region: The region name.
+        :type region: str
+        :return: The availability zone names, sorted by name.
+        :rtype: list
+        """
+        return list(self._region(region)["availability_zones"])
+
+    def ami(self, region: str, name: str) -> str:
+        """
+        Returns the cached AMI ID of a named image for a region.
+
+        :param region: The region name.
+        :type region: str
+        :param name: The image name as defined in the ``images`` section of the cache file.
+        :type name: str
+        :return: The AMI ID.
+        :rtype: str
+        """
+        amis = self._region(region).get("amis", {})
+        if name not in amis:
+            raise LookupCacheError(f"image {name} is not cached for region {region} in {self._path}")
+        return amis[name]
+
+    def refresh(self, region: str, session=None):
+        """
+        Refreshes the cached values for a region from AWS.
+
+        This is the only place where live lookups happen and requires ``boto3``
+        and credentials for the target account.
+
+        :param region: The region name.
+        :type region: str
+        :param session: An optional ``boto3.Session`` to use for the lookups.
+        """
+        if session is None:
+            import boto3
+            session = boto3.Session()
+        ec2_client = session.client("ec2", region_name=region)
+
+        zones = ec2_client.describe_availability_zones(
+            Filters=[
+                {"Name": "zone-type", "Values": ["availability-zone"]},
+                {"Name": "state", "Values": ["available"]},
+            ]
+        )["AvailabilityZones"]
+
+        amis = {}
+        for name, image_filter in sorted(self._data.get("images", {}).items()):
+            images = ec2_client.describe_images(
+                Owners=image_filter["owners"],
+                Filters=[
+                    {"Name": "name", "Values": [image_filter["name"]]},
+                    {"Name": "state", "Values": ["available"]},
+                ],
+            )["Images"]
+            if images:
+                amis[name] = max(images, key=lambda image: image["CreationDate"])["ImageId"]
+
+        self._data["regions"][region] = {
+            "availability_zones": sorted(zone["ZoneName"] for zone in zones),
+            "amis": amis,
+        }
+
+    def save(self):
+        """
+        Writes the cache back to its file with a stable key order.
+        """
+        with open(self._path, "w") as cache_file:
+            json.dump(self._data, cache_file, indent=2, sort_keys=True)
+            cache_file.write("\n")
+
+
+def load_cache(path: str = CACHE_FILE) -> LookupCache:
+    """
+    Returns the lookup cache stored at a path, reading the file only once per process.
+
+    :param path: The location of the cache file.
+    :type path: str
+    :rtype: LookupCache
+    """
+    path = os.path.abspath(path)
+    if path not in _loaded_caches:
+        _loaded_caches[path] = LookupCache(path)
+    return _loaded_caches[path]
+
+
+def _cache_and_region(scope: Construct):
+    region = Stack.of(scope).region
+    if Token.is_unresolved(region):
+        raise LookupCacheError(
+            f"{scope.node.path} has no concrete region; set env=Environment(region=...) on its stack"
+        )
+    path = scope.node.try_get_context(CACHE_FILE_CONTEXT_KEY) or CACHE_FILE
+    return load_cache(path), region
+
+
+def availability_zones(scope: Construct) -> list:
+    """
+    Returns the cached availability zones for the region of the stack that contains ``scope``.
+
+    :param scope: Any construct within a stack with a concrete region.
+    :type scope: Construct
+    :rtype: list
+    """
+    cache, region = _cache_and_region(scope)
+    return cache.availability_zones(region)
+
+
+def ami(scope: Construct, name: str) -> str:
+    """
+    Returns the cached AMI ID of a named image for the region of the stack that contains ``scope``.
+
+    :param scope: Any construct within a stack with a concrete region.
+    :type scope: Construct
+    :param name: The image name as defined in the ``images`` section of the cache file.
+    :type name: str
+    :rtype: str
+    """
+    cache, region = _cache_and_region(scope)
+    return cache.ami(region, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the synth lookup cache from AWS.")
+    parser.add_argument("--region", action="append", required=True, help="region to refresh, can be repeated")
+    parser.add_argument("--cache-file", default=CACHE_FILE, help="cache file to update")
+    args = parser.parse_args(argv)
+
+    cache = LookupCache(args.cache_file)
+    for region in args.region:
+        cache.refresh(region)
+    cache.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#pylint: disable-all
+
+from aws_cdk import (
+    Duration,
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cloudwatch_actions,
+    aws_sns as sns,
+)
+
+from constructs import Construct
+
+TRANSIT_GATEWAY_ATTACHMENT_BPS = 100 * 10**9
+"""
+The maximum bandwidth of a transit gateway VPC attachment in bits per second.
+
+:type: int
+"""
+
+VPN_TUNNEL_BPS = 1.25 * 10**9
+"""
+The maximum bandwidth of a single site-to-site VPN tunnel in bits per second.
+
+:type: float
+"""
+
+VPN_TUNNELS_PER_CONNECTION = 2
+"""
+The number of tunnels of a site-to-site VPN connection.
+
+:type: int
+"""
+
+NAT_GATEWAY_BPS = 100 * 10**9
+"""
+The bandwidth a NAT gateway scales up to in bits per second.
+
+:type: int
+"""
+
+DEFAULT_SATURATION_PERCENT = 80
+"""
+The default share of a component's capacity at which the saturation alarms fire.
+
+:type: int
+"""
+
+
+class NetworkMonitoring(Construct):
+    """
+    Creates a CloudWatch dashboard and saturation alarms for the networking components
+    added to it, plus an SNS topic that the alarms notify.
+
+    Throughput thresholds are expressed as a percentage of each component's capacity
+    and converted to bytes per alarm period, so they stay meaningful when the period
+    changes. Drop and error counters alarm on any occurrence.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param dashboard_name: The name of the dashboard.
+    :type dashboard_name: str
+    :param saturation_percent: The share of capacity at which throughput alarms fire.
+    :type saturation_percent: float
+    :param period: The alarm and graph period.
+    :type period: Duration
+    """
+
+    @property
+    def topic(self) -> sns.Topic:
+        """
+        The topic that alarms notify.
+        """
+        return self._topic
+
+    @property
+    def dashboard(self) -> cloudwatch.Dashboard:
+        """
+        The dashboard that shows the monitored components.
+        """
+        return self._dashboard
+
+    @property
+    def alarms(self) -> list:
+        """
+        The alarms created so far.
+        """
+        return list(self._alarms)
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        dashboard_name: str,
+        saturation_percent: float = DEFAULT_SATURATION_PERCENT,
+        period: Duration = Duration.minutes(1),
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        if not 0 < saturation_percent <= 100:
+            raise ValueError(f"saturation_percent must be in (0, 100], got {saturation_percent}")
+
+        self._saturation_percent = saturation_percent
+        self._period = period
+        self._alarms = []
+
+        self._topic = sns.Topic(scope=self, id="AlarmTopic", display_name=f"{dashboard_name} alarms")
+        self._dashboard = cloudwatch.Dashboard(scope=self, id="Dashboard", dashboard_name=dashboard_name)
+
+    def saturation_threshold(self, capacity_bps: float) -> float:
+        """
+        Returns the bytes per period that correspond to the saturation percentage of a capacity.
+
+        :param capacity_bps: The component's capacity in bits per second.
+        :type capacity_bps: float
+        :rtype: float
+        """
+        return capacity_bps * self._saturation_percent / 100 * self._period.to_seconds() / 8
+
+    def add_transit_gateway_attachment(
+        self,
+        name: str,
+        transit_gateway_id: str,
+        attachment_id: str,
+        capacity_bps: float = TRANSIT_GATEWAY_ATTACHMENT_BPS
+    ):
+        """
+        Monitors throughput and dropped packets of a transit gateway attachment.
+
+        :param name: A construct-ID-safe name for the attachment.
+        :type name: str
+        :param transit_gateway_id: The ID of the transit gateway.
+        :type transit_gateway_id: str
+        :param attachment_id: The ID of the attachment.
+        :type attachment_id: str
+        :param capacity_bps: The attachment's capacity in bits per second.
+        :type capacity_bps: float
+        """
+        dimensions = {
+            "TransitGateway": transit_gateway_id,
+            "TransitGatewayAttachment": attachment_id,
+        }
+        bytes_in = self._metric("AWS/TransitGateway", "BytesIn", dimensions)
+        bytes_out = self._metric("AWS/TransitGateway", "BytesOut", dimensions)
+        blackhole_drops = self._metric("AWS/TransitGateway", "PacketDropCountBlackhole", dimensions)
+        no_route_drops = self._metric("AWS/TransitGateway", "PacketDropCountNoRoute", dimensions)
+
+        self._saturation_alarm(f"{name}BytesIn", bytes_in, capacity_bps)
+        self._saturation_alarm(f"{name}BytesOut", bytes_out, capacity_bps)
+        self._any_alarm(f"{name}PacketDropCountBlackhole", blackhole_drops)
+        self._any_alarm(f"{name}PacketDropCountNoRoute", no_route_drops)
+
+        self._dashboard.add_widgets(
+            self._throughput_widget(f"{name} throughput", [bytes_in, bytes_out], capacity_bps),
+            cloudwatch.GraphWidget(title=f"{name} dropped packets", left=[blackhole_drops, no_route_drops])
+        )
+
+    def add_vpn_connection(
+        self,
+        name: str,
+        vpn_connection_id: str,
+        tunnel_ips: list = None,
+        capacity_bps: float = VPN_TUNNEL_BPS
+    ):
+        """
+        Monitors the state and throughput of a site-to-site VPN connection.
+
+        Tunnel outside addresses are only known after deploy. When they are given,
+        throughput is monitored per tunnel; otherwise it is monitored for the whole
+        connection against the capacity of all its tunnels.
+
+        :param name: A construct-ID-safe name for the connection.
+        :type name: str
+        :param vpn_connection_id: The ID of the VPN connection.
+        :type vpn_connection_id: str
+        :param tunnel_ips: The outside IP addresses of the AWS side of the tunnels.
+        :type tunnel_ips: list
+        :param capacity_bps: The capacity of one tunnel in bits per second.
+        :type capacity_bps: float
+        """
+        tunnel_state = self._metric("AWS/VPN", "TunnelState", {"VpnId": vpn_connection_id}, statistic="Minimum")
+        self._alarm(
+            id=f"{name}TunnelState",
+            description=f"A tunnel of {name} is down",
+            metric=tunnel_state,
+            threshold=1,
+            comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD,
+            evaluation_periods=3,
+            treat_missing_data=cloudwatch.TreatMissingData.BREACHING
+        )
+
+        if tunnel_ips:
+            targets = [(f"{name}Tunnel{index + 1}", {"TunnelIpAddress": ip}, capacity_bps) for index, ip in enumerate(tunnel_ips)]
+        else:
+            targets = [(name, {"VpnId": vpn_connection_id}, capacity_bps * VPN_TUNNELS_PER_CONNECTION)]
+
+        throughput = []
+        for target_name, dimensions, target_capacity_bps in targets:
+            data_in = self._metric("AWS/VPN", "TunnelDataIn", dimensions)
+            data_out = self._metric("AWS/VPN", "TunnelDataOut", dimensions)
+            self._saturation_alarm(f"{target_name}TunnelDataIn", data_in, target_capacity_bps)
+            self._saturation_alarm(f"{target_name}TunnelDataOut", data_out, target_capacity_bps)
+            throughput += [data_in, data_out]
+
+        self._dashboard.add_widgets(
+            self._throughput_widget(f"{name} throughput", throughput, targets[0][2]),
+            cloudwatch.GraphWidget(title=f"{name} tunnel state", left=[tunnel_state])
+        )
+
+    def add_nat_gateway(self, name: str, nat_gateway_id: str, capacity_bps: float = NAT_GATEWAY_BPS):
+        """
+        Monitors bandwidth, port allocation errors and dropped packets of a NAT gateway.
+
+        :param name: A construct-ID-safe name for the NAT gateway.
+        :type name: str
+        :param nat_gateway_id: The ID of the NAT gateway.
+        :type nat_gateway_id: str
+        :param capacity_bps: The NAT gateway's capacity in bits per second.
+        :type capacity_bps: float
+        """
+        dimensions = {"NatGatewayId": nat_gateway_id}
+        bandwidth = cloudwatch.MathExpression(
+            expression="bytes_out + bytes_in",
+            label=f"{name} bytes",
+            period=self._period,
+            using_metrics={
+                "bytes_out": self._metric("AWS/NATGateway", "BytesOutToDestination", dimensions),
+                "bytes_in": self._metric("AWS/NATGateway", "BytesInFromDestination", dimensions),
+            }
+        )
+        port_allocation_errors = self._metric("AWS/NATGateway", "ErrorPortAllocation", dimensions)
+        dropped_packets = self._metric("AWS/NATGateway", "PacketsDropCount", dimensions)
+
+        self._saturation_alarm(f"{name}Bandwidth", bandwidth, capacity_bps)
+        self._any_alarm(f"{name}ErrorPortAllocation", port_allocation_errors)
+        self._any_alarm(f"{name}PacketsDropCount", dropped_packets)
+
+        self._dashboard.add_widgets(
+            self._throughput_widget(f"{name} bandwidth", [bandwidth], capacity_bps),
+            cloudwatch.GraphWidget(title=f"{name} errors", left=[port_allocation_errors, dropped_packets])
+        )
+
+    def _metric(self, namespace: str, metric_name: str, dimensions: dict, statistic: str = "Sum") -> cloudwatch.Metric:
+        return cloudwatch.Metric(
+            namespace=namespace,
+            metric_name=metric_name,
+            dimensions_map=dimensions,
+            statistic=statistic,
+            period=self._period
+        )
+
+    def _alarm(self, id: str, description: str, metric: cloudwatch.IMetric, **kwargs):
+        alarm = cloudwatch.Alarm(
+            scope=self,
+            id=f"{id}Alarm",
+            alarm_description=description,
+            metric=metric,
+            **kwargs
+        )
+        alarm.add_alarm_action(cloudwatch_actions.SnsAction(self._topic))
+        self._alarms.append(alarm)
+
+    def _saturation_alarm(self, id: str, metric: cloudwatch.IMetric, capacity_bps: float):
+        self._alarm(
+            id=id,
+            description=f"{id} above {self._saturation_percent}% of {capacity_bps / 10**9:g} Gbps",
+            metric=metric,
+            threshold=self.saturation_threshold(capacity_bps),
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            evaluation_periods=5,
+            datapoints_to_alarm=3,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+        )
+
+    def _any_alarm(self, id: str, metric: cloudwatch.IMetric):
+        self._alarm(
+            id=id,
+            description=f"{id} is above zero",
+            metric=metric,
+            threshold=0,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            evaluation_periods=1,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+        )
+
+    def _throughput_widget(self, title: str, metrics: list, capacity_bps: float) -> cloudwatch.GraphWidget:
+        return cloudwatch.GraphWidget(
+            title=title,
+            left=metrics,
+            left_annotations=[cloudwatch.HorizontalAnnotation(
+                value=self.saturation_threshold(capacity_bps),
+                label=f"{self._saturation_percent}% of capacity"
+            )]
+        )
@@ -0,0 +1,385 @@
+#pylint: disable-all
+"""
+A CDK aspect that reports network patterns known to be slow or fragile.
+
+Enable it per stack with :func:`enable`. Every finding has a :class:`Severity`;
+findings at or above the aspect's threshold are added as errors, which makes
+``cdk synth`` fail, and all others as warnings. The threshold can be given in code
+or with ``-c performance-lint-fail-at=medium``.
+
+The aspect analyses the CloudFormation resources of a stack when it visits the stack,
+following ``Ref`` and ``Fn::GetAtt`` between them, so it sees the same resources
+whether they were declared with L1 or L2 constructs.
+
+Rules:
+
+- ``single-az-nat``: all NAT gateways of a VPC are in one availability zone
+- ``single-az-subnets``: all subnets of a VPC are in one availability zone
+- ``burstable-data-path``: a burstable instance forwards traffic, e.g. a router
+- ``vpn-tgw-without-vpn``: a transit gateway with VPN ECMP support has no VPN connection
+- ``s3-without-gateway-endpoint``: an instance may use S3 but its VPC has no S3 gateway endpoint
+- ``cross-az-route-target``: a route sends a subnet's traffic to a target in another availability zone
+"""
+import enum
+import json
+from collections import namedtuple
+
+import jsii
+
+from aws_cdk import (
+    Annotations,
+    Aspects,
+    CfnResource,
+    IAspect,
+    Stack,
+)
+
+from constructs import IConstruct
+
+
+class Severity(enum.IntEnum):
+    """
+    How much a finding costs in throughput, latency or availability.
+    """
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+Finding = namedtuple("Finding", ["rule", "severity", "path", "message"])
+"""
+A finding of the performance lint: the rule, its severity, the construct path of the
+offending resource and a message.
+"""
+
+RULE_SEVERITIES = {
+    "single-az-nat": Severity.MEDIUM,
+    "single-az-subnets": Severity.MEDIUM,
+    "burstable-data-path": Severity.HIGH,
+    "vpn-tgw-without-vpn": Severity.LOW,
+    "s3-without-gateway-endpoint": Severity.MEDIUM,
+    "cross-az-route-target": Severity.MEDIUM,
+}
+"""
+The default severity of each rule.
+
+:type: dict
+"""
+
+FAIL_AT_CONTEXT_KEY = "performance-lint-fail-at"
+"""
+The CDK context key holding the threshold, a severity name or ``none``.
+
+:type: str
+"""
+
+BURSTABLE_FAMILIES = ("t1", "t2", "t3", "t3a", "t4g")
+
+
+def threshold_from_context(scope: IConstruct):
+    """
+    Returns the threshold set with ``-c performance-lint-fail-at=...``, or None.
+
+    :param scope: Any construct of the app.
+    :type scope: IConstruct
+    :rtype: Severity
+    """
+    value = scope.node.try_get_context(FAIL_AT_CONTEXT_KEY)
+    if not value or str(value).lower() == "none":
+        return None
+    try:
+        return Severity[str(value).upper()]
+    except KeyError:
+        raise ValueError(f"{FAIL_AT_CONTEXT_KEY} must be one of {[s.name.lower() for s in Severity]} or none, got {value}")
+
+
+@jsii.implements(IAspect)
+class PerformanceLint:
+    """
+    Reports network performance anti-patterns of the stacks it visits.
+
+    :param fail_at: The lowest severity that is added as an error. If None, every
+        finding is a warning.
+    :type fail_at: Severity
+    :param severities: Overrides of :data:`RULE_SEVERITIES`. A rule mapped to None is skipped.
+    :type severities: dict
+    """
+
+    @property
+    def findings(self) -> list:
+        """
+        The findings of every stack visited so far.
+        """
+        return list(self._findings)
+
+    def __init__(self, fail_at: Severity = None, severities: dict = None):
+        self._fail_at = fail_at
+        self._severities = dict(RULE_SEVERITIES, **(severities or {}))
+        self._findings = []
+
+    def visit(self, node: IConstruct) -> None:
+        if not Stack.is_stack(node):
+            return
+
+        for rule, resource, message in _StackModel(node).findings():
+            severity = self._severities.get(rule)
+            if severity is None:
+                continue
+            finding = Finding(rule=rule, severity=severity, path=resource.node.path, message=message)
+            self._findings.append(finding)
+
+            text = f"[{severity.name}] {rule}: {message}"
+            if self._fail_at is not None and severity >= self._fail_at:
+                Annotations.of(resource).add_error(text)
+            else:
+                Annotations.of(resource).add_warning(text)
+
+
+def enable(stack: Stack, fail_at: Severity = None, severities: dict = None) -> PerformanceLint:
+    """
+    Adds the performance lint to a stack.
+
+    :param stack: The stack to lint.
+    :type stack: Stack
+    :param fail_at: The lowest severity that fails synth. Defaults to the threshold in the context.
+    :type fail_at: Severity
+    :param severities: Overrides of :data:`RULE_SEVERITIES`.
+    :type severities: dict
+    :return: The aspect, whose findings are available after synth.
+    :rtype: PerformanceLint
+    """
+    aspect = PerformanceLint(
+        fail_at=fail_at if fail_at is not None else threshold_from_context(stack),
+        severities=severities
+    )
+    Aspects.of(stack).add(aspect)
+    return aspect
+
+
+def _ref(value):
+    """
+    Returns the logical ID a resolved ``Ref`` or ``Fn::GetAtt`` points to, or None.
+    """
+    if isinstance(value, dict):
+        if "Ref" in value:
+            return value["Ref"]
+        if "Fn::GetAtt" in value:
+            return value["Fn::GetAtt"][0]
+    return None
+
+
+def _field(struct: dict, name: str):
+    """
+    Returns a field of a resolved property struct, which is camel-cased when it was
+    given as a jsii struct and Pascal-cased when it was given as a plain dict.
+    """
+    return struct.get(name, struct.get(name[0].upper() + name[1:]))
+
+
+def _key(value) -> str:
+    """
+    Returns a comparable key for a resolved value, e.g. an availability zone that may be a token.
+    """
+    return value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+
+
+def _grants_s3(document) -> bool:
+    """
+    Returns whether a resolved policy document allows any S3 action.
+    """
+    for statement in (document or {}).get("Statement", []):
+        if statement.get("Effect") != "Allow":
+            continue
+        actions = statement.get("Action", [])
+        actions = [actions] if isinstance(actions, str) else actions
+        if any(action == "*" or str(action).lower().startswith("s3:") for action in actions):
+            return True
+    return False
+
+
+class _StackModel:
+    """
+    The network resources of one stack, keyed by logical ID.
+    """
+
+    def __init__(self, stack: Stack):
+        self._stack = stack
+        self.resources = {}
+        self.subnets = {}
+        self.nat_gateways = {}
+        self.network_interfaces = {}
+        self.instances = {}
+        self.route_table_subnets = {}
+        self.routes = []
+        self.vpn_transit_gateways = {}
+        self.vpn_connection_transit_gateways = set()
+        self.s3_gateway_vpcs = set()
+        self.profile_roles = {}
+        self.s3_roles = set()
+        self.s3_managed_policies = set()
+        self.role_managed_policies = {}
+
+        for construct in stack.node.find_all():
+            if isinstance(construct, CfnResource) and Stack.of(construct) is stack:
+                self._add(construct)
+
+    def _resolve(self, value):
+        return self._stack.resolve(value)
+
+    def _add(self, resource: CfnResource):
+        logical_id = self._resolve(resource.logical_id)
+        self.resources[logical_id] = resource
+        resource_type = resource.cfn_resource_type
+
+        if resource_type == "AWS::EC2::Subnet":
+            self.subnets[logical_id] = (_ref(self._resolve(resource.vpc_id)), _key(self._resolve(resource.availability_zone)))
+        elif resource_type == "AWS::EC2::NatGateway":
+            self.nat_gateways[logical_id] = _ref(self._resolve(resource.subnet_id))
+        elif resource_type == "AWS::EC2::NetworkInterface":
+            self.network_interfaces[logical_id] = (
+                _ref(self._resolve(resource.subnet_id)),
+                self._resolve(resource.source_dest_check) is False
+            )
+        elif resource_type == "AWS::EC2::Instance":
+            interfaces = self._resolve(resource.network_interfaces) or []
+            self.instances[logical_id] = {
+                "instance_type": self._resolve(resource.instance_type) or "",
+                "forwards": self._resolve(resource.source_dest_check) is False,
+                "subnet": _ref(self._resolve(resource.subnet_id)),
+                "interface_subnets": [_ref(_field(interface, "subnetId")) for interface in interfaces],
+                "interfaces": [_ref(_field(interface, "networkInterfaceId")) for interface in interfaces],
+                "profile": _ref(self._resolve(resource.iam_instance_profile)),
+            }
+        elif resource_type == "AWS::EC2::SubnetRouteTableAssociation":
+            route_table = _ref(self._resolve(resource.route_table_id))
+            self.route_table_subnets.setdefault(route_table, []).append(_ref(self._resolve(resource.subnet_id)))
+        elif resource_type == "AWS::EC2::Route":
+            self.routes.append((logical_id, _ref(self._resolve(resource.route_table_id)), [
+                _ref(self._resolve(target))
+                for target in (resource.nat_gateway_id, resource.network_interface_id, resource.instance_id)
+                if target is not None
+            ]))
+        elif resource_type == "AWS::EC2::TransitGateway":
+            if self._resolve(resource.vpn_ecmp_support) == "enable":
+                self.vpn_transit_gateways[logical_id] = resource
+        elif resource_type == "AWS::EC2::VPNConnection":
+            self.vpn_connection_transit_gateways.add(_ref(self._resolve(resource.transit_gateway_id)))
+        elif resource_type == "AWS::EC2::VPCEndpoint":
+            service = _key(self._resolve(resource.service_name)).rstrip('"]} ')
+            endpoint_type = self._resolve(resource.vpc_endpoint_type) or "Gateway"
+            if service.endswith(".s3") and endpoint_type == "Gateway":
+                self.s3_gateway_vpcs.add(_ref(self._resolve(resource.vpc_id)))
+        elif resource_type == "AWS::IAM::InstanceProfile":
+            self.profile_roles[logical_id] = [_ref(role) for role in self._resolve(resource.roles) or []]
+        elif resource_type == "AWS::IAM::Role":
+            if any(_grants_s3(_field(policy, "policyDocument")) for policy in self._resolve(resource.policies) or []):
+                self.s3_roles.add(logical_id)
+            self.role_managed_policies[logical_id] = [
+                _ref(policy) for policy in self._resolve(resource.managed_policy_arns) or []
+            ]
+        elif resource_type in ("AWS::IAM::Policy", "AWS::IAM::ManagedPolicy"):
+            if _grants_s3(self._resolve(resource.policy_document)):
+                self.s3_roles.update(_ref(role) for role in self._resolve(resource.roles) or [])
+                if resource_type == "AWS::IAM::ManagedPolicy":
+                    self.s3_managed_policies.add(logical_id)
+
+    def _instance_subnets(self, instance: dict) -> list:
+        subnets = [instance["subnet"]] + instance["interface_subnets"]
+        subnets += [self.network_interfaces.get(interface, (None, False))[0] for interface in instance["interfaces"]]
+        return [subnet for subnet in subnets if subnet in self.subnets]
+
+    def _target_zones(self, target: str) -> set:
+        if target in self.nat_gateways:
+            subnets = [self.nat_gateways[target]]
+        elif target in self.network_interfaces:
+            subnets = [self.network_interfaces[target][0]]
+        elif target in self.instances:
+            subnets = self._instance_subnets(self.instances[target])
+        else:
+            subnets = []
+        return {self.subnets[subnet][1] for subnet in subnets if subnet in self.subnets}
+
+    def findings(self):
+        """
+        Yields ``(rule, resource, message)`` tuples.
+        """
+        vpc_subnet_zones = {}
+        for vpc, zone in self.subnets.values():
+            vpc_subnet_zones.setdefault(vpc, set()).add(zone)
+
+        vpc_nat_gateways = {}
+        for nat_gateway, subnet in self.nat_gateways.items():
+            if subnet in self.subnets:
+                vpc, zone = self.subnets[subnet]
+                vpc_nat_gateways.setdefault(vpc, {})[nat_gateway] = zone
+
+        for vpc, nat_gateways in vpc_nat_gateways.items():
+            if len(set(nat_gateways.values())) == 1:
+                for nat_gateway in nat_gateways:
+                    yield (
+                        "single-az-nat",
+                        self.resources[nat_gateway],
+                        "all NAT gateways of the VPC are in one availability zone; egress from every zone depends "
+                        "on it and other zones pay a cross-AZ hop. Add a NAT gateway per zone."
+                    )
+
+        for vpc, zones in vpc_subnet_zones.items():
+            if vpc in self.resources and len(zones) == 1:
+                yield (
+                    "single-az-subnets",
+                    self.resources[vpc],
+                    "all subnets of the VPC are in one availability zone, so a zone outage takes down the "
+                    "whole network. Spread the subnets over at least two zones."
+                )
+
+        for logical_id, instance in self.instances.items():
+            family = instance["instance_type"].split(".")[0]
+            forwards = instance["forwards"] or any(
+                self.network_interfaces.get(interface, (None, False))[1] for interface in instance["interfaces"]
+            )
+            if family in BURSTABLE_FAMILIES and forwards:
+                yield (
+                    "burstable-data-path",
+                    self.resources[logical_id],
+                    f"{instance['instance_type']} forwards traffic but is burstable; once its CPU credits run out "
+                    "throughput drops to the baseline. Use a fixed-performance instance type."
+                )
+
+        for transit_gateway, resource in self.vpn_transit_gateways.items():
+            if transit_gateway not in self.vpn_connection_transit_gateways:
+                yield (
+                    "vpn-tgw-without-vpn",
+                    resource,
+                    "the transit gateway has VPN ECMP support but no VPN connection, so ECMP is never used."
+                )
+
+        s3_roles = self.s3_roles | {
+            role for role, policies in self.role_managed_policies.items()
+            if any(policy in self.s3_managed_policies for policy in policies)
+        }
+        for logical_id, instance in self.instances.items():
+            roles = self.profile_roles.get(instance["profile"], [])
+            if not any(role in s3_roles for role in roles):
+                continue
+            vpcs = {self.subnets[subnet][0] for subnet in self._instance_subnets(instance)}
+            for vpc in vpcs - self.s3_gateway_vpcs:
+                yield (
+                    "s3-without-gateway-endpoint",
+                    self.resources[logical_id],
+                    "the instance may use S3 but its VPC has no S3 gateway endpoint, so S3 traffic takes the "
+                    "NAT, VPN or transit gateway path. Add an S3 gateway endpoint."
+                )
+
+        for logical_id, route_table, targets in self.routes:
+            subnet_zones = {
+                self.subnets[subnet][1] for subnet in self.route_table_subnets.get(route_table, []) if subnet in self.subnets
+            }
+            for target in targets:
+                target_zones = self._target_zones(target)
+                if target_zones and subnet_zones - target_zones:
+                    yield (
+                        "cross-az-route-target",
+                        self.resources[logical_id],
+                        "the route sends traffic from subnets in one availability zone to a target in another, "
+                        "adding a cross-AZ hop and a dependency on the other zone. Route to a target in the same zone."
+                    )
@@ -8,12 +8,17 @@ from aws_cdk import (
 )
 
 from constructs import Construct
+from vpc_architecture_demos import lookups
 from vpc_architecture_demos.custom import Subnet
+from vpc_architecture_demos.flow_logs import FlowLogs
+from vpc_architecture_demos.monitoring import NetworkMonitoring
 
 class PrivateAccessDemoStack(Stack):
     
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, flow_logs: bool = False, monitoring: bool = False, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
+        
+        azs = lookups.availability_zones(self)
     
         # create the vpc
         self._vpc = ec2.Vpc(
@@ -26,13 +31,21 @@ class PrivateAccessDemoStack(Stack):
             subnet_configuration=[]
         )
         
+        # optionally send the vpc's flow logs to s3
+        if flow_logs:
+            FlowLogs(scope=self, id="FlowLogs").add_vpc(
+                id="VpcFlowLog",
+                vpc_id=self._vpc.vpc_id,
+                name="private_access_demo_flow_log"
+            )
+        
         # create a public subnet
         self._public_subnet = Subnet(
             scope=self,
             id='PublicSubnet',
             cidr='10.16.96.0/20',
             vpc_id=self._vpc.vpc_id,
-            az=self.availability_zones[0]
+            az=azs[0]
         )
         
         # create a private subnet
@@ -41,7 +54,7 @@ class PrivateAccessDemoStack(Stack):
             id='PrivateSubnet',
             cidr='10.16.32.0/20',
             vpc_id=self._vpc.vpc_id,
-            az=self.availability_zones[0]
+            az=azs[0]
         )
         
         # create the internet gateway
@@ -84,6 +97,17 @@ class PrivateAccessDemoStack(Stack):
             )]
         )
         
+        # optionally alarm on nat gateway saturation and errors
+        if monitoring:
+            NetworkMonitoring(
+                scope=self,
+                id="Monitoring",
+                dashboard_name="private-access-demo"
+            ).add_nat_gateway(
+                name="NatGateway",
+                nat_gateway_id=self._nat_gateway.attr_nat_gateway_id
+            )
+        
         # create the route table for the private subnet
         self._private_subnet_route_table = ec2.CfnRouteTable(
             scope=self,
@@ -1,15 +1,26 @@
 #pylint: disable-all
+import re
 
 from aws_cdk import (
+    Stack,
     CfnTag,
+    CfnOutput,
     aws_ec2 as ec2,
     aws_iam as iam,
+    aws_ram as ram,
 )
 
 from constructs import Construct
 
 from vpc_architecture_demos.custom import Subnet
+from vpc_architecture_demos.flow_logs import FlowLogs
+from vpc_architecture_demos.iam_policies import instance_policies
+from vpc_architecture_demos.monitoring import NetworkMonitoring
+from vpc_architecture_demos.site_to_site_vpn import bgp_config
 from vpc_architecture_demos.site_to_site_vpn import cidr_config
+from vpc_architecture_demos.site_to_site_vpn.prefix_lists import NetworkPrefixLists
+
+_SHARE_PRINCIPAL_PATTERN = re.compile(r"^(\d{12}|arn:aws[\w-]*:organizations::\d{12}:(organization|ou)/o-[a-z0-9]+(/ou-[a-z0-9-]+)?)$")
 
 class AWSPrivateNetwork(Construct):
     """
@@ -21,9 +32,105 @@ class AWSPrivateNetwork(Construct):
     :type id: str
     :param azs: A list of availability zones to use for the VPC subnets.
     :type azs: list
+    :param vpc_cidr: The /16 CIDR block of the VPC. Must differ between peered regions.
+    :type vpc_cidr: str
+    :param flow_logs: Where to send VPC and transit gateway flow logs, if anywhere.
+    :type flow_logs: FlowLogs
+    :param monitoring: Where to add dashboards and alarms for the transit gateway attachment, if anywhere.
+    :type monitoring: NetworkMonitoring
+    :param prefix_lists: The prefix lists to publish the VPC CIDR block in and to reference
+        in security group rules. If omitted, a new set is created with the demo's on-prem
+        CIDR block in it.
+    :type prefix_lists: NetworkPrefixLists
+    :param transit_gateway_cidr_blocks: The CIDR blocks of the transit gateway, from which
+        Connect peers take their GRE addresses. None if the transit gateway needs none.
+    :type transit_gateway_cidr_blocks: list
+    :param share_with: The account IDs, or organization and OU ARNs, to share the private
+        subnets with through AWS RAM. The subnets are not shared if None.
+    :type share_with: list
     """
 
-    def __init__(self, scope: Construct, id: str, azs: list, **kwargs):
+    @property
+    def vpc_id(self) -> str:
+        """
+        The ID of the VPC.
+        """
+        return self._vpc.vpc_id
+
+    @property
+    def vpc_cidr(self) -> str:
+        """
+        The CIDR block of the VPC.
+        """
+        return self._vpc_cidr
+
+    @property
+    def private_subnet_ids(self) -> list:
+        """
+        The IDs of the private subnets, in availability zone order.
+        """
+        return [self._private_subnet_A.subnet_id, self._private_subnet_B.subnet_id]
+
+    @property
+    def private_subnet_cidrs(self) -> list:
+        """
+        The CIDR blocks of the private subnets, in availability zone order.
+        """
+        return list(self._private_subnet_cidrs)
+
+    @property
+    def transit_gateway_id(self) -> str:
+        """
+        The ID of the transit gateway.
+        """
+        return self._transit_gateway.attr_id
+
+    @property
+    def transit_gateway_cidr_blocks(self) -> list:
+        """
+        The CIDR blocks of the transit gateway, empty if it has none.
+        """
+        return list(self._transit_gateway.transit_gateway_cidr_blocks or [])
+
+    @property
+    def resource_share_arn(self) -> str:
+        """
+        The ARN of the RAM resource share of the private subnets, None if they are not shared.
+        """
+        return self._resource_share.attr_arn if self._resource_share else None
+
+    @property
+    def security_group_id(self) -> str:
+        """
+        The ID of the default security group of the instances and endpoints.
+        """
+        return self._ec2_security_group.attr_group_id
+
+    @property
+    def prefix_lists(self) -> NetworkPrefixLists:
+        """
+        The prefix lists of the on-prem and AWS networks.
+        """
+        return self._prefix_lists
+
+    def add_s3_gateway_endpoint(self) -> None:
+        """
+        Adds an S3 gateway endpoint to the private route table, once, so instances in
+        the private subnets can reach the Amazon Linux package repositories.
+        """
+        if self._s3_gateway_endpoint is not None:
+            return
+
+        self._s3_gateway_endpoint = ec2.CfnVPCEndpoint(
+            scope=self,
+            id="AWSS3GatewayEndpoint",
+            vpc_id=self._vpc.vpc_id,
+            vpc_endpoint_type="Gateway",
+            service_name=f"com.amazonaws.{Stack.of(self).region}.s3",
+            route_table_ids=[self._custom_route_table.attr_route_table_id],
+        )
+
+    def __init__(self, scope: Construct, id: str, azs: list, vpc_cidr: str = cidr_config.AWS_VPC_CIDR, flow_logs: FlowLogs = None, monitoring: NetworkMonitoring = None, prefix_lists: NetworkPrefixLists = None, transit_gateway_cidr_blocks: list = None, share_with: list = None, **kwargs):
         """
         Initializes the AWSPrivateNetwork construct and creates the VPC and associated resources.
 
@@ -33,14 +140,42 @@ class AWSPrivateNetwork(Construct):
         :type id: str
         :param azs: A list of availability zones to use for the VPC subnets.
         :type azs: list
+        :param vpc_cidr: The /16 CIDR block of the VPC. Must differ between peered regions.
+        :type vpc_cidr: str
+        :param flow_logs: Where to send VPC and transit gateway flow logs, if anywhere.
+        :type flow_logs: FlowLogs
+        :param monitoring: Where to add dashboards and alarms for the transit gateway attachment, if anywhere.
+        :type monitoring: NetworkMonitoring
+        :param prefix_lists: The prefix lists to publish the VPC CIDR block in and to reference
+            in security group rules. If omitted, a new set is created with the demo's on-prem
+            CIDR block in it.
+        :type prefix_lists: NetworkPrefixLists
+        :param transit_gateway_cidr_blocks: The CIDR blocks of the transit gateway, from which
+            Connect peers take their GRE addresses. None if the transit gateway needs none.
+        :type transit_gateway_cidr_blocks: list
+        :param share_with: The account IDs, or organization and OU ARNs, to share the private
+            subnets with through AWS RAM. The subnets are not shared if None.
+        :type share_with: list
         """
         super().__init__(scope, id, **kwargs)
         
+        region = Stack.of(self).region
+        
+        self._vpc_cidr = vpc_cidr
+        self._private_subnet_cidrs = cidr_config.aws_private_subnet_cidrs(vpc_cidr)
+        
+        if prefix_lists is None:
+            # without a shared set nothing publishes the on-prem side, so assume the demo's
+            prefix_lists = NetworkPrefixLists(scope=self, id="PrefixLists")
+            prefix_lists.add_onprem_cidr(cidr_config.ONPREM_CIDR, description="onprem-network")
+        self._prefix_lists = prefix_lists
+        self._prefix_lists.add_aws_cidr(vpc_cidr, description=f"aws-private-network {region}")
+        
         self._vpc = ec2.Vpc(
             scope=self,
             id="AWSVpc",
             vpc_name="aws-private-network",
-            ip_addresses=ec2.IpAddresses.cidr(cidr_config.AWS_VPC_CIDR),
+            ip_addresses=ec2.IpAddresses.cidr(vpc_cidr),
             enable_dns_support=True,
             enable_dns_hostnames=True,
             subnet_configuration=[]
@@ -49,7 +184,7 @@ class AWSPrivateNetwork(Construct):
         self._private_subnet_A = Subnet(
             scope=self,
             id="AWSPrivateSubnetA",
-            cidr=cidr_config.AWS_PRIVATE_SUBNET_A_CIDR,
+            cidr=self._private_subnet_cidrs[0],
             vpc_id=self._vpc.vpc_id,
             az=azs[0]
         )
@@ -57,7 +192,7 @@ class AWSPrivateNetwork(Construct):
         self._private_subnet_B = Subnet(
             scope=self,
             id="AWSPrivateSubnetB",
-            cidr=cidr_config.AWS_PRIVATE_SUBNET_B_CIDR,
+            cidr=self._private_subnet_cidrs[1],
             vpc_id=self._vpc.vpc_id,
             az=azs[1]
         )
@@ -76,16 +211,29 @@ class AWSPrivateNetwork(Construct):
             scope=self,
             id="AWSTransitGateway",
             description="Transit Gateway for the AWS private network",
-            amazon_side_asn=64512,
+            amazon_side_asn=bgp_config.TRANSIT_GATEWAY_ASN,
             default_route_table_association="enable",
             dns_support="enable",
             vpn_ecmp_support="enable",
+            transit_gateway_cidr_blocks=transit_gateway_cidr_blocks,
             tags=[CfnTag(
                 key="Name",
                 value="aws-private-network-transit-gateway"
             )]
         )
         
+        if flow_logs is not None:
+            flow_logs.add_vpc(
+                id="AWSVpcFlowLog",
+                vpc_id=self._vpc.vpc_id,
+                name="aws-private-network-flow-log"
+            )
+            flow_logs.add_transit_gateway(
+                id="AWSTransitGatewayFlowLog",
+                transit_gateway_id=self._transit_gateway.attr_id,
+                name="aws-private-network-transit-gateway-flow-log"
+            )
+        
         self._transit_gateway_attach = ec2.CfnTransitGatewayAttachment(
             scope=self,
             id="AWSTGWAttachment",
@@ -101,6 +249,13 @@ class AWSPrivateNetwork(Construct):
             )]
         )
         
+        if monitoring is not None:
+            monitoring.add_transit_gateway_attachment(
+                name="AWSVpcAttachment",
+                transit_gateway_id=self._transit_gateway.attr_id,
+                attachment_id=self._transit_gateway_attach.attr_id
+            )
+        
         self._transit_gateway_default_route = ec2.CfnRoute(
             scope=self,
             id="AWSTGWDefaultRoute",
@@ -110,6 +265,31 @@ class AWSPrivateNetwork(Construct):
         )
         self._transit_gateway_default_route.add_dependency(target=self._transit_gateway_attach)
         
+        # workloads in other accounts launch into the shared subnets and use this
+        # VPC's attachment and route table, instead of a VPC and attachment each
+        self._resource_share = None
+        if share_with:
+            for principal in share_with:
+                if not _SHARE_PRINCIPAL_PATTERN.match(principal):
+                    raise ValueError(f"subnets can only be shared with account IDs, organizations or OUs, got {principal}")
+            stack = Stack.of(self)
+            self._resource_share = ram.CfnResourceShare(
+                scope=self,
+                id="AWSPrivateSubnetShare",
+                name="aws-private-network-subnets",
+                # RAM only shares subnets inside the organization
+                allow_external_principals=False,
+                principals=list(share_with),
+                resource_arns=[
+                    stack.format_arn(service="ec2", resource="subnet", resource_name=subnet_id)
+                    for subnet_id in self.private_subnet_ids
+                ],
+                tags=[CfnTag(
+                    key="Name",
+                    value="aws-private-network-subnet-share"
+                )]
+            )
+        
         self._private_subnet_A_route_table_assoc = ec2.CfnSubnetRouteTableAssociation(
             scope=self,
             id="AWSPrivateSubnetARTAssoc",
@@ -141,8 +321,13 @@ class AWSPrivateNetwork(Construct):
                 ec2.CfnSecurityGroup.IngressProperty(
                     description="Allow ALL from ONPREM Networks",
                     ip_protocol="-1",
-                    cidr_ip=cidr_config.ONPREM_CIDR
-                ),   
+                    source_prefix_list_id=self._prefix_lists.onprem_prefix_list_id
+                ),
+                ec2.CfnSecurityGroup.IngressProperty(
+                    description="Allow ALL from AWS Networks",
+                    ip_protocol="-1",
+                    source_prefix_list_id=self._prefix_lists.aws_prefix_list_id
+                ),
             ]
         )
         self._ec2_security_group_self_reference_rule = ec2.CfnSecurityGroupIngress(
@@ -157,7 +342,7 @@ class AWSPrivateNetwork(Construct):
             scope=self,
             id="AWSEC2MessagesInterfaceEndpoint",
             vpc_id=self._vpc.vpc_id,
-            service_name="com.amazonaws.us-east-1.ec2messages",
+            service_name=f"com.amazonaws.{region}.ec2messages",
             private_dns_enabled=True,
             vpc_endpoint_type="Interface",
             subnet_ids=[self._private_subnet_A.subnet_id,self._private_subnet_B.subnet_id],
@@ -168,7 +353,7 @@ class AWSPrivateNetwork(Construct):
             scope=self,
             id="AWSSSMMessagesInterfaceEndpoint",
             vpc_id=self._vpc.vpc_id,
-            service_name="com.amazonaws.us-east-1.ssmmessages",
+            service_name=f"com.amazonaws.{region}.ssmmessages",
             private_dns_enabled=True,
             vpc_endpoint_type="Interface",
             subnet_ids=[self._private_subnet_A.subnet_id,self._private_subnet_B.subnet_id],
@@ -179,78 +364,22 @@ class AWSPrivateNetwork(Construct):
             scope=self,
             id="AWSSSMInterfaceEndpoint",
             vpc_id=self._vpc.vpc_id,
-            service_name="com.amazonaws.us-east-1.ssm",
+            service_name=f"com.amazonaws.{region}.ssm",
             private_dns_enabled=True,
             vpc_endpoint_type="Interface",
             subnet_ids=[self._private_subnet_A.subnet_id,self._private_subnet_B.subnet_id],
             security_group_ids=[self._ec2_security_group.attr_group_id]
         )
         
+        self._s3_gateway_endpoint = None
+
         self._ec2_iam_role = iam.Role(
             scope=self,
             id="AWSEC2Role",
             assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
             path="/",
             role_name="aws-private-network-ec2-iam-role",
-            inline_policies={
-                "root": iam.PolicyDocument(
-                    statements=[
-                        iam.PolicyStatement(
-                            actions=[
-                                "ssm:DescribeAssociation",
-                                "ssm:GetDeployablePatchSnapshotForInstance",
-                                "ssm:GetDocument",
-                                "ssm:DescribeDocument",
-                                "ssm:GetManifest",
-                                "ssm:GetParameter",
-                                "ssm:GetParameters",
-                                "ssm:ListAssociations",
-                                "ssm:ListInstanceAssociations",
-                                "ssm:PutInventory",
-                                "ssm:PutComplianceItems",
-                                "ssm:PutConfigurePackageResult",
-                                "ssm:UpdateAssociationStatus",
-                                "ssm:UpdateInstanceAssociationStatus",
-                                "ssm:UpdateInstanceInformation"
-                            ],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=[
-                                "ssmmessages:CreateControlChannel",
-                                "ssmmessages:CreateDataChannel",
-                                "ssmmessages:OpenControlChannel",
-                                "ssmmessages:OpenDataChannel",
-                            ],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=[
-                                "ec2messages:AcknowledgeMessage",
-                                "ec2messages:DeleteMessage",
-                                "ec2messages:FailMessage",
-                                "ec2messages:GetEndpoint",
-                                "ec2messages:GetMessages",
-                                "ec2messages:SendReply"
-                            ],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=["s3:*"],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=["sns:*"],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        )
-                    ]
-                )
-            }
+            managed_policies=instance_policies(self).all
         )
         
         self._ec2_instance_profile = iam.CfnInstanceProfile(
@@ -286,4 +415,17 @@ class AWSPrivateNetwork(Construct):
                 key="Name",
                 value="aws-private-network-ec2-b"
             )]
-        )
\ No newline at end of file
+        )
+        
+        CfnOutput(
+            scope=self,
+            id="AWSEC2APrivateIP",
+            description="Private IP of AWS EC2 A",
+            value=self._ec2_instance_A.attr_private_ip
+        )
+        CfnOutput(
+            scope=self,
+            id="AWSEC2BPrivateIP",
+            description="Private IP of AWS EC2 B",
+            value=self._ec2_instance_B.attr_private_ip
+        )
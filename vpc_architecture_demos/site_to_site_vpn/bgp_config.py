@@ -0,0 +1,195 @@
+#pylint: disable-all
+"""
+Renders the FRR BGP configuration that advertises an on-prem site's summarized prefixes.
+
+The routers advertise the aggregates from :mod:`prefix_summary` instead of one route
+per subnet. Each aggregate also gets a blackhole static route, so the ``network``
+statement has a RIB entry even before the interface routes are up; the routes to the
+subnets themselves are more specific or have a lower distance and win. An outbound
+route map only lets the aggregates through; inbound routes are accepted as they are,
+since eBGP sessions in FRR need a policy in both directions.
+
+FRR itself is installed by the demo's ``ffrouting-install.sh`` once the VPN tunnels
+are configured, so the configuration is written next to the other demo assets with a
+``load-bgp.sh`` script that loads it, after starting ``bfdd`` if the configuration
+uses BFD. The script runs right away only if FRR is already there; otherwise run it
+with ``sudo`` after the install.
+"""
+import ipaddress
+
+ONPREM_ASN = 65016
+"""
+The BGP ASN of the on-prem routers.
+
+:type: int
+"""
+
+BGPD_CONF_PATH = "/home/ubuntu/demo_assets/bgp-summary.conf"
+"""
+Where the rendered configuration is written on the routers.
+
+:type: str
+"""
+
+LOAD_SCRIPT_PATH = "/home/ubuntu/demo_assets/load-bgp.sh"
+"""
+Where the script that loads the configuration into FRR is written on the routers.
+
+:type: str
+"""
+
+TRANSIT_GATEWAY_ASN = 64512
+"""
+The Amazon side BGP ASN of the transit gateway.
+
+:type: int
+"""
+
+FAST_FAILOVER_TIMERS = (3, 9)
+"""
+The BGP keepalive and hold time in seconds for fast failover. The hold time of a
+session is the lower of both sides', so a dead peer is detected in 9 seconds instead
+of the 30 that AWS uses by default.
+
+:type: tuple
+"""
+
+BFD_PROFILE = "FAST-FAILOVER"
+BFD_INTERVAL_MS = 300
+BFD_DETECT_MULTIPLIER = 3
+
+SUMMARY_ROUTE_MAP = "SUMMARY-OUT"
+ACCEPT_ROUTE_MAP = "ACCEPT-IN"
+
+
+def render_bgpd_conf(
+    prefixes: list,
+    asn: int = ONPREM_ASN,
+    neighbors: dict = None,
+    router_id: str = None,
+    ebgp_multihop: int = None,
+    maximum_paths: int = None,
+    timers: tuple = None,
+    bfd: bool = False
+) -> str:
+    """
+    Renders a ``vtysh`` configuration that advertises the given prefixes.
+
+    :param prefixes: The summarized IPv4 prefixes to advertise.
+    :type prefixes: list
+    :param asn: The local ASN.
+    :type asn: int
+    :param neighbors: The remote ASN of each neighbor address, e.g. the tunnel inside addresses.
+    :type neighbors: dict
+    :param router_id: The BGP router ID. FRR picks one if None.
+    :type router_id: str
+    :param ebgp_multihop: The TTL of the eBGP sessions, for neighbors that are not directly connected.
+    :type ebgp_multihop: int
+    :param maximum_paths: The number of equal-cost eBGP paths to install. FRR's default if None.
+    :type maximum_paths: int
+    :param timers: The keepalive and hold time of all sessions, including the ones the
+        demo scripts add later. FRR's defaults if None.
+    :type timers: tuple
+    :param bfd: Whether the neighbors are also monitored with BFD. FRR keeps a session up
+        while its BFD session never came up, so this is harmless for peers without BFD.
+    :type bfd: bool
+    :return: The configuration file contents.
+    :rtype: str
+    """
+    networks = [ipaddress.ip_network(prefix) for prefix in prefixes]
+    if any(network.version != 4 for network in networks):
+        raise ValueError(f"only IPv4 prefixes can be advertised, got {prefixes}")
+    neighbors = neighbors or {}
+
+    lines = [f"ip route {network} blackhole" for network in networks]
+    lines += ["!"]
+    lines += [
+        f"ip prefix-list {SUMMARY_ROUTE_MAP} seq {5 * (index + 1)} permit {network}"
+        for index, network in enumerate(networks)
+    ]
+    lines += [
+        "!",
+        f"route-map {SUMMARY_ROUTE_MAP} permit 10",
+        f" match ip address prefix-list {SUMMARY_ROUTE_MAP}",
+        "!",
+        f"route-map {ACCEPT_ROUTE_MAP} permit 10",
+        "!",
+    ]
+    if bfd:
+        lines += [
+            "bfd",
+            f" profile {BFD_PROFILE}",
+            f"  detect-multiplier {BFD_DETECT_MULTIPLIER}",
+            f"  receive-interval {BFD_INTERVAL_MS}",
+            f"  transmit-interval {BFD_INTERVAL_MS}",
+            " !",
+            "!",
+        ]
+    lines.append(f"router bgp {asn}")
+    if router_id:
+        lines.append(f" bgp router-id {router_id}")
+    if timers:
+        keepalive, holdtime = timers
+        lines.append(f" timers bgp {keepalive} {holdtime}")
+    for address, remote_asn in sorted(neighbors.items()):
+        lines.append(f" neighbor {address} remote-as {remote_asn}")
+        if ebgp_multihop:
+            lines.append(f" neighbor {address} ebgp-multihop {ebgp_multihop}")
+        if bfd:
+            lines.append(f" neighbor {address} bfd profile {BFD_PROFILE}")
+    lines.append(" address-family ipv4 unicast")
+    lines += [f"  network {network}" for network in networks]
+    if maximum_paths:
+        lines.append(f"  maximum-paths {maximum_paths}")
+    for address in sorted(neighbors):
+        lines += [
+            f"  neighbor {address} route-map {ACCEPT_ROUTE_MAP} in",
+            f"  neighbor {address} route-map {SUMMARY_ROUTE_MAP} out",
+        ]
+    lines += [" exit-address-family", "!"]
+    return "\n".join(lines) + "\n"
+
+
+def render_load_script(bfd: bool = False) -> str:
+    """
+    Renders ``load-bgp.sh``, which loads the configuration into a running FRR.
+
+    :param bfd: Whether the configuration uses BFD, which needs FRR's ``bfdd`` daemon.
+        The script then enables it and restarts FRR first.
+    :type bfd: bool
+    :rtype: str
+    """
+    lines = ["#!/bin/bash", "set -e"]
+    if bfd:
+        lines += [
+            "if grep -q '^bfdd=no' /etc/frr/daemons; then",
+            "    sed -i 's/^bfdd=no/bfdd=yes/' /etc/frr/daemons",
+            "    systemctl restart frr",
+            "fi",
+        ]
+    lines += [
+        f"vtysh -f {BGPD_CONF_PATH}",
+        "vtysh -c 'write memory'",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def install_commands(bgpd_conf: str, bfd: bool = False) -> list:
+    """
+    Returns the shell commands that write the configuration and its load script, and
+    run the script if FRR is installed.
+
+    :param bgpd_conf: The configuration rendered by :func:`render_bgpd_conf`.
+    :type bgpd_conf: str
+    :param bfd: Whether the configuration uses BFD, see :func:`render_load_script`.
+    :type bfd: bool
+    :rtype: list
+    """
+    return [
+        "mkdir -p /home/ubuntu/demo_assets",
+        f"cat > {BGPD_CONF_PATH} <<'EOF'\n{bgpd_conf}EOF",
+        f"cat > {LOAD_SCRIPT_PATH} <<'EOF'\n{render_load_script(bfd)}EOF",
+        f"chmod +x {LOAD_SCRIPT_PATH}",
+        f"chown ubuntu:ubuntu {BGPD_CONF_PATH} {LOAD_SCRIPT_PATH}",
+        f"if command -v vtysh >/dev/null; then {LOAD_SCRIPT_PATH}; fi",
+    ]
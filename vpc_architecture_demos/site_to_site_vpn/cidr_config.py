@@ -1,6 +1,7 @@
 """
 This config file contains constants used for setting up a VPC and its associated subnets.
 """
+import ipaddress
 
 ALL_IP_CIDR = "0.0.0.0/0"
 """
@@ -39,3 +40,64 @@ The CIDR block for the simulated on-premises network.
 ONPREM_PUBLIC_SUBNET_CIDR = "192.168.12.0/24"
 ONPREM_PRIVATE_SUBNET_A_CIDR = "192.168.10.0/24"
 ONPREM_PRIVATE_SUBNET_B_CIDR = "192.168.11.0/24"
+
+TRANSIT_GATEWAY_CIDR = "10.255.0.0/24"
+"""
+The CIDR block of the transit gateway, from which its Connect peers take their
+GRE addresses. Must not overlap any VPC or on-prem network.
+
+:type: str
+"""
+
+ONPREM_RESOLVER_INBOUND_IPS = ["192.168.10.53", "192.168.11.53"]
+"""
+The fixed addresses of the DNS servers of the simulated on-premises network,
+one per private subnet. AWS resolvers forward on-prem names to these.
+
+:type: list
+"""
+
+ONPREM_DOMAIN = "onprem.internal"
+"""
+The DNS domain of the simulated on-premises network.
+
+:type: str
+"""
+
+ONPREM_DNS_CACHE_IPS = ["192.168.10.10", "192.168.11.10"]
+"""
+The fixed private addresses of routers A and B, which host the optional
+on-prem DNS cache and are handed out to on-prem clients via DHCP.
+
+:type: list
+"""
+
+
+def aws_private_subnet_cidrs(vpc_cidr: str) -> list:
+    """
+    Returns the CIDR blocks of private subnets A and B for an AWS VPC CIDR block.
+
+    The subnets sit at the same offsets as :data:`AWS_PRIVATE_SUBNET_A_CIDR` and
+    :data:`AWS_PRIVATE_SUBNET_B_CIDR` do in :data:`AWS_VPC_CIDR`, so regional copies
+    of the AWS network only differ in their VPC CIDR block.
+
+    :param vpc_cidr: A /16 CIDR block.
+    :type vpc_cidr: str
+    :rtype: list
+    """
+    network = ipaddress.ip_network(vpc_cidr)
+    if network.prefixlen != 16:
+        raise ValueError(f"the AWS VPC CIDR block must be a /16, got {vpc_cidr}")
+    subnets = list(network.subnets(new_prefix=20))
+    return [str(subnets[2]), str(subnets[6])]
+
+
+def resolver_address(subnet_cidr: str) -> str:
+    """
+    Returns the fixed address of a Route 53 Resolver inbound endpoint in a subnet.
+
+    :param subnet_cidr: The subnet's CIDR block.
+    :type subnet_cidr: str
+    :rtype: str
+    """
+    return str(ipaddress.ip_network(subnet_cidr).network_address + 53)
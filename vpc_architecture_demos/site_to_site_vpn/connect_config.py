@@ -0,0 +1,138 @@
+#pylint: disable-all
+"""
+Renders the GRE tunnels and BGP sessions of the on-prem routers for transit gateway Connect.
+
+Each router gets one Connect peer: a GRE tunnel from its private address to a fixed
+address in the transit gateway's CIDR block, carried by a VPC attachment of the
+on-prem network, and two eBGP sessions to the transit gateway's addresses inside the
+tunnel. Both routers advertise the same prefixes with the same AS path, so the transit
+gateway spreads traffic to the on-prem network over both peers with ECMP.
+
+The transport attachment propagates the on-prem VPC CIDR block into the transit
+gateway route table, and VPC routes take precedence over Connect routes of the same
+length. The routers therefore advertise each aggregate split in halves over Connect:
+the longer prefixes win and traffic stays in the tunnels.
+
+If the routers also have VPN connections, their tunnel neighbors join the same BGP
+configuration. The transit gateway prefers Connect routes over VPN routes of the
+same length, so the VPN tunnels only carry traffic while a Connect peer is down.
+"""
+import ipaddress
+from collections import namedtuple
+
+from vpc_architecture_demos.site_to_site_vpn import bgp_config, cidr_config
+
+ConnectPeer = namedtuple("ConnectPeer", ["transit_gateway_address", "inside_cidr"])
+"""
+The transit gateway side GRE address and the /29 BGP inside CIDR block of a Connect peer.
+"""
+
+CONNECT_PEERS = [
+    ConnectPeer(transit_gateway_address="10.255.0.10", inside_cidr="169.254.100.0/29"),
+    ConnectPeer(transit_gateway_address="10.255.0.11", inside_cidr="169.254.100.8/29"),
+]
+"""
+The Connect peers of routers A and B. The GRE addresses are in
+:data:`cidr_config.TRANSIT_GATEWAY_CIDR`, and the inside blocks avoid the
+link-local ranges that transit gateways reserve.
+
+:type: list
+"""
+
+GRE_INTERFACE = "gre1"
+GRE_MTU = 8500
+EBGP_MULTIHOP = 2
+MAXIMUM_PATHS = 2
+
+
+def inside_addresses(inside_cidr: str) -> tuple:
+    """
+    Returns the router's and the transit gateway's BGP addresses in a Connect peer's
+    inside CIDR block: the first host address is the router's, the next two are the
+    transit gateway's.
+
+    :param inside_cidr: A /29 inside CIDR block.
+    :type inside_cidr: str
+    :return: The router address and the list of transit gateway addresses.
+    :rtype: tuple
+    """
+    network = ipaddress.ip_network(inside_cidr)
+    if network.version != 4 or network.prefixlen != 29:
+        raise ValueError(f"the inside CIDR block of a Connect peer must be an IPv4 /29, got {inside_cidr}")
+    hosts = [str(host) for host in network.hosts()]
+    return hosts[0], hosts[1:3]
+
+
+def more_specifics(prefixes: list) -> list:
+    """
+    Returns every prefix split in its two halves, see the module docstring.
+
+    :param prefixes: The aggregates the routers advertise.
+    :type prefixes: list
+    :rtype: list
+    """
+    return [str(half) for prefix in prefixes for half in ipaddress.ip_network(prefix).subnets(prefixlen_diff=1)]
+
+
+def render_bgpd_conf(
+    peer: ConnectPeer,
+    prefixes: list,
+    asn: int = bgp_config.ONPREM_ASN,
+    fast_failover: bool = False,
+    neighbors: dict = None
+) -> str:
+    """
+    Renders a router's BGP configuration for a Connect peer.
+
+    :param peer: The router's Connect peer.
+    :type peer: ConnectPeer
+    :param prefixes: The aggregates the router advertises.
+    :type prefixes: list
+    :param asn: The router's ASN.
+    :type asn: int
+    :param fast_failover: Whether the sessions use :data:`bgp_config.FAST_FAILOVER_TIMERS` and BFD.
+    :type fast_failover: bool
+    :param neighbors: The remote ASN of additional neighbor addresses, e.g. the VPN tunnel inside addresses.
+    :type neighbors: dict
+    :rtype: str
+    """
+    router_address, transit_gateway_addresses = inside_addresses(peer.inside_cidr)
+    return bgp_config.render_bgpd_conf(
+        more_specifics(prefixes),
+        asn=asn,
+        neighbors={
+            **(neighbors or {}),
+            **{address: bgp_config.TRANSIT_GATEWAY_ASN for address in transit_gateway_addresses}
+        },
+        router_id=router_address,
+        ebgp_multihop=EBGP_MULTIHOP,
+        maximum_paths=MAXIMUM_PATHS,
+        timers=bgp_config.FAST_FAILOVER_TIMERS if fast_failover else None,
+        bfd=fast_failover
+    )
+
+
+def install_commands(peer: ConnectPeer, subnet_cidr: str) -> list:
+    """
+    Returns the shell commands that bring up a router's GRE tunnel to its Connect peer.
+
+    The tunnel source is the router's address in its private subnet, which is only known
+    at boot, and the transit gateway's CIDR block is routed out of the same interface.
+
+    :param peer: The router's Connect peer.
+    :type peer: ConnectPeer
+    :param subnet_cidr: The CIDR block of the router's private subnet.
+    :type subnet_cidr: str
+    :rtype: list
+    """
+    router_address, _ = inside_addresses(peer.inside_cidr)
+    prefixlen = ipaddress.ip_network(peer.inside_cidr).prefixlen
+    gateway = str(ipaddress.ip_network(subnet_cidr).network_address + 1)
+    return [
+        f"GRE_LOCAL=$(ip -4 route get {gateway} | grep -oP 'src \\K\\S+')",
+        f"GRE_DEV=$(ip -4 route get {gateway} | grep -oP 'dev \\K\\S+')",
+        f"ip route replace {cidr_config.TRANSIT_GATEWAY_CIDR} via {gateway} dev $GRE_DEV",
+        f"ip tunnel add {GRE_INTERFACE} mode gre local $GRE_LOCAL remote {peer.transit_gateway_address} ttl 255",
+        f"ip addr add {router_address}/{prefixlen} dev {GRE_INTERFACE}",
+        f"ip link set {GRE_INTERFACE} mtu {GRE_MTU} up",
+    ]
@@ -0,0 +1,111 @@
+#pylint: disable-all
+"""
+Renders the unbound caching resolver that runs on the on-prem routers.
+
+The routers already have internet access through their public interface, so they
+host the cache instead of a separate resolver pair. Clients in the on-prem network
+are pointed at the routers' private addresses with a DHCP options set, and unbound
+forwards cache misses to the Amazon DNS server at its link-local address.
+"""
+
+AMAZON_DNS_IP = "169.254.169.253"
+"""
+The link-local address of the Amazon-provided DNS server, reachable from every instance.
+
+:type: str
+"""
+
+DEFAULT_MIN_TTL = 60
+"""
+The default TTL floor in seconds applied to cached answers.
+
+:type: int
+"""
+
+UNBOUND_CONF_PATH = "/etc/unbound/unbound.conf.d/onprem-cache.conf"
+"""
+Where the rendered configuration is written on the routers.
+
+:type: str
+"""
+
+
+def render_unbound_conf(
+    allowed_cidrs: list,
+    upstream: str = AMAZON_DNS_IP,
+    min_ttl: int = DEFAULT_MIN_TTL,
+    prefetch: bool = True
+) -> str:
+    """
+    Renders an unbound configuration for a caching forwarder.
+
+    :param allowed_cidrs: The networks that may query the cache.
+    :type allowed_cidrs: list
+    :param upstream: The resolver that cache misses are forwarded to.
+    :type upstream: str
+    :param min_ttl: The minimum TTL in seconds for cached answers.
+    :type min_ttl: int
+    :param prefetch: Whether popular entries are refreshed before they expire.
+    :type prefetch: bool
+    :return: The configuration file contents.
+    :rtype: str
+    """
+    if min_ttl < 0:
+        raise ValueError(f"min_ttl must not be negative, got {min_ttl}")
+
+    flag = "yes" if prefetch else "no"
+    lines = [
+        "server:",
+        "    interface: 0.0.0.0",
+        "    access-control: 0.0.0.0/0 refuse",
+        *[f"    access-control: {cidr} allow" for cidr in allowed_cidrs],
+        f"    cache-min-ttl: {min_ttl}",
+        f"    prefetch: {flag}",
+        f"    prefetch-key: {flag}",
+        "    num-threads: 2",
+        "    so-reuseport: yes",
+        "    msg-cache-size: 64m",
+        "    rrset-cache-size: 128m",
+        "",
+        "forward-zone:",
+        '    name: "."',
+        f"    forward-addr: {upstream}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def resolver_commands() -> list:
+    """
+    Returns the shell commands that point a router's own lookups at the Amazon DNS server.
+
+    The router stops the systemd-resolved stub listener so unbound can bind port 53
+    and resolves through the Amazon DNS server directly, which keeps it working
+    before unbound is up even though the DHCP options point at the routers. Run them
+    before anything else in the user data, which already needs DNS.
+
+    :rtype: list
+    """
+    return [
+        "mkdir -p /etc/systemd/resolved.conf.d",
+        f"printf '[Resolve]\\nDNS={AMAZON_DNS_IP}\\nDNSStubListener=no\\n' > /etc/systemd/resolved.conf.d/onprem-cache.conf",
+        "ln -sf /run/systemd/resolve/resolv.conf /etc/resolv.conf",
+        "systemctl restart systemd-resolved",
+    ]
+
+
+def install_commands(unbound_conf: str) -> list:
+    """
+    Returns the shell commands that install unbound with the given configuration. The
+    commands of :func:`resolver_commands` must have run before.
+
+    :param unbound_conf: The configuration rendered by :func:`render_unbound_conf`.
+    :type unbound_conf: str
+    :rtype: list
+    """
+    return [
+        "apt-get update && apt-get install -y unbound",
+        "mkdir -p /etc/unbound/unbound.conf.d",
+        f"cat > {UNBOUND_CONF_PATH} <<'EOF'\n{unbound_conf}EOF",
+        "systemctl enable unbound",
+        "systemctl restart unbound",
+    ]
@@ -0,0 +1,97 @@
+#pylint: disable-all
+"""
+Measures round-trip times from this function's region to other regions.
+
+The RTT to a region is the median TCP handshake time to the region's EC2 API
+endpoint over several samples. Each run publishes one ``InterRegionRtt`` metric per
+destination and overwrites this region's row of the latency matrix, a JSON document
+in an SSM parameter that ``vpc_architecture_demos.latency_matrix`` collects.
+
+Environment:
+
+- ``SOURCE_REGION``: the region the function runs in
+- ``DESTINATION_REGIONS``: comma-separated regions to measure
+- ``PARAMETER_NAME``: the SSM parameter holding this region's row
+- ``METRIC_NAMESPACE``: the CloudWatch namespace of the metrics
+- ``SAMPLES``: the number of handshakes per destination
+"""
+import json
+import os
+import socket
+import statistics
+import time
+from datetime import datetime, timezone
+
+
+def endpoint(region):
+    return ("ec2.%s.amazonaws.com" % region, 443)
+
+
+def measure_rtt(address, samples=5, timeout=2.0, connect=socket.create_connection):
+    """
+    Returns the median TCP handshake time to an address in milliseconds, or None if every attempt failed.
+
+    :param address: A ``(host, port)`` tuple.
+    :param samples: The number of handshakes.
+    :param timeout: The timeout of one handshake in seconds.
+    :param connect: The function that opens a connection, for tests.
+    """
+    host, port = address
+    # resolve once so DNS time is not part of the measurement
+    try:
+        resolved = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][4]
+    except OSError:
+        return None
+
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        try:
+            connection = connect(resolved, timeout=timeout)
+        except OSError:
+            continue
+        timings.append((time.perf_counter() - started) * 1000)
+        connection.close()
+    return statistics.median(timings) if timings else None
+
+
+def build_row(source, rtts, now=None):
+    """
+    Returns this region's row of the latency matrix.
+    """
+    return {
+        "source": source,
+        "measured_at": (now or datetime.now(timezone.utc)).isoformat(),
+        "rtt_ms": {region: round(rtt, 2) for region, rtt in sorted(rtts.items()) if rtt is not None},
+    }
+
+
+def handler(event, context):
+    import boto3
+
+    source = os.environ["SOURCE_REGION"]
+    destinations = [region for region in os.environ["DESTINATION_REGIONS"].split(",") if region]
+    samples = int(os.environ.get("SAMPLES", "5"))
+
+    rtts = {region: measure_rtt(endpoint(region), samples=samples) for region in destinations}
+    row = build_row(source, rtts)
+
+    metric_data = [
+        {
+            "MetricName": "InterRegionRtt",
+            "Dimensions": [
+                {"Name": "SourceRegion", "Value": source},
+                {"Name": "DestinationRegion", "Value": region},
+            ],
+            "Unit": "Milliseconds",
+            "Value": rtt,
+        }
+        for region, rtt in row["rtt_ms"].items()
+    ]
+    if metric_data:
+        boto3.client("cloudwatch").put_metric_data(Namespace=os.environ["METRIC_NAMESPACE"], MetricData=metric_data)
+
+    boto3.client("ssm").put_parameter(
+        Name=os.environ["PARAMETER_NAME"], Value=json.dumps(row), Type="String", Overwrite=True
+    )
+    return row
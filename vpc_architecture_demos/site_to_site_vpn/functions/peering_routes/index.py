@@ -0,0 +1,180 @@
+#pylint: disable-all
+"""
+Custom resource handlers that finish a cross-region transit gateway peering.
+
+CloudFormation can create the peering attachment in the requester region but cannot
+accept it in the peer region, and the default transit gateway route tables have no
+CloudFormation attributes. ``on_event`` accepts the attachment in the peer region and
+``is_complete`` waits until it is available, then associates it with the default
+route table on both sides and adds the static routes for the other side's CIDR blocks.
+It also adds the requester's CIDR blocks to the accepter's AWS prefix list, which was
+deployed before the requester's CIDR blocks were known, and removes them on delete.
+
+Resource properties:
+
+- ``AttachmentId``: the peering attachment
+- ``LocalRegion``/``LocalTransitGatewayId``/``LocalCidrs``: the requester side
+- ``PeerRegion``/``PeerTransitGatewayId``/``PeerCidrs``: the accepter side
+- ``PeerPrefixListId``: the accepter's AWS prefix list, optional
+"""
+import boto3
+from botocore.exceptions import ClientError
+
+_IGNORED_ACCEPT_ERRORS = ("IncorrectState", "InvalidTransitGatewayAttachmentID.NotFound")
+_IGNORED_ASSOCIATE_ERRORS = ("Resource.AlreadyAssociated", "TransitGatewayRouteTableAssociation.AlreadyExists")
+_IGNORED_DELETE_ERRORS = ("InvalidRoute.NotFound", "InvalidTransitGatewayAttachmentID.NotFound", "InvalidRouteTableID.NotFound")
+
+
+def route_plan(properties):
+    """
+    Returns the routes a peering needs as ``(region, transit_gateway_id, cidr)`` tuples.
+
+    :param properties: The custom resource properties.
+    :type properties: dict
+    :rtype: list
+    """
+    plan = [
+        (properties["LocalRegion"], properties["LocalTransitGatewayId"], cidr) for cidr in properties["PeerCidrs"]
+    ]
+    plan += [
+        (properties["PeerRegion"], properties["PeerTransitGatewayId"], cidr) for cidr in properties["LocalCidrs"]
+    ]
+    return plan
+
+
+def update_prefix_list(client, prefix_list_id, add=(), remove=(), description=None):
+    """
+    Adds and removes CIDR blocks of a managed prefix list, skipping the ones that are
+    already in or already gone.
+
+    :param client: An EC2 client in the prefix list's region.
+    :param prefix_list_id: The prefix list.
+    :type prefix_list_id: str
+    :param add: The CIDR blocks to add.
+    :type add: list
+    :param remove: The CIDR blocks to remove.
+    :type remove: list
+    :param description: The description of added entries.
+    :type description: str
+    """
+    current = {
+        entry["Cidr"] for entry in client.get_managed_prefix_list_entries(PrefixListId=prefix_list_id)["Entries"]
+    }
+    add_entries = [{"Cidr": cidr, "Description": description or ""} for cidr in add if cidr not in current]
+    remove_entries = [{"Cidr": cidr} for cidr in remove if cidr in current]
+    if not add_entries and not remove_entries:
+        return
+    version = client.describe_managed_prefix_lists(PrefixListIds=[prefix_list_id])["PrefixLists"][0]["Version"]
+    client.modify_managed_prefix_list(
+        PrefixListId=prefix_list_id,
+        CurrentVersion=version,
+        AddEntries=add_entries,
+        RemoveEntries=remove_entries
+    )
+
+
+def _update_peer_prefix_list(properties, add):
+    prefix_list_id = properties.get("PeerPrefixListId")
+    if not prefix_list_id:
+        return
+    cidrs = properties["LocalCidrs"]
+    update_prefix_list(
+        boto3.client("ec2", region_name=properties["PeerRegion"]),
+        prefix_list_id,
+        add=cidrs if add else (),
+        remove=() if add else cidrs,
+        description=f"aws-private-network {properties['LocalRegion']}"
+    )
+
+
+def _error_code(error):
+    return error.response.get("Error", {}).get("Code")
+
+
+def _default_route_table(client, transit_gateway_id):
+    transit_gateway = client.describe_transit_gateways(TransitGatewayIds=[transit_gateway_id])["TransitGateways"][0]
+    return transit_gateway["Options"]["AssociationDefaultRouteTableId"]
+
+
+def _apply_routes(properties):
+    attachment_id = properties["AttachmentId"]
+    route_tables = {}
+    for region, transit_gateway_id, cidr in route_plan(properties):
+        client = boto3.client("ec2", region_name=region)
+        if (region, transit_gateway_id) not in route_tables:
+            route_table_id = _default_route_table(client, transit_gateway_id)
+            route_tables[(region, transit_gateway_id)] = route_table_id
+            try:
+                client.associate_transit_gateway_route_table(
+                    TransitGatewayRouteTableId=route_table_id, TransitGatewayAttachmentId=attachment_id
+                )
+            except ClientError as error:
+                if _error_code(error) not in _IGNORED_ASSOCIATE_ERRORS:
+                    raise
+        route_table_id = route_tables[(region, transit_gateway_id)]
+        try:
+            client.create_transit_gateway_route(
+                DestinationCidrBlock=cidr,
+                TransitGatewayRouteTableId=route_table_id,
+                TransitGatewayAttachmentId=attachment_id
+            )
+        except ClientError as error:
+            if _error_code(error) != "RouteAlreadyExists":
+                raise
+            client.replace_transit_gateway_route(
+                DestinationCidrBlock=cidr,
+                TransitGatewayRouteTableId=route_table_id,
+                TransitGatewayAttachmentId=attachment_id
+            )
+
+
+def _delete_routes(properties):
+    for region, transit_gateway_id, cidr in route_plan(properties):
+        client = boto3.client("ec2", region_name=region)
+        try:
+            client.delete_transit_gateway_route(
+                DestinationCidrBlock=cidr,
+                TransitGatewayRouteTableId=_default_route_table(client, transit_gateway_id)
+            )
+        except ClientError as error:
+            if _error_code(error) not in _IGNORED_DELETE_ERRORS:
+                raise
+
+
+def on_event(event, context):
+    properties = event["ResourceProperties"]
+    request_type = event["RequestType"]
+
+    if request_type == "Delete":
+        _delete_routes(properties)
+        _update_peer_prefix_list(properties, add=False)
+        return {"PhysicalResourceId": event["PhysicalResourceId"]}
+
+    if request_type == "Update":
+        _delete_routes(event["OldResourceProperties"])
+        _update_peer_prefix_list(event["OldResourceProperties"], add=False)
+
+    try:
+        boto3.client("ec2", region_name=properties["PeerRegion"]).accept_transit_gateway_peering_attachment(
+            TransitGatewayAttachmentId=properties["AttachmentId"]
+        )
+    except ClientError as error:
+        if _error_code(error) not in _IGNORED_ACCEPT_ERRORS:
+            raise
+    return {"PhysicalResourceId": properties["AttachmentId"]}
+
+
+def is_complete(event, context):
+    if event["RequestType"] == "Delete":
+        return {"IsComplete": True}
+
+    properties = event["ResourceProperties"]
+    attachment = boto3.client("ec2", region_name=properties["LocalRegion"]).describe_transit_gateway_peering_attachments(
+        TransitGatewayAttachmentIds=[properties["AttachmentId"]]
+    )["TransitGatewayPeeringAttachments"][0]
+    if attachment["State"] != "available":
+        return {"IsComplete": False}
+
+    _apply_routes(properties)
+    _update_peer_prefix_list(properties, add=True)
+    return {"IsComplete": True}
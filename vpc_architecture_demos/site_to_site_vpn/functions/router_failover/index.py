@@ -0,0 +1,171 @@
+#pylint: disable-all
+"""
+Health-checks the on-prem routers and moves the private subnet routes to AWS off a failed router.
+
+Each private subnet routes the AWS prefix list through its own router's private
+network interface. Every probe interval the function opens a TCP connection to each
+router's BGP port: an accepted connection means the router is up, a timeout means it
+is down. Until a router first accepts a connection FRR may not be installed yet, so a
+refused connection means the host is up; once it accepted one, the router is expected
+to run BGP and a refused connection means it is down. After ``FAILURE_THRESHOLD``
+failed probes in a row a router is down, and every route through it is replaced with
+a route through a healthy router; after as many successful probes it is up again and
+the routes fail back to their preferred router.
+
+One invocation probes for about a minute and the function runs every minute, so
+routers are always watched. Health is not kept between invocations: routes are only
+changed once every router's state has been confirmed by this invocation. The routers
+that accepted a connection are remembered while the function's container is warm.
+
+Environment:
+
+- ``ROUTERS``: JSON list of ``{"name", "address", "network_interface_id"}``
+- ``ROUTES``: JSON list of ``{"route_table_id", "preferred"}``, the router name each table prefers
+- ``DESTINATION_PREFIX_LIST_ID``: the destination of the routes
+- ``PROBE_PORT``: the TCP port to probe
+- ``PROBE_INTERVAL``: the seconds between probes
+- ``FAILURE_THRESHOLD``: the probes in a row that change a router's state
+"""
+import json
+import os
+import socket
+import time
+
+ACCEPTED, REFUSED, FAILED = "accepted", "refused", "failed"
+
+_listening = set()
+
+
+def probe(address, port, timeout=1.0, connect=socket.create_connection):
+    """
+    Returns how a host answers a TCP connection attempt: ``ACCEPTED``, ``REFUSED`` or
+    ``FAILED`` on a timeout or any other error.
+
+    :param address: The host address.
+    :param port: The TCP port.
+    :param timeout: The timeout in seconds.
+    :param connect: The function that opens a connection, for tests.
+    """
+    try:
+        connect((address, port), timeout=timeout).close()
+    except ConnectionRefusedError:
+        return REFUSED
+    except OSError:
+        return FAILED
+    return ACCEPTED
+
+
+def is_up(result, listening):
+    """
+    Returns whether a probe result means the router is up.
+
+    :param result: The result of :func:`probe`.
+    :param listening: Whether the router accepted a connection before, so it is
+        expected to run BGP and a refused connection means FRR is down.
+    """
+    return result == ACCEPTED or (result == REFUSED and not listening)
+
+
+def update_health(health, streaks, results, threshold):
+    """
+    Returns the router health and probe streaks after a round of probes.
+
+    A streak counts successful probes in a row as a positive number and failed ones as
+    a negative number. A router's health is None until a streak reaches the threshold.
+
+    :param health: The health of each router name, True, False or None.
+    :param streaks: The streak of each router name.
+    :param results: The probe result of each router name.
+    :param threshold: The probes in a row that change a router's state.
+    """
+    health, streaks = dict(health), dict(streaks)
+    for name, result in results.items():
+        streak = streaks.get(name, 0)
+        if result:
+            streak = streak + 1 if streak > 0 else 1
+        else:
+            streak = streak - 1 if streak < 0 else -1
+        streaks[name] = streak
+        if abs(streak) >= threshold:
+            health[name] = streak > 0
+    return health, streaks
+
+
+def plan_routes(routes, routers, health, current):
+    """
+    Returns the ``(route_table_id, network_interface_id)`` route replacements that move
+    routes off down routers.
+
+    A route goes through its preferred router if it is up, else through the first
+    healthy router, and stays where it is if no router is healthy.
+
+    :param routes: The routes, see ``ROUTES``.
+    :param routers: The routers, see ``ROUTERS``.
+    :param health: The health of each router name.
+    :param current: The network interface each route table currently targets.
+    """
+    interfaces = {router["name"]: router["network_interface_id"] for router in routers}
+    healthy = [router["name"] for router in routers if health.get(router["name"])]
+    changes = []
+    for route in routes:
+        if health.get(route["preferred"]):
+            target = interfaces[route["preferred"]]
+        elif healthy:
+            target = interfaces[healthy[0]]
+        else:
+            continue
+        if current.get(route["route_table_id"]) != target:
+            changes.append((route["route_table_id"], target))
+    return changes
+
+
+def current_targets(ec2, route_table_ids, prefix_list_id):
+    """
+    Returns the network interface each route table's route to the prefix list targets.
+    """
+    targets = {}
+    response = ec2.describe_route_tables(RouteTableIds=route_table_ids)
+    for table in response["RouteTables"]:
+        for route in table["Routes"]:
+            if route.get("DestinationPrefixListId") == prefix_list_id:
+                targets[table["RouteTableId"]] = route.get("NetworkInterfaceId")
+    return targets
+
+
+def handler(event, context):
+    import boto3
+
+    routers = json.loads(os.environ["ROUTERS"])
+    routes = json.loads(os.environ["ROUTES"])
+    prefix_list_id = os.environ["DESTINATION_PREFIX_LIST_ID"]
+    port = int(os.environ.get("PROBE_PORT", "179"))
+    interval = float(os.environ.get("PROBE_INTERVAL", "2"))
+    threshold = int(os.environ.get("FAILURE_THRESHOLD", "3"))
+
+    ec2 = boto3.client("ec2")
+    health, streaks, changes = {}, {}, []
+    # stop early enough to finish a round and a route change
+    while context.get_remaining_time_in_millis() > (interval + 10) * 1000:
+        started = time.monotonic()
+        results = {}
+        for router in routers:
+            result = probe(router["address"], port, timeout=min(1.0, interval))
+            results[router["name"]] = is_up(result, router["name"] in _listening)
+            if result == ACCEPTED:
+                _listening.add(router["name"])
+        previous = health
+        health, streaks = update_health(health, streaks, results, threshold)
+
+        if health != previous and all(health.get(router["name"]) is not None for router in routers):
+            current = current_targets(ec2, [route["route_table_id"] for route in routes], prefix_list_id)
+            for route_table_id, network_interface_id in plan_routes(routes, routers, health, current):
+                ec2.replace_route(
+                    RouteTableId=route_table_id,
+                    DestinationPrefixListId=prefix_list_id,
+                    NetworkInterfaceId=network_interface_id
+                )
+                changes.append({"route_table_id": route_table_id, "network_interface_id": network_interface_id})
+                print(json.dumps({"health": health, "route_table_id": route_table_id, "network_interface_id": network_interface_id}))
+
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    return {"health": health, "changes": changes}
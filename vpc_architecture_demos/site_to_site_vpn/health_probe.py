@@ -0,0 +1,412 @@
+#pylint: disable-all
+"""
+Probes the site-to-site VPN demo after deploy and prints a JSON report.
+
+The probes are derived from the stack outputs and run concurrently, with a bound on
+the number in flight and a timeout each, so the whole report takes about as long as
+the slowest probe::
+
+    $ python -m vpc_architecture_demos.site_to_site_vpn.health_probe --stack site-to-site-vpn-stack --region us-east-1
+    $ cdk deploy --outputs-file outputs.json && \\
+        python -m vpc_architecture_demos.site_to_site_vpn.health_probe --outputs-file outputs.json
+
+Router public addresses get an IKE probe on UDP 500 and 4500 and an ICMP echo.
+The IKE probe sends a well-formed IKE_SA_INIT request; any reply, typically a
+``NO_PROPOSAL_CHOSEN`` notify for an unknown peer, shows the IKE daemon is up.
+Private addresses get an ICMP echo and a TCP probe on port 22, which only succeed
+from inside the networks, e.g. when run on a server through Session Manager to check
+that the servers reach each other across the VPN. VPN connection IDs get a tunnel
+probe that reads the tunnel status from EC2.
+
+ICMP needs unprivileged ping sockets (``net.ipv4.ping_group_range`` on Linux) or
+root; otherwise the ICMP probes are skipped. Reading stack outputs and tunnel
+status requires ``boto3``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import struct
+import sys
+import time
+from collections import Counter, namedtuple
+
+DEFAULT_CONCURRENCY = 32
+"""
+The default number of probes in flight.
+
+:type: int
+"""
+
+DEFAULT_TIMEOUT = 2.0
+"""
+The default timeout of one probe in seconds.
+
+:type: float
+"""
+
+OUTPUT_PROBES = [
+    (re.compile(r"Router[AB]PublicIP"), [("ike", 500), ("ike", 4500), ("icmp", None)]),
+    (re.compile(r"PrivateIP"), [("icmp", None), ("tcp", 22)]),
+    (re.compile(r"VpnConnectionId"), [("tunnel", None)]),
+]
+"""
+The probes run for each stack output, by output key pattern.
+
+:type: list
+"""
+
+Probe = namedtuple("Probe", ["name", "check", "host", "port"])
+"""
+One check of one target: a name, the check (``ike``, ``tcp``, ``icmp`` or ``tunnel``),
+the host or VPN connection ID, and the port if any.
+"""
+
+_OUTPUT_HASH = re.compile(r"[0-9A-F]{8}$")
+
+_IKE_SA_INIT = 34
+_IKE_NOTIFY = 41
+_IKE_NOTIFY_TYPES = {7: "INVALID_SYNTAX", 14: "NO_PROPOSAL_CHOSEN", 17: "INVALID_KE_PAYLOAD", 16390: "COOKIE"}
+_NON_ESP_MARKER = b"\x00\x00\x00\x00"
+
+
+def probes_from_outputs(outputs: dict) -> list:
+    """
+    Returns the probes for a stack's outputs.
+
+    :param outputs: Output values by output key.
+    :type outputs: dict
+    :rtype: list
+    """
+    probes = []
+    for key, value in sorted(outputs.items()):
+        name = _OUTPUT_HASH.sub("", key)
+        for pattern, checks in OUTPUT_PROBES:
+            if pattern.search(key):
+                probes += [Probe(name=name, check=check, host=value, port=port) for check, port in checks]
+                break
+    return probes
+
+
+def load_outputs(stack_name: str = None, region: str = None, outputs_file: str = None, session=None) -> dict:
+    """
+    Reads a stack's outputs from CloudFormation or from a ``cdk deploy --outputs-file`` file.
+
+    :param stack_name: The stack name. May be omitted if the file holds one stack.
+    :type stack_name: str
+    :param region: The stack's region.
+    :type region: str
+    :param outputs_file: The outputs file, if outputs should not be read from CloudFormation.
+    :type outputs_file: str
+    :param session: An optional ``boto3.Session``.
+    :rtype: dict
+    """
+    if outputs_file:
+        with open(outputs_file) as file:
+            stacks = json.load(file)
+        if stack_name is None:
+            if len(stacks) != 1:
+                raise ValueError(f"{outputs_file} holds several stacks, pass one of {sorted(stacks)}")
+            stack_name = next(iter(stacks))
+        return stacks[stack_name]
+
+    if session is None:
+        import boto3
+        session = boto3.Session()
+    stack = session.client("cloudformation", region_name=region).describe_stacks(StackName=stack_name)["Stacks"][0]
+    return {output["OutputKey"]: output["OutputValue"] for output in stack.get("Outputs", [])}
+
+
+def ike_sa_init(spi: bytes) -> bytes:
+    """
+    Returns an IKEv2 IKE_SA_INIT request that offers AES-CBC-128/SHA-256/MODP-2048.
+
+    :param spi: The 8-byte initiator SPI.
+    :type spi: bytes
+    :rtype: bytes
+    """
+    transforms = [
+        (1, 12, struct.pack("!HH", 0x800E, 128)),   # ENCR_AES_CBC, key length 128
+        (2, 5, b""),                                # PRF_HMAC_SHA2_256
+        (3, 12, b""),                               # AUTH_HMAC_SHA2_256_128
+        (4, 14, b""),                               # 2048-bit MODP group
+    ]
+    transforms_data = b"".join(
+        struct.pack("!BBHBBH", 0 if index == len(transforms) - 1 else 3, 0, 8 + len(attributes), kind, 0, transform_id) + attributes
+        for index, (kind, transform_id, attributes) in enumerate(transforms)
+    )
+    proposal = struct.pack("!BBHBBBB", 0, 0, 8 + len(transforms_data), 1, 1, 0, len(transforms)) + transforms_data
+    sa = struct.pack("!BBH", 34, 0, 4 + len(proposal)) + proposal
+    key_exchange = os.urandom(256)
+    ke = struct.pack("!BBHHH", 40, 0, 8 + len(key_exchange), 14, 0) + key_exchange
+    nonce_data = os.urandom(32)
+    nonce = struct.pack("!BBH", 0, 0, 4 + len(nonce_data)) + nonce_data
+    body = sa + ke + nonce
+    return spi + bytes(8) + struct.pack("!BBBBII", 33, 0x20, _IKE_SA_INIT, 0x08, 0, 28 + len(body)) + body
+
+
+def parse_ike_response(data: bytes, spi: bytes) -> str:
+    """
+    Returns a description of an IKE response to a request with the given SPI, or None if it is not one.
+
+    :param data: The received datagram, without the non-ESP marker.
+    :type data: bytes
+    :param spi: The initiator SPI of the request.
+    :type spi: bytes
+    :rtype: str
+    """
+    if len(data) < 28 or data[:8] != spi:
+        return None
+    next_payload, exchange = data[16], data[18]
+    offset = 28
+    while next_payload and offset + 4 <= len(data):
+        payload, payload_length = data[offset], struct.unpack("!H", data[offset + 2:offset + 4])[0]
+        if next_payload == _IKE_NOTIFY and offset + 8 <= len(data):
+            notify_type = struct.unpack("!H", data[offset + 6:offset + 8])[0]
+            return f"notify {_IKE_NOTIFY_TYPES.get(notify_type, notify_type)}"
+        if payload_length < 4:
+            break
+        next_payload, offset = payload, offset + payload_length
+    return "IKE_SA_INIT response" if exchange == _IKE_SA_INIT else f"exchange {exchange}"
+
+
+class _DatagramProbe(asyncio.DatagramProtocol):
+
+    def __init__(self, spi: bytes, nat_traversal: bool):
+        self.spi = spi
+        self.nat_traversal = nat_traversal
+        self.result = asyncio.get_event_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if self.nat_traversal:
+            if not data.startswith(_NON_ESP_MARKER):
+                return
+            data = data[len(_NON_ESP_MARKER):]
+        detail = parse_ike_response(data, self.spi)
+        if detail is not None and not self.result.done():
+            self.result.set_result(("open", detail))
+
+    def error_received(self, exc):
+        if not self.result.done():
+            self.result.set_result(("refused", str(exc)))
+
+
+async def probe_ike(host: str, port: int, timeout: float, nat_traversal: bool = None) -> tuple:
+    """
+    Sends an IKE_SA_INIT request and waits for a response.
+
+    :param nat_traversal: Whether to prefix the request with the non-ESP marker. Defaults to True on port 4500.
+    :type nat_traversal: bool
+    :return: ``(status, detail)``, where the status is ``open``, ``refused`` or ``no-reply``.
+    :rtype: tuple
+    """
+    loop = asyncio.get_event_loop()
+    spi = os.urandom(8)
+    if nat_traversal is None:
+        nat_traversal = port == 4500
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _DatagramProbe(spi, nat_traversal), remote_addr=(host, port)
+    )
+    try:
+        transport.sendto((_NON_ESP_MARKER if nat_traversal else b"") + ike_sa_init(spi))
+        return await asyncio.wait_for(protocol.result, timeout)
+    except asyncio.TimeoutError:
+        return "no-reply", f"no IKE response within {timeout}s"
+    finally:
+        transport.close()
+
+
+async def probe_tcp(host: str, port: int, timeout: float) -> tuple:
+    """
+    Opens and closes a TCP connection.
+
+    :return: ``(status, detail)``, where the status is ``open``, ``refused`` or ``no-reply``.
+    :rtype: tuple
+    """
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.TimeoutError:
+        return "no-reply", f"no handshake within {timeout}s"
+    except ConnectionRefusedError as error:
+        return "refused", str(error)
+    writer.close()
+    return "open", "handshake completed"
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _icmp_socket():
+    for kind in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            return socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+        except PermissionError:
+            continue
+    return None
+
+
+async def probe_icmp(host: str, timeout: float) -> tuple:
+    """
+    Sends an ICMP echo request and waits for the reply.
+
+    :return: ``(status, detail)``, where the status is ``open``, ``no-reply`` or ``skipped``.
+    :rtype: tuple
+    """
+    sock = _icmp_socket()
+    if sock is None:
+        return "skipped", "ICMP needs ping sockets or root"
+
+    loop = asyncio.get_event_loop()
+    identifier, sequence = os.getpid() & 0xFFFF, int.from_bytes(os.urandom(2), "big")
+    payload = os.urandom(16)
+    header = struct.pack("!BBHHH", 8, 0, 0, identifier, sequence)
+    packet = struct.pack("!BBHHH", 8, 0, _checksum(header + payload), identifier, sequence) + payload
+
+    sock.setblocking(False)
+    try:
+        address = (await loop.getaddrinfo(host, None, family=socket.AF_INET))[0][4][0]
+        sock.connect((address, 0))
+        await loop.sock_sendall(sock, packet)
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return "no-reply", f"no echo reply within {timeout}s"
+            try:
+                data = await asyncio.wait_for(loop.sock_recv(sock, 1024), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if sock.type == socket.SOCK_RAW:
+                data = data[(data[0] & 0x0F) * 4:]
+            # ping sockets rewrite the identifier, so replies are matched on the random payload
+            if len(data) >= 8 and data[0] == 0 and data[8:] == payload:
+                return "open", "echo reply"
+    finally:
+        sock.close()
+
+
+async def probe_tunnel(vpn_connection_id: str, session=None, region: str = None) -> tuple:
+    """
+    Reads the status of a VPN connection's tunnels from EC2.
+
+    :return: ``(status, detail)``, where the status is ``up``, ``degraded`` or ``down``.
+    :rtype: tuple
+    """
+    if session is None:
+        import boto3
+        session = boto3.Session()
+
+    def describe():
+        client = session.client("ec2", region_name=region)
+        return client.describe_vpn_connections(VpnConnectionIds=[vpn_connection_id])["VpnConnections"][0]
+
+    connection = await asyncio.get_event_loop().run_in_executor(None, describe)
+    tunnels = {tunnel["OutsideIpAddress"]: tunnel["Status"] for tunnel in connection.get("VgwTelemetry", [])}
+    up = [address for address, status in tunnels.items() if status == "UP"]
+    status = "up" if tunnels and len(up) == len(tunnels) else "degraded" if up else "down"
+    return status, ", ".join(f"{address} {status}" for address, status in sorted(tunnels.items()))
+
+
+_HEALTHY = {"open", "up"}
+
+
+async def run_probes(
+    probes: list,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    session=None,
+    region: str = None
+) -> dict:
+    """
+    Runs probes concurrently and returns the report.
+
+    :param probes: The probes to run.
+    :type probes: list
+    :param concurrency: The maximum number of probes in flight.
+    :type concurrency: int
+    :param timeout: The timeout of one probe in seconds.
+    :type timeout: float
+    :param session: An optional ``boto3.Session`` for tunnel probes.
+    :param region: The region of the VPN connections.
+    :type region: str
+    :return: ``{"ok", "elapsed_ms", "summary", "results"}``, with results in probe order.
+        Skipped probes do not make the report fail.
+    :rtype: dict
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(probe: Probe) -> dict:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if probe.check == "ike":
+                    status, detail = await probe_ike(probe.host, probe.port, timeout)
+                elif probe.check == "tcp":
+                    status, detail = await probe_tcp(probe.host, probe.port, timeout)
+                elif probe.check == "icmp":
+                    status, detail = await probe_icmp(probe.host, timeout)
+                elif probe.check == "tunnel":
+                    status, detail = await asyncio.wait_for(probe_tunnel(probe.host, session, region), timeout * 5)
+                else:
+                    raise ValueError(f"unknown check {probe.check}")
+            except Exception as error:
+                status, detail = "error", f"{type(error).__name__}: {error}"
+            return dict(
+                probe._asdict(),
+                status=status,
+                ok=status in _HEALTHY or status == "skipped",
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+                detail=detail
+            )
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run(probe) for probe in probes))
+    return {
+        "ok": all(result["ok"] for result in results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "summary": dict(Counter(result["status"] for result in results)),
+        "results": list(results),
+    }
+
+
+def _target(value: str) -> Probe:
+    check, _, address = value.partition(":")
+    host, _, port = address.rpartition(":") if check in ("tcp", "ike") else (address, None, None)
+    return Probe(name=value, check=check, host=host, port=int(port) if port else None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Probe the site-to-site VPN demo concurrently.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--stack", help="name of the deployed stack whose outputs are probed")
+    source.add_argument("--outputs-file", help="file written by cdk deploy --outputs-file")
+    parser.add_argument("--region", help="region of the stack")
+    parser.add_argument(
+        "--target", action="append", type=_target, default=[], metavar="CHECK:HOST[:PORT]",
+        help="extra probe, e.g. tcp:10.16.32.10:443 or icmp:192.168.10.10, can be repeated"
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="maximum probes in flight")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="timeout of one probe in seconds")
+    args = parser.parse_args(argv)
+
+    probes = list(args.target)
+    if args.stack or args.outputs_file:
+        probes = probes_from_outputs(load_outputs(args.stack, args.region, args.outputs_file)) + probes
+    if not probes:
+        parser.error("nothing to probe, pass --stack, --outputs-file or --target")
+
+    report = asyncio.run(run_probes(probes, concurrency=args.concurrency, timeout=args.timeout, region=args.region))
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
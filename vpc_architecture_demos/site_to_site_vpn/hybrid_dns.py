@@ -0,0 +1,229 @@
+#pylint: disable-all
+
+from aws_cdk import (
+    Stack,
+    CfnTag,
+    aws_ec2 as ec2,
+    aws_route53 as route53,
+    aws_route53resolver as route53resolver,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.site_to_site_vpn import cidr_config
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+from vpc_architecture_demos.site_to_site_vpn.prefix_lists import NetworkPrefixLists
+
+AWS_FORWARDED_SERVICES = ["ssm", "ssmmessages", "ec2messages"]
+"""
+The interface endpoint services whose names on-prem can forward to the AWS network.
+
+:type: list
+"""
+
+
+class HybridDns(Construct):
+    """
+    Connects name resolution between the AWS private network and the on-prem network
+    with Route 53 Resolver endpoints, so that queries cross the VPN to the resolver
+    that owns the name instead of going out to public DNS.
+
+    Each network gets an inbound endpoint with one fixed address per private subnet
+    and an outbound endpoint spread over the same subnets. The AWS network forwards
+    the on-prem domain to the on-prem inbound addresses. The on-prem network can also
+    forward the names of AWS interface endpoints to the AWS inbound addresses, so
+    private endpoint traffic resolves to the endpoint ENIs behind the VPN.
+
+    The forwarding rules take precedence over the on-prem VPC's own endpoints, and
+    the routers are set up through Session Manager before the VPN exists, so only
+    forward ``aws_services`` once the VPN or Connect path is up.
+
+    The on-prem DNS servers are simulated by a private hosted zone for the on-prem
+    domain associated with the on-prem VPC.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param aws_network: The AWS private network.
+    :type aws_network: AWSPrivateNetwork
+    :param onprem_network: The on-prem network.
+    :type onprem_network: OnPremNetwork
+    :param onprem_domain: The DNS domain of the on-prem network.
+    :type onprem_domain: str
+    :param aws_services: The interface endpoint services to forward from on-prem to AWS,
+        e.g. :data:`AWS_FORWARDED_SERVICES`. None are forwarded if None.
+    :type aws_services: list
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        aws_network: AWSPrivateNetwork,
+        onprem_network: OnPremNetwork,
+        onprem_domain: str = cidr_config.ONPREM_DOMAIN,
+        aws_services: list = None,
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        region = Stack.of(self).region
+        aws_inbound_ips = [cidr_config.resolver_address(cidr) for cidr in aws_network.private_subnet_cidrs]
+
+        self._aws_resolver_security_group = self._resolver_security_group(
+            id="AWSResolverSecurityGroup",
+            name="aws-private-network-resolver-sg",
+            vpc_id=aws_network.vpc_id,
+            prefix_lists=aws_network.prefix_lists
+        )
+
+        self._aws_inbound_endpoint = route53resolver.CfnResolverEndpoint(
+            scope=self,
+            id="AWSInboundEndpoint",
+            name="aws-private-network-inbound",
+            direction="INBOUND",
+            security_group_ids=[self._aws_resolver_security_group.attr_group_id],
+            ip_addresses=[
+                route53resolver.CfnResolverEndpoint.IpAddressRequestProperty(subnet_id=subnet_id, ip=ip)
+                for subnet_id, ip in zip(aws_network.private_subnet_ids, aws_inbound_ips)
+            ]
+        )
+
+        self._aws_outbound_endpoint = route53resolver.CfnResolverEndpoint(
+            scope=self,
+            id="AWSOutboundEndpoint",
+            name="aws-private-network-outbound",
+            direction="OUTBOUND",
+            security_group_ids=[self._aws_resolver_security_group.attr_group_id],
+            ip_addresses=[
+                route53resolver.CfnResolverEndpoint.IpAddressRequestProperty(subnet_id=subnet_id)
+                for subnet_id in aws_network.private_subnet_ids
+            ]
+        )
+
+        self._onprem_resolver_security_group = self._resolver_security_group(
+            id="OnPremResolverSecurityGroup",
+            name="onprem-network-resolver-sg",
+            vpc_id=onprem_network.vpc_id,
+            prefix_lists=aws_network.prefix_lists
+        )
+
+        self._onprem_inbound_endpoint = route53resolver.CfnResolverEndpoint(
+            scope=self,
+            id="OnPremInboundEndpoint",
+            name="onprem-network-inbound",
+            direction="INBOUND",
+            security_group_ids=[self._onprem_resolver_security_group.attr_group_id],
+            ip_addresses=[
+                route53resolver.CfnResolverEndpoint.IpAddressRequestProperty(subnet_id=subnet_id, ip=ip)
+                for subnet_id, ip in zip(onprem_network.private_subnet_ids, cidr_config.ONPREM_RESOLVER_INBOUND_IPS)
+            ]
+        )
+
+        self._onprem_outbound_endpoint = route53resolver.CfnResolverEndpoint(
+            scope=self,
+            id="OnPremOutboundEndpoint",
+            name="onprem-network-outbound",
+            direction="OUTBOUND",
+            security_group_ids=[self._onprem_resolver_security_group.attr_group_id],
+            ip_addresses=[
+                route53resolver.CfnResolverEndpoint.IpAddressRequestProperty(subnet_id=subnet_id)
+                for subnet_id in onprem_network.private_subnet_ids
+            ]
+        )
+
+        # the zone stands in for the authoritative on-prem DNS servers
+        self._onprem_hosted_zone = route53.CfnHostedZone(
+            scope=self,
+            id="OnPremHostedZone",
+            name=onprem_domain,
+            vpcs=[route53.CfnHostedZone.VPCProperty(vpc_id=onprem_network.vpc_id, vpc_region=region)]
+        )
+
+        for host_name, private_ip in onprem_network.server_private_ips.items():
+            route53.CfnRecordSet(
+                scope=self,
+                id=f"OnPremRecord-{host_name}",
+                hosted_zone_id=self._onprem_hosted_zone.attr_id,
+                name=f"{host_name}.{onprem_domain}",
+                type="A",
+                ttl="300",
+                resource_records=[private_ip]
+            )
+
+        self._onprem_domain_rule = route53resolver.CfnResolverRule(
+            scope=self,
+            id="OnPremDomainForwardingRule",
+            name="forward-onprem-domain",
+            domain_name=onprem_domain,
+            rule_type="FORWARD",
+            resolver_endpoint_id=self._aws_outbound_endpoint.attr_resolver_endpoint_id,
+            target_ips=[
+                route53resolver.CfnResolverRule.TargetAddressProperty(ip=ip, port="53")
+                for ip in cidr_config.ONPREM_RESOLVER_INBOUND_IPS
+            ],
+            tags=[CfnTag(
+                key="Name",
+                value="forward-onprem-domain"
+            )]
+        )
+
+        route53resolver.CfnResolverRuleAssociation(
+            scope=self,
+            id="OnPremDomainForwardingRuleAssoc",
+            resolver_rule_id=self._onprem_domain_rule.attr_resolver_rule_id,
+            vpc_id=aws_network.vpc_id
+        )
+
+        for service in aws_services or []:
+            rule = route53resolver.CfnResolverRule(
+                scope=self,
+                id=f"AWSForwardingRule-{service}",
+                name=f"forward-aws-{service}",
+                domain_name=f"{service}.{region}.amazonaws.com",
+                rule_type="FORWARD",
+                resolver_endpoint_id=self._onprem_outbound_endpoint.attr_resolver_endpoint_id,
+                target_ips=[
+                    route53resolver.CfnResolverRule.TargetAddressProperty(ip=ip, port="53")
+                    for ip in aws_inbound_ips
+                ],
+                tags=[CfnTag(
+                    key="Name",
+                    value=f"forward-aws-{service}"
+                )]
+            )
+
+            route53resolver.CfnResolverRuleAssociation(
+                scope=self,
+                id=f"AWSForwardingRuleAssoc-{service}",
+                resolver_rule_id=rule.attr_resolver_rule_id,
+                vpc_id=onprem_network.vpc_id
+            )
+
+    def _resolver_security_group(self, id: str, name: str, vpc_id: str, prefix_lists: NetworkPrefixLists) -> ec2.CfnSecurityGroup:
+        """
+        Creates a security group that allows DNS from both networks.
+        """
+        return ec2.CfnSecurityGroup(
+            scope=self,
+            id=id,
+            group_description="Route 53 Resolver endpoints",
+            group_name=name,
+            vpc_id=vpc_id,
+            security_group_ingress=[
+                ec2.CfnSecurityGroup.IngressProperty(
+                    description=f"Allow DNS {protocol.upper()} from {source}",
+                    ip_protocol=protocol,
+                    from_port=53,
+                    to_port=53,
+                    source_prefix_list_id=prefix_list_id
+                )
+                for protocol in ("udp", "tcp")
+                for source, prefix_list_id in (
+                    ("AWS", prefix_lists.aws_prefix_list_id),
+                    ("ONPREM", prefix_lists.onprem_prefix_list_id)
+                )
+            ]
+        )
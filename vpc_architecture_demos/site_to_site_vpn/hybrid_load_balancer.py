@@ -0,0 +1,157 @@
+#pylint: disable-all
+from aws_cdk import (
+    CfnOutput,
+    CfnTag,
+    Duration,
+    aws_elasticloadbalancingv2 as elbv2,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+
+DEFAULT_PORT = 80
+"""
+The default TCP port of the listener and the servers.
+
+:type: int
+"""
+
+class HybridLoadBalancer(Construct):
+    """
+    Creates an internal Network Load Balancer in the AWS private network that spreads
+    connections from AWS clients over the on-prem servers.
+
+    The servers are IP targets outside the VPC and reached through the transit gateway,
+    so they are registered for all availability zones. The load balancer checks them
+    over the same path, takes unhealthy servers out of rotation, and drains the
+    connections of deregistered servers for ``deregistration_delay``. Clients connect
+    to one DNS name and need no failover logic of their own.
+
+    The on-prem servers must listen on ``port``, see ``OnPremNetwork(server_port=...)``;
+    they accept traffic from the AWS network, which includes the load balancer's
+    addresses.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param aws_network: The AWS private network.
+    :type aws_network: AWSPrivateNetwork
+    :param onprem_network: The on-prem network.
+    :type onprem_network: OnPremNetwork
+    :param port: The TCP port of the listener and the servers.
+    :type port: int
+    :param cross_zone: Whether each load balancer node spreads connections over the
+        targets of all availability zones.
+    :type cross_zone: bool
+    :param deregistration_delay: How long connections to a deregistered server may finish.
+    :type deregistration_delay: Duration
+    :param health_check_interval: The time between health checks of a server.
+    :type health_check_interval: Duration
+    :param health_check_threshold: The health checks in a row that mark a server healthy or unhealthy.
+    :type health_check_threshold: int
+    """
+
+    @property
+    def dns_name(self) -> str:
+        """
+        The DNS name of the load balancer.
+        """
+        return self._load_balancer.attr_dns_name
+
+    @property
+    def target_group_arn(self) -> str:
+        """
+        The ARN of the target group of the on-prem servers.
+        """
+        return self._target_group.ref
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        aws_network: AWSPrivateNetwork,
+        onprem_network: OnPremNetwork,
+        port: int = DEFAULT_PORT,
+        cross_zone: bool = True,
+        deregistration_delay: Duration = Duration.seconds(30),
+        health_check_interval: Duration = Duration.seconds(10),
+        health_check_threshold: int = 2,
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        if not 2 <= health_check_threshold <= 10:
+            raise ValueError(f"the health check threshold must be 2 to 10, got {health_check_threshold}")
+
+        self._load_balancer = elbv2.CfnLoadBalancer(
+            scope=self,
+            id="HybridNLB",
+            name="hybrid-onprem-servers",
+            type="network",
+            scheme="internal",
+            subnets=aws_network.private_subnet_ids,
+            load_balancer_attributes=[elbv2.CfnLoadBalancer.LoadBalancerAttributeProperty(
+                key="load_balancing.cross_zone.enabled",
+                value=str(cross_zone).lower()
+            )],
+            tags=[CfnTag(
+                key="Name",
+                value="hybrid-onprem-servers-nlb"
+            )]
+        )
+
+        self._target_group = elbv2.CfnTargetGroup(
+            scope=self,
+            id="HybridOnPremTargetGroup",
+            target_type="ip",
+            protocol="TCP",
+            port=port,
+            vpc_id=aws_network.vpc_id,
+            # targets outside the VPC are not in any of its availability zones
+            targets=[
+                elbv2.CfnTargetGroup.TargetDescriptionProperty(id=address, port=port, availability_zone="all")
+                for _, address in sorted(onprem_network.server_private_ips.items())
+            ],
+            health_check_enabled=True,
+            health_check_protocol="TCP",
+            health_check_interval_seconds=health_check_interval.to_seconds(),
+            healthy_threshold_count=health_check_threshold,
+            unhealthy_threshold_count=health_check_threshold,
+            target_group_attributes=[
+                elbv2.CfnTargetGroup.TargetGroupAttributeProperty(
+                    key="deregistration_delay.timeout_seconds",
+                    value=str(deregistration_delay.to_seconds())
+                ),
+                # close connections of unhealthy servers so clients reconnect to a healthy one
+                elbv2.CfnTargetGroup.TargetGroupAttributeProperty(
+                    key="target_health_state.unhealthy.connection_termination.enabled",
+                    value="true"
+                ),
+            ],
+            tags=[CfnTag(
+                key="Name",
+                value="hybrid-onprem-servers-tg"
+            )]
+        )
+
+        elbv2.CfnListener(
+            scope=self,
+            id="HybridNLBListener",
+            load_balancer_arn=self._load_balancer.ref,
+            protocol="TCP",
+            port=port,
+            default_actions=[elbv2.CfnListener.ActionProperty(
+                type="forward",
+                target_group_arn=self._target_group.ref
+            )]
+        )
+
+        CfnOutput(
+            scope=self,
+            id="HybridNLBDnsName",
+            description="DNS name of the load balancer in front of the on-prem servers",
+            value=self._load_balancer.attr_dns_name
+        )
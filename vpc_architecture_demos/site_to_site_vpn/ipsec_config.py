@@ -0,0 +1,406 @@
+#pylint: disable-all
+"""
+Renders the IPsec tunnel options of the VPN connections and the matching strongSwan
+configuration of the on-prem routers.
+
+Each router gets a VPN connection with two tunnels. Both ends use IKEv2 only,
+AES-GCM, which encrypts and authenticates in one pass and is several times faster
+per core than AES-CBC with HMAC, and one elliptic curve DH group for both phases.
+With the ``start`` startup action AWS initiates the tunnels as soon as the
+connection exists and the router only responds, so the first packet after a deploy
+does not wait for a negotiation; with ``add`` the router initiates instead.
+
+The tunnel inside CIDR blocks are fixed, so the VTI addresses and the BGP neighbors
+are known at synth time. The outside addresses and pre-shared keys are only known
+once AWS created the connections, so the routers get templates and a
+``configure-vpn.sh`` script that fills them in from ``DescribeVpnConnections``;
+run it with ``sudo`` after the deployment instead of editing the downloaded
+configuration.
+"""
+import ipaddress
+from collections import namedtuple
+
+TunnelOptions = namedtuple("TunnelOptions", [
+    "ike_version",
+    "phase1_encryption",
+    "phase1_integrity",
+    "phase2_encryption",
+    "phase2_integrity",
+    "dh_group",
+    "phase1_lifetime",
+    "phase2_lifetime",
+    "rekey_margin",
+    "rekey_fuzz",
+    "dpd_timeout",
+    "dpd_timeout_action",
+    "startup_action",
+])
+"""
+The options of a VPN tunnel, with the algorithm names of the VPN API and lifetimes,
+margins and timeouts in seconds.
+"""
+
+DEFAULT_TUNNEL_OPTIONS = TunnelOptions(
+    ike_version="ikev2",
+    phase1_encryption="AES256-GCM-16",
+    phase1_integrity="SHA2-256",
+    phase2_encryption="AES256-GCM-16",
+    phase2_integrity="SHA2-256",
+    dh_group=20,
+    phase1_lifetime=28800,
+    phase2_lifetime=3600,
+    rekey_margin=540,
+    rekey_fuzz=100,
+    dpd_timeout=30,
+    dpd_timeout_action="restart",
+    startup_action="start",
+)
+"""
+The tunnel options of the demo: IKEv2, AES-256-GCM and ECP-384 in both phases, the
+AWS default lifetimes and rekey timing, and tunnels that AWS starts and restarts.
+
+:type: TunnelOptions
+"""
+
+TUNNEL_INSIDE_CIDRS = [
+    ["169.254.10.0/30", "169.254.10.4/30"],
+    ["169.254.11.0/30", "169.254.11.4/30"],
+]
+"""
+The inside CIDR blocks of the tunnels of routers A and B. AWS takes the first host
+address of each block and the router the second.
+
+:type: list
+"""
+
+VPN_CONNECTION_NAMES = ["onprem-router-A-vpn", "onprem-router-B-vpn"]
+"""
+The ``Name`` tags of the VPN connections of routers A and B, which the routers look
+their connection up by.
+
+:type: list
+"""
+
+VPN_ASSETS_DIR = "/home/ubuntu/demo_assets/aws-vpn"
+
+VTI_MTU = 1436
+"""
+The MTU of the VTI interfaces, the largest packet that fits into an AES-GCM ESP
+tunnel over a 1500 byte path.
+
+:type: int
+"""
+
+TCP_MSS = 1379
+"""
+The MSS that TCP SYNs forwarded into a tunnel are clamped to, so that hosts without
+path MTU discovery do not send segments the VTI has to drop.
+
+:type: int
+"""
+
+ENCRYPTION_ALGORITHMS = {
+    "AES128": "aes128",
+    "AES256": "aes256",
+    "AES128-GCM-16": "aes128gcm16",
+    "AES256-GCM-16": "aes256gcm16",
+}
+INTEGRITY_ALGORITHMS = {
+    "SHA1": "sha1",
+    "SHA2-256": "sha256",
+    "SHA2-384": "sha384",
+    "SHA2-512": "sha512",
+}
+DH_GROUPS = {
+    2: "modp1024",
+    5: "modp1536",
+    14: "modp2048",
+    15: "modp3072",
+    16: "modp4096",
+    17: "modp6144",
+    18: "modp8192",
+    19: "ecp256",
+    20: "ecp384",
+    21: "ecp521",
+    22: "modp1024s160",
+    23: "modp2048s224",
+    24: "modp2048s256",
+}
+DPD_TIMEOUT_ACTIONS = {"clear", "none", "restart"}
+STARTUP_ACTIONS = {"add", "start"}
+
+
+def validate(options: TunnelOptions) -> None:
+    """
+    Raises a ``ValueError`` if AWS or strongSwan would reject the tunnel options.
+
+    :param options: The tunnel options.
+    :type options: TunnelOptions
+    """
+    if options.ike_version not in ("ikev1", "ikev2"):
+        raise ValueError(f"unknown IKE version {options.ike_version}")
+    for algorithm in (options.phase1_encryption, options.phase2_encryption):
+        if algorithm not in ENCRYPTION_ALGORITHMS:
+            raise ValueError(f"unknown encryption algorithm {algorithm}")
+    for algorithm in (options.phase1_integrity, options.phase2_integrity):
+        if algorithm not in INTEGRITY_ALGORITHMS:
+            raise ValueError(f"unknown integrity algorithm {algorithm}")
+    if options.dh_group not in DH_GROUPS:
+        raise ValueError(f"unknown DH group {options.dh_group}")
+    if not 900 <= options.phase2_lifetime <= 3600 or not 900 <= options.phase1_lifetime <= 28800:
+        raise ValueError("the phase 1 lifetime must be 900 to 28800 seconds and the phase 2 lifetime 900 to 3600")
+    if not 60 <= options.rekey_margin <= options.phase2_lifetime // 2:
+        raise ValueError(f"the rekey margin must be 60 seconds to half the phase 2 lifetime, got {options.rekey_margin}")
+    if not 0 <= options.rekey_fuzz <= 100:
+        raise ValueError(f"the rekey fuzz must be 0 to 100 percent, got {options.rekey_fuzz}")
+    if options.dpd_timeout < 30:
+        raise ValueError(f"the DPD timeout must be at least 30 seconds, got {options.dpd_timeout}")
+    if options.dpd_timeout_action not in DPD_TIMEOUT_ACTIONS:
+        raise ValueError(f"unknown DPD timeout action {options.dpd_timeout_action}")
+    if options.startup_action not in STARTUP_ACTIONS:
+        raise ValueError(f"unknown startup action {options.startup_action}")
+
+
+def inside_addresses(inside_cidr: str) -> tuple:
+    """
+    Returns the AWS and the router inside address of a tunnel.
+
+    :param inside_cidr: A /30 tunnel inside CIDR block.
+    :type inside_cidr: str
+    :rtype: tuple
+    """
+    network = ipaddress.ip_network(inside_cidr)
+    if network.version != 4 or network.prefixlen != 30 or not network.subnet_of(ipaddress.ip_network("169.254.0.0/16")):
+        raise ValueError(f"the inside CIDR block of a tunnel must be a /30 in 169.254.0.0/16, got {inside_cidr}")
+    aws_address, router_address = network.hosts()
+    return str(aws_address), str(router_address)
+
+
+def tunnel_options_specification(options: TunnelOptions, inside_cidr: str) -> dict:
+    """
+    Returns a CloudFormation ``VpnTunnelOptionsSpecification`` for a tunnel.
+
+    :param options: The tunnel options.
+    :type options: TunnelOptions
+    :param inside_cidr: The tunnel inside CIDR block.
+    :type inside_cidr: str
+    :rtype: dict
+    """
+    validate(options)
+    inside_addresses(inside_cidr)
+    return {
+        "TunnelInsideCidr": inside_cidr,
+        "IKEVersions": [{"Value": options.ike_version}],
+        "Phase1EncryptionAlgorithms": [{"Value": options.phase1_encryption}],
+        "Phase1IntegrityAlgorithms": [{"Value": options.phase1_integrity}],
+        "Phase1DHGroupNumbers": [{"Value": options.dh_group}],
+        "Phase1LifetimeSeconds": options.phase1_lifetime,
+        "Phase2EncryptionAlgorithms": [{"Value": options.phase2_encryption}],
+        "Phase2IntegrityAlgorithms": [{"Value": options.phase2_integrity}],
+        "Phase2DHGroupNumbers": [{"Value": options.dh_group}],
+        "Phase2LifetimeSeconds": options.phase2_lifetime,
+        "RekeyMarginTimeSeconds": options.rekey_margin,
+        "RekeyFuzzPercentage": options.rekey_fuzz,
+        "DPDTimeoutSeconds": options.dpd_timeout,
+        "DPDTimeoutAction": options.dpd_timeout_action,
+        "StartupAction": options.startup_action,
+    }
+
+
+def proposals(options: TunnelOptions) -> tuple:
+    """
+    Returns the strongSwan ``ike`` and ``esp`` proposals that match the tunnel options.
+    GCM needs no separate integrity algorithm, so the IKE integrity algorithm only
+    serves as the PRF and ESP proposals have none.
+
+    :param options: The tunnel options.
+    :type options: TunnelOptions
+    :rtype: tuple
+    """
+    dh_group = DH_GROUPS[options.dh_group]
+    phase1_encryption = ENCRYPTION_ALGORITHMS[options.phase1_encryption]
+    phase1_integrity = INTEGRITY_ALGORITHMS[options.phase1_integrity]
+    phase2_encryption = ENCRYPTION_ALGORITHMS[options.phase2_encryption]
+    if "gcm" in phase1_encryption:
+        ike = f"{phase1_encryption}-prf{phase1_integrity}-{dh_group}!"
+    else:
+        ike = f"{phase1_encryption}-{phase1_integrity}-{dh_group}!"
+    if "gcm" in phase2_encryption:
+        esp = f"{phase2_encryption}-{dh_group}!"
+    else:
+        esp = f"{phase2_encryption}-{INTEGRITY_ALGORITHMS[options.phase2_integrity]}-{dh_group}!"
+    return ike, esp
+
+
+def render_ipsec_conf(options: TunnelOptions, inside_cidrs: list) -> str:
+    """
+    Renders a router's ``ipsec.conf`` with one route-based connection per tunnel. The
+    ``%ROUTER_PUBLIC_IP%`` and ``%TUNNEL<n>_OUTSIDE_IP%`` placeholders are filled in by
+    ``configure-vpn.sh``.
+
+    :param options: The tunnel options.
+    :type options: TunnelOptions
+    :param inside_cidrs: The inside CIDR blocks of the router's tunnels.
+    :type inside_cidrs: list
+    :rtype: str
+    """
+    validate(options)
+    ike, esp = proposals(options)
+    lines = [
+        "config setup",
+        "    uniqueids=yes",
+        "",
+        "conn %default",
+        f"    keyexchange={options.ike_version}",
+        f"    ike={ike}",
+        f"    esp={esp}",
+        f"    ikelifetime={options.phase1_lifetime}s",
+        f"    lifetime={options.phase2_lifetime}s",
+        f"    margintime={options.rekey_margin}s",
+        f"    rekeyfuzz={options.rekey_fuzz}%",
+        "    keyingtries=%forever",
+        "    dpddelay=10s",
+        f"    dpdtimeout={options.dpd_timeout}s",
+        f"    dpdaction={options.dpd_timeout_action}",
+        # the router only responds when AWS starts the tunnels
+        f"    auto={'add' if options.startup_action == 'start' else 'start'}",
+        "    type=tunnel",
+        "    authby=secret",
+        "    left=%defaultroute",
+        "    leftid=%ROUTER_PUBLIC_IP%",
+        "    leftsubnet=0.0.0.0/0",
+        "    rightsubnet=0.0.0.0/0",
+        f"    leftupdown={VPN_ASSETS_DIR}/ipsec-vti.sh",
+    ]
+    for index, inside_cidr in enumerate(inside_cidrs):
+        inside_addresses(inside_cidr)
+        lines += [
+            "",
+            f"conn Tunnel{index + 1}",
+            f"    right=%TUNNEL{index + 1}_OUTSIDE_IP%",
+            f"    mark={100 * (index + 1)}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def render_ipsec_secrets(tunnel_count: int) -> str:
+    """
+    Renders a router's ``ipsec.secrets`` with the ``%TUNNEL<n>_PSK%`` placeholders.
+
+    :param tunnel_count: The number of tunnels.
+    :type tunnel_count: int
+    :rtype: str
+    """
+    return "".join(
+        f"%ROUTER_PUBLIC_IP% %TUNNEL{number}_OUTSIDE_IP% : PSK \"%TUNNEL{number}_PSK%\"\n"
+        for number in range(1, tunnel_count + 1)
+    )
+
+
+def render_vti_updown(inside_cidrs: list) -> str:
+    """
+    Renders the strongSwan updown script that creates a VTI interface per tunnel, keyed
+    by the connection's mark, with the router's inside address, and clamps the MSS of
+    TCP connections forwarded into it.
+
+    :param inside_cidrs: The inside CIDR blocks of the router's tunnels.
+    :type inside_cidrs: list
+    :rtype: str
+    """
+    lines = [
+        "#!/bin/bash",
+        "MARK=${PLUTO_MARK_OUT%%/*}",
+        "VTI=vti$MARK",
+        "case $MARK in",
+    ]
+    for index, inside_cidr in enumerate(inside_cidrs):
+        _, router_address = inside_addresses(inside_cidr)
+        prefixlen = ipaddress.ip_network(inside_cidr).prefixlen
+        lines.append(f"    {100 * (index + 1)}) INSIDE={router_address}/{prefixlen} ;;")
+    lines += [
+        "esac",
+        "case $PLUTO_VERB in",
+        "    up-client)",
+        "        ip link add $VTI type vti local $PLUTO_ME remote $PLUTO_PEER okey $MARK ikey $MARK",
+        "        sysctl -qw net.ipv4.conf.$VTI.disable_policy=1 net.ipv4.conf.$VTI.rp_filter=2",
+        "        ip addr add $INSIDE dev $VTI",
+        f"        ip link set $VTI up mtu {VTI_MTU}",
+        f"        iptables -t mangle -A FORWARD -o $VTI -p tcp --tcp-flags SYN,RST SYN -j TCPMSS --set-mss {TCP_MSS}",
+        "        ;;",
+        "    down-client)",
+        f"        iptables -t mangle -D FORWARD -o $VTI -p tcp --tcp-flags SYN,RST SYN -j TCPMSS --set-mss {TCP_MSS}",
+        "        ip link del $VTI",
+        "        ;;",
+        "esac",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_configure_script(vpn_connection_name: str, inside_cidrs: list) -> str:
+    """
+    Renders ``configure-vpn.sh``, which looks up the router's VPN connection by its name,
+    fills in the templates, installs them and restarts strongSwan.
+
+    :param vpn_connection_name: The ``Name`` tag of the router's VPN connection.
+    :type vpn_connection_name: str
+    :param inside_cidrs: The inside CIDR blocks of the router's tunnels.
+    :type inside_cidrs: list
+    :rtype: str
+    """
+    lines = [
+        "#!/bin/bash",
+        "set -euo pipefail",
+        f"cd {VPN_ASSETS_DIR}",
+        "TOKEN=$(curl -sX PUT http://169.254.169.254/latest/api/token -H 'X-aws-ec2-metadata-token-ttl-seconds: 60')",
+        "ROUTER_PUBLIC_IP=$(curl -s -H \"X-aws-ec2-metadata-token: $TOKEN\" http://169.254.169.254/latest/meta-data/public-ipv4)",
+        "REGION=$(curl -s -H \"X-aws-ec2-metadata-token: $TOKEN\" http://169.254.169.254/latest/meta-data/placement/region)",
+        "tunnel() {",
+        "    aws ec2 describe-vpn-connections --region $REGION --output text \\",
+        f"        --filters Name=tag:Name,Values={vpn_connection_name} Name=state,Values=pending,available \\",
+        "        --query \"VpnConnections[0].Options.TunnelOptions[?TunnelInsideCidr=='$1'].$2 | [0]\"",
+        "}",
+        "sed \"s|%ROUTER_PUBLIC_IP%|$ROUTER_PUBLIC_IP|g\" ipsec.conf.tmpl > ipsec.conf",
+        "sed \"s|%ROUTER_PUBLIC_IP%|$ROUTER_PUBLIC_IP|g\" ipsec.secrets.tmpl > ipsec.secrets",
+    ]
+    for index, inside_cidr in enumerate(inside_cidrs):
+        number = index + 1
+        lines += [
+            f"OUTSIDE_IP=$(tunnel {inside_cidr} OutsideIpAddress)",
+            f"PSK=$(tunnel {inside_cidr} PreSharedKey)",
+            f"sed -i \"s|%TUNNEL{number}_OUTSIDE_IP%|$OUTSIDE_IP|g\" ipsec.conf ipsec.secrets",
+            f"sed -i \"s|%TUNNEL{number}_PSK%|$PSK|g\" ipsec.secrets",
+        ]
+    lines += [
+        "install -m 644 ipsec.conf /etc/ipsec.conf",
+        "install -m 600 ipsec.secrets /etc/ipsec.secrets",
+        "ipsec restart",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def install_commands(options: TunnelOptions, inside_cidrs: list, vpn_connection_name: str) -> list:
+    """
+    Returns the shell commands that write a router's strongSwan templates and
+    ``configure-vpn.sh``.
+
+    :param options: The tunnel options.
+    :type options: TunnelOptions
+    :param inside_cidrs: The inside CIDR blocks of the router's tunnels.
+    :type inside_cidrs: list
+    :param vpn_connection_name: The ``Name`` tag of the router's VPN connection.
+    :type vpn_connection_name: str
+    :rtype: list
+    """
+    files = [
+        ("ipsec.conf.tmpl", render_ipsec_conf(options, inside_cidrs)),
+        ("ipsec.secrets.tmpl", render_ipsec_secrets(len(inside_cidrs))),
+        ("ipsec-vti.sh", render_vti_updown(inside_cidrs)),
+        ("configure-vpn.sh", render_configure_script(vpn_connection_name, inside_cidrs)),
+    ]
+    commands = ["apt-get install -y awscli", f"mkdir -p {VPN_ASSETS_DIR}"]
+    commands += [f"cat > {VPN_ASSETS_DIR}/{name} <<'EOF'\n{contents}EOF" for name, contents in files]
+    commands += [
+        f"chmod 755 {VPN_ASSETS_DIR}/ipsec-vti.sh {VPN_ASSETS_DIR}/configure-vpn.sh",
+        f"chown ubuntu:ubuntu {VPN_ASSETS_DIR} -R",
+    ]
+    return commands
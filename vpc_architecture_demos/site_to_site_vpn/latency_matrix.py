@@ -0,0 +1,122 @@
+#pylint: disable-all
+"""
+Collects the inter-region latency matrix and ranks VPN termination regions for an on-prem site.
+
+Each region running :class:`~vpc_architecture_demos.site_to_site_vpn.latency_probe.InterRegionLatencyProbe`
+publishes its row of the matrix as an SSM parameter. Given the RTT from an on-prem
+site to each candidate region, the best region to terminate the site's VPN in is the
+one with the lowest RTT from the site plus the mean RTT onwards to the regions the
+site talks to, since that traffic continues over the transit gateway peerings::
+
+    $ python -m vpc_architecture_demos.site_to_site_vpn.latency_matrix \\
+        --region us-east-1 --region eu-west-1 --site-rtt us-east-1=95 --site-rtt eu-west-1=20
+
+Collecting requires ``boto3``.
+"""
+import argparse
+import json
+
+LATENCY_PARAMETER_PREFIX = "/hybrid-network/latency"
+"""
+The SSM parameter path under which each region publishes its row of the latency matrix.
+
+:type: str
+"""
+
+
+def collect_rows(regions: list, session=None) -> list:
+    """
+    Reads the latency matrix rows published in the given regions. Regions without a row are skipped.
+
+    :param regions: The regions to read.
+    :type regions: list
+    :param session: An optional ``boto3.Session``.
+    :rtype: list
+    """
+    if session is None:
+        import boto3
+        session = boto3.Session()
+
+    rows = []
+    for region in regions:
+        client = session.client("ssm", region_name=region)
+        try:
+            value = client.get_parameter(Name=f"{LATENCY_PARAMETER_PREFIX}/{region}")["Parameter"]["Value"]
+        except client.exceptions.ParameterNotFound:
+            continue
+        rows.append(json.loads(value))
+    return rows
+
+
+def build_matrix(rows: list) -> dict:
+    """
+    Builds ``matrix[source][destination]`` in milliseconds from published rows.
+
+    A region's RTT to itself is 0. Pairs measured in one direction only are assumed
+    to be symmetric; pairs measured in both directions keep both values.
+
+    :param rows: Rows as published by the probe.
+    :type rows: list
+    :rtype: dict
+    """
+    matrix = {}
+    for row in rows:
+        matrix.setdefault(row["source"], {}).update(row["rtt_ms"])
+    for source in list(matrix):
+        for destination, rtt in list(matrix[source].items()):
+            matrix.setdefault(destination, {}).setdefault(source, rtt)
+    for region in matrix:
+        matrix[region][region] = 0.0
+    return matrix
+
+
+def rank_regions(site_rtts: dict, matrix: dict, targets: list = None) -> list:
+    """
+    Ranks candidate VPN termination regions for a site, best first.
+
+    :param site_rtts: The RTT from the site to each candidate region in milliseconds.
+    :type site_rtts: dict
+    :param matrix: The matrix from :func:`build_matrix`.
+    :type matrix: dict
+    :param targets: The regions the site talks to. Defaults to all regions in the matrix.
+    :type targets: list
+    :return: ``(region, score)`` tuples, where the score is the expected RTT in milliseconds.
+    :rtype: list
+    """
+    targets = targets or sorted(matrix)
+    ranking = []
+    for region, site_rtt in site_rtts.items():
+        onward = [matrix.get(region, {}).get(target) for target in targets]
+        if any(rtt is None for rtt in onward):
+            continue
+        ranking.append((region, site_rtt + sum(onward) / len(onward)))
+    return sorted(ranking, key=lambda item: (item[1], item[0]))
+
+
+def _site_rtt(value: str):
+    region, rtt = value.split("=", 1)
+    return region, float(rtt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the inter-region latency matrix and rank VPN termination regions.")
+    parser.add_argument("--region", action="append", required=True, help="region to read, can be repeated")
+    parser.add_argument(
+        "--site-rtt", action="append", type=_site_rtt, default=[], metavar="REGION=MS",
+        help="RTT from the on-prem site to a candidate region, can be repeated"
+    )
+    parser.add_argument("--target", action="append", help="region the site talks to, can be repeated")
+    args = parser.parse_args(argv)
+
+    matrix = build_matrix(collect_rows(args.region))
+    report = {"matrix_ms": matrix}
+    if args.site_rtt:
+        report["ranking"] = [
+            {"region": region, "expected_rtt_ms": round(score, 2)}
+            for region, score in rank_regions(dict(args.site_rtt), matrix, args.target)
+        ]
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#pylint: disable-all
+import os
+
+from aws_cdk import (
+    Duration,
+    Stack,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.site_to_site_vpn.latency_matrix import LATENCY_PARAMETER_PREFIX
+from vpc_architecture_demos.site_to_site_vpn.tgw_peering import FUNCTIONS_DIR
+
+METRIC_NAMESPACE = "HybridNetwork"
+"""
+The CloudWatch namespace of the ``InterRegionRtt`` metrics.
+
+:type: str
+"""
+
+
+class InterRegionLatencyProbe(Construct):
+    """
+    Deploys a scheduled function that measures the round-trip time from this region
+    to other regions and publishes it as metrics and as this region's row of the
+    latency matrix. ``python -m vpc_architecture_demos.site_to_site_vpn.latency_matrix``
+    combines the rows of all regions.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param regions: The regions to measure.
+    :type regions: list
+    :param schedule: How often to measure.
+    :type schedule: Duration
+    :param samples: The number of TCP handshakes per region and run.
+    :type samples: int
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        regions: list,
+        schedule: Duration = Duration.hours(1),
+        samples: int = 5,
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        stack = Stack.of(self)
+        parameter_name = f"{LATENCY_PARAMETER_PREFIX}/{stack.region}"
+
+        self._function = lambda_.Function(
+            scope=self,
+            id="LatencyProbeFunction",
+            runtime=lambda_.Runtime.PYTHON_3_9,
+            handler="index.handler",
+            code=lambda_.Code.from_asset(os.path.join(FUNCTIONS_DIR, "latency_probe")),
+            timeout=Duration.minutes(2),
+            environment={
+                "SOURCE_REGION": stack.region,
+                "DESTINATION_REGIONS": ",".join(sorted(set(regions))),
+                "PARAMETER_NAME": parameter_name,
+                "METRIC_NAMESPACE": METRIC_NAMESPACE,
+                "SAMPLES": str(samples),
+            },
+            initial_policy=[
+                iam.PolicyStatement(
+                    actions=["cloudwatch:PutMetricData"],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW,
+                    conditions={"StringEquals": {"cloudwatch:namespace": METRIC_NAMESPACE}}
+                ),
+                iam.PolicyStatement(
+                    actions=["ssm:PutParameter"],
+                    resources=[stack.format_arn(
+                        service="ssm",
+                        resource="parameter",
+                        resource_name=parameter_name.lstrip("/")
+                    )],
+                    effect=iam.Effect.ALLOW
+                ),
+            ]
+        )
+
+        events.Rule(
+            scope=self,
+            id="LatencyProbeSchedule",
+            schedule=events.Schedule.rate(schedule),
+            targets=[targets.LambdaFunction(self._function)]
+        )
@@ -0,0 +1,317 @@
+#pylint: disable-all
+
+from aws_cdk import (
+    Fn,
+    CfnTag,
+    aws_autoscaling as autoscaling,
+    aws_ec2 as ec2,
+    aws_iam as iam,
+    aws_ssm as ssm,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+
+DEFAULT_INSTANCE_TYPES = ["c5n.large", "c6in.large", "m5n.large"]
+"""
+The instance types the Spot fleets may use, network-optimized and not burstable
+so the generators are not the bottleneck.
+
+:type: list
+"""
+
+DEFAULT_FLEET_SIZE = 2
+"""
+The default number of load generator instances per side.
+
+:type: int
+"""
+
+DEFAULT_FLOWS = 8
+"""
+The default number of parallel flows per client and server.
+
+:type: int
+"""
+
+IPERF_BASE_PORT = 5201
+SIDE_TAG = "load-generator-side"
+LOG_DIR = "/var/log/load-generator"
+
+
+def render_commands() -> list:
+    """
+    Returns the shell script run by the load generator document, one line per entry.
+
+    Servers run one iperf3 daemon per port, since an iperf3 server handles one test
+    at a time, and serve a 1 MiB file over HTTP. Each client spreads its flows over
+    the servers. It starts at a port picked from its instance ID and moves on to the
+    next port whenever a daemon is busy with another client, so every client gets a
+    daemon of its own as long as there are as many ports as clients.
+
+    :rtype: list
+    """
+    return [
+        "set -u",
+        f"mkdir -p {LOG_DIR}",
+        "ACTION='{{ Action }}'; TOOL='{{ Tool }}'; FLOWS='{{ Flows }}'; DURATION='{{ Duration }}'",
+        "PROTOCOL='{{ Protocol }}'; BANDWIDTH='{{ Bandwidth }}'; PORTS='{{ ServerPorts }}'",
+        "case \"$ACTION\" in",
+        "server)",
+        "  pkill iperf3 || true",
+        f"  for i in $(seq 0 $((PORTS - 1))); do iperf3 --server --daemon --port $(({IPERF_BASE_PORT} + i)); done",
+        "  systemctl start httpd",
+        "  echo \"iperf3 listening on $PORTS ports, httpd on 80\"",
+        "  ;;",
+        "client)",
+        "  IFS=',' read -ra SERVERS <<< '{{ Servers }}'",
+        "  INDEX=$(cksum < /var/lib/cloud/data/instance-id | cut -d ' ' -f 1)",
+        "  UDP=''; if [ \"$PROTOCOL\" = udp ]; then UDP=\"--udp --bitrate $BANDWIDTH\"; fi",
+        "  run_iperf() {",
+        "    for ATTEMPT in $(seq 0 $((PORTS - 1))); do",
+        f"      PORT=$(({IPERF_BASE_PORT} + (INDEX + ATTEMPT) % PORTS))",
+        f"      iperf3 --client \"$1\" --port \"$PORT\" --parallel \"$FLOWS\" --time \"$DURATION\" $UDP > {LOG_DIR}/$1.log 2>&1",
+        f"      grep -q 'server is busy' {LOG_DIR}/$1.log || return 0",
+        "    done",
+        f"    echo \"all $PORTS iperf3 ports of $1 are busy\" >> {LOG_DIR}/$1.log",
+        "  }",
+        "  for SERVER in \"${SERVERS[@]}\"; do",
+        "    if [ \"$TOOL\" = http ]; then",
+        f"      ab -q -k -c \"$FLOWS\" -t \"$DURATION\" -n 100000000 \"http://$SERVER/load-generator.bin\" > {LOG_DIR}/$SERVER.log 2>&1 &",
+        "    else",
+        "      run_iperf \"$SERVER\" &",
+        "    fi",
+        "  done",
+        "  wait",
+        "  for SERVER in \"${SERVERS[@]}\"; do",
+        "    echo \"== $SERVER\"",
+        f"    grep -E 'SUM.*(sender|receiver)|Requests per second|Transfer rate|Failed requests' {LOG_DIR}/$SERVER.log || tail -n 5 {LOG_DIR}/$SERVER.log",
+        "  done",
+        "  ;;",
+        "stop)",
+        "  pkill iperf3 || true",
+        "  systemctl stop httpd",
+        "  ;;",
+        "esac",
+    ]
+
+
+class LoadGenerator(Construct):
+    """
+    Spot fleets on both sides of the hybrid network that generate traffic across it,
+    to find the saturation point of the routers, the tunnels and the transit gateway.
+
+    Each side gets an Auto Scaling group of Spot instances in its private subnets with
+    iperf3 and an HTTP server and client installed. The load is driven by the SSM
+    document :attr:`document_name`: run it with ``Action=server`` on one side, then
+    with ``Action=client`` and the servers' private addresses on the other, targeting
+    the instances by their ``load-generator-side`` tag (``aws`` or ``onprem``)::
+
+        $ aws ssm send-command --document-name <document> \\
+            --targets Key=tag:load-generator-side,Values=onprem --parameters Action=server
+        $ aws ssm send-command --document-name <document> \\
+            --targets Key=tag:load-generator-side,Values=aws \\
+            --parameters Action=client,Servers=192.168.10.25,192.168.11.40,Flows=16
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param aws_network: The AWS private network.
+    :type aws_network: AWSPrivateNetwork
+    :param onprem_network: The on-prem network.
+    :type onprem_network: OnPremNetwork
+    :param fleet_size: The number of instances per side.
+    :type fleet_size: int
+    :param flows: The default number of parallel flows per client and server.
+    :type flows: int
+    :param instance_types: The instance types the Spot fleets may use.
+    :type instance_types: list
+    """
+
+    @property
+    def document_name(self) -> str:
+        """
+        The name of the SSM document that drives the load.
+        """
+        return self._document.ref
+
+    @property
+    def aws_group_name(self) -> str:
+        """
+        The name of the Auto Scaling group in the AWS network.
+        """
+        return self._aws_group.ref
+
+    @property
+    def onprem_group_name(self) -> str:
+        """
+        The name of the Auto Scaling group in the on-prem network.
+        """
+        return self._onprem_group.ref
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        aws_network: AWSPrivateNetwork,
+        onprem_network: OnPremNetwork,
+        fleet_size: int = DEFAULT_FLEET_SIZE,
+        flows: int = DEFAULT_FLOWS,
+        instance_types: list = DEFAULT_INSTANCE_TYPES,
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        if fleet_size < 1:
+            raise ValueError(f"fleet_size must be at least 1, got {fleet_size}")
+        if flows < 1:
+            raise ValueError(f"flows must be at least 1, got {flows}")
+
+        self._role = iam.Role(
+            scope=self,
+            id="LoadGeneratorRole",
+            assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
+            path="/",
+            managed_policies=[iam.ManagedPolicy.from_aws_managed_policy_name("AmazonSSMManagedInstanceCore")]
+        )
+
+        self._instance_profile = iam.CfnInstanceProfile(
+            scope=self,
+            id="LoadGeneratorInstanceProfile",
+            path="/",
+            roles=[self._role.role_name]
+        )
+
+        user_data = ec2.UserData.for_linux()
+        user_data.add_commands(
+            "yum install -y iperf3 httpd httpd-tools",
+            "head -c 1048576 /dev/urandom > /var/www/html/load-generator.bin",
+            # raise the socket buffer limits so single flows are not window-bound
+            "sysctl -w net.core.rmem_max=16777216 net.core.wmem_max=16777216"
+        )
+
+        # the private subnets have no internet access, yum goes through S3
+        aws_network.add_s3_gateway_endpoint()
+
+        self._aws_group = self._fleet(
+            id="AWSLoadGenerator",
+            side="aws",
+            subnet_ids=aws_network.private_subnet_ids,
+            security_group_id=aws_network.security_group_id,
+            user_data=user_data,
+            fleet_size=fleet_size,
+            instance_types=instance_types
+        )
+
+        self._onprem_group = self._fleet(
+            id="OnPremLoadGenerator",
+            side="onprem",
+            subnet_ids=onprem_network.private_subnet_ids,
+            security_group_id=onprem_network.security_group_id,
+            user_data=user_data,
+            fleet_size=fleet_size,
+            instance_types=instance_types
+        )
+
+        self._document = ssm.CfnDocument(
+            scope=self,
+            id="LoadGeneratorDocument",
+            document_type="Command",
+            content={
+                "schemaVersion": "2.2",
+                "description": "Runs iperf3 or HTTP load between the load generator fleets.",
+                "parameters": {
+                    "Action": {"type": "String", "allowedValues": ["server", "client", "stop"]},
+                    "Tool": {"type": "String", "default": "iperf3", "allowedValues": ["iperf3", "http"]},
+                    "Servers": {"type": "String", "default": "", "allowedPattern": "^[0-9.,]*$", "description": "Comma-separated server addresses, for clients"},
+                    "Flows": {"type": "String", "default": str(flows), "allowedPattern": "^[0-9]+$"},
+                    "Duration": {"type": "String", "default": "60", "allowedPattern": "^[0-9]+$"},
+                    "Protocol": {"type": "String", "default": "tcp", "allowedValues": ["tcp", "udp"]},
+                    "Bandwidth": {"type": "String", "default": "1G", "allowedPattern": "^[0-9]+[KMG]?$"},
+                    "ServerPorts": {"type": "String", "default": str(fleet_size), "allowedPattern": "^[0-9]+$"},
+                },
+                "mainSteps": [{
+                    "action": "aws:runShellScript",
+                    "name": "loadGenerator",
+                    "inputs": {
+                        "runCommand": render_commands(),
+                        "timeoutSeconds": "3600"
+                    }
+                }]
+            },
+            tags=[CfnTag(
+                key="Name",
+                value="load-generator"
+            )]
+        )
+
+    def _fleet(
+        self,
+        id: str,
+        side: str,
+        subnet_ids: list,
+        security_group_id: str,
+        user_data: ec2.UserData,
+        fleet_size: int,
+        instance_types: list
+    ) -> autoscaling.CfnAutoScalingGroup:
+        """
+        Creates a Spot Auto Scaling group of load generators in the given subnets.
+        """
+        launch_template = ec2.CfnLaunchTemplate(
+            scope=self,
+            id=f"{id}LaunchTemplate",
+            launch_template_data=ec2.CfnLaunchTemplate.LaunchTemplateDataProperty(
+                # the default generation is Amazon Linux 1, which has no systemd for httpd
+                image_id=ec2.MachineImage.latest_amazon_linux(
+                    generation=ec2.AmazonLinuxGeneration.AMAZON_LINUX_2
+                ).get_image(self).image_id,
+                iam_instance_profile=ec2.CfnLaunchTemplate.IamInstanceProfileProperty(
+                    arn=self._instance_profile.attr_arn
+                ),
+                security_group_ids=[security_group_id],
+                user_data=Fn.base64(user_data.render()),
+                metadata_options=ec2.CfnLaunchTemplate.MetadataOptionsProperty(http_tokens="required")
+            )
+        )
+
+        return autoscaling.CfnAutoScalingGroup(
+            scope=self,
+            id=id,
+            min_size=str(fleet_size),
+            max_size=str(fleet_size),
+            desired_capacity=str(fleet_size),
+            vpc_zone_identifier=subnet_ids,
+            mixed_instances_policy=autoscaling.CfnAutoScalingGroup.MixedInstancesPolicyProperty(
+                launch_template=autoscaling.CfnAutoScalingGroup.LaunchTemplateProperty(
+                    launch_template_specification=autoscaling.CfnAutoScalingGroup.LaunchTemplateSpecificationProperty(
+                        launch_template_id=launch_template.ref,
+                        version=launch_template.attr_latest_version_number
+                    ),
+                    overrides=[
+                        autoscaling.CfnAutoScalingGroup.LaunchTemplateOverridesProperty(instance_type=instance_type)
+                        for instance_type in instance_types
+                    ]
+                ),
+                instances_distribution=autoscaling.CfnAutoScalingGroup.InstancesDistributionProperty(
+                    on_demand_base_capacity=0,
+                    on_demand_percentage_above_base_capacity=0,
+                    spot_allocation_strategy="price-capacity-optimized"
+                )
+            ),
+            tags=[
+                autoscaling.CfnAutoScalingGroup.TagPropertyProperty(
+                    key="Name",
+                    value=f"{side}-load-generator",
+                    propagate_at_launch=True
+                ),
+                autoscaling.CfnAutoScalingGroup.TagPropertyProperty(
+                    key=SIDE_TAG,
+                    value=side,
+                    propagate_at_launch=True
+                )
+            ]
+        )
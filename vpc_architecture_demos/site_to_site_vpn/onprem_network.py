@@ -1,5 +1,8 @@
 #pylint: disable-all
+import ipaddress
+
 from aws_cdk import (
+    Stack,
     Fn,
     CfnTag,
     CfnOutput,
@@ -9,14 +12,177 @@ from aws_cdk import (
 )
 from constructs import Construct
 
+from vpc_architecture_demos import lookups
 from vpc_architecture_demos.custom import Subnet 
+from vpc_architecture_demos.flow_logs import FlowLogs
+from vpc_architecture_demos.iam_policies import instance_policies
+from vpc_architecture_demos.site_to_site_vpn import bgp_config
 from vpc_architecture_demos.site_to_site_vpn import cidr_config
+from vpc_architecture_demos.site_to_site_vpn import connect_config
+from vpc_architecture_demos.site_to_site_vpn import dns_cache as dns_cache_config
+from vpc_architecture_demos.site_to_site_vpn import ipsec_config
+from vpc_architecture_demos.site_to_site_vpn import router_telemetry as router_telemetry_config
+from vpc_architecture_demos.site_to_site_vpn.prefix_lists import NetworkPrefixLists
+from vpc_architecture_demos.site_to_site_vpn.prefix_summary import summarize
 
 class OnPremNetwork(Construct):
+    """
+    Creates a VPC that simulates an on-premises network with two strongSwan routers.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param azs: A list of availability zones to use for the VPC subnets.
+    :type azs: list
+    :param dns_cache: Whether the routers run a caching resolver for the on-prem subnets.
+    :type dns_cache: bool
+    :param dns_cache_min_ttl: The TTL floor in seconds for the caching resolver.
+    :type dns_cache_min_ttl: int
+    :param dns_cache_prefetch: Whether the caching resolver refreshes popular entries before they expire.
+    :type dns_cache_prefetch: bool
+    :param flow_logs: Where to send VPC flow logs, if anywhere.
+    :type flow_logs: FlowLogs
+    :param router_telemetry: Whether the routers publish host-level metrics and get a dashboard.
+    :type router_telemetry: bool
+    :param prefix_lists: The prefix lists to publish the on-prem CIDR block in and to reference
+        in security group rules and routes. If omitted, a new set is created with the
+        demo's AWS VPC CIDR block in it.
+    :type prefix_lists: NetworkPrefixLists
+    :param tgw_connect: Whether the routers bring up GRE tunnels and BGP sessions to transit
+        gateway Connect peers, see :class:`TransitGatewayConnect`.
+    :type tgw_connect: bool
+    :param fast_failover: Whether the routers' BGP sessions use short timers, and BFD toward
+        Connect peers, so a failed router is withdrawn in seconds, see :class:`RouterFailover`.
+    :type fast_failover: bool
+    :param vpn_tunnel_options: The options of the routers' VPN tunnels, see :class:`VpnConnections`.
+        The routers get a matching strongSwan configuration and BGP neighbors if set.
+    :type vpn_tunnel_options: ipsec_config.TunnelOptions
+    :param server_port: The TCP port the servers serve their host name on with httpd,
+        e.g. for :class:`HybridLoadBalancer`. The servers run nothing if None.
+    :type server_port: int
+    """
+
+    @property
+    def vpc_id(self) -> str:
+        """
+        The ID of the VPC.
+        """
+        return self._vpc.vpc_id
+
+    @property
+    def private_subnet_ids(self) -> list:
+        """
+        The IDs of the private subnets, in router order (A, B).
+        """
+        return [self._private_subnet_A.subnet_id, self._private_subnet_B.subnet_id]
+
+    @property
+    def private_route_table_ids(self) -> list:
+        """
+        The IDs of the route tables of the private subnets, in router order (A, B).
+        """
+        return [
+            self._private_subnet_A_route_table.attr_route_table_id,
+            self._private_subnet_B_route_table.attr_route_table_id
+        ]
+
+    @property
+    def router_private_ips(self) -> list:
+        """
+        The addresses of the routers in their private subnets, in router order (A, B).
+        """
+        return [
+            self._router_A_private_network_interface.attr_primary_private_ip_address,
+            self._router_B_private_network_interface.attr_primary_private_ip_address
+        ]
+
+    @property
+    def router_private_network_interface_ids(self) -> list:
+        """
+        The IDs of the routers' private network interfaces, in router order (A, B).
+        """
+        return [
+            self._router_A_private_network_interface.attr_id,
+            self._router_B_private_network_interface.attr_id
+        ]
+
+    @property
+    def customer_gateway_ids(self) -> list:
+        """
+        The IDs of the routers' customer gateways, in router order (A, B).
+        """
+        return [self._router_A_customer_gateway.ref, self._router_B_customer_gateway.ref]
+
+    @property
+    def security_group_id(self) -> str:
+        """
+        The ID of the security group of the on-prem servers.
+        """
+        return self._ec2_security_group.attr_group_id
+
+    @property
+    def prefix_lists(self) -> NetworkPrefixLists:
+        """
+        The prefix lists of the on-prem and AWS networks.
+        """
+        return self._prefix_lists
+
+    @property
+    def advertised_prefixes(self) -> list:
+        """
+        The summarized prefixes the routers advertise over BGP.
+        """
+        return list(self._advertised_prefixes)
+
+    @property
+    def server_private_ips(self) -> dict:
+        """
+        The private IP addresses of the on-prem servers, keyed by host name.
+        """
+        return {
+            "server-a": self._onprem_server_A.attr_private_ip,
+            "server-b": self._onprem_server_B.attr_private_ip,
+        }
     
-    def __init__(self, scope: Construct, id: str, azs: list, **kwargs):
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        azs: list,
+        dns_cache: bool = False,
+        dns_cache_min_ttl: int = dns_cache_config.DEFAULT_MIN_TTL,
+        dns_cache_prefetch: bool = True,
+        flow_logs: FlowLogs = None,
+        router_telemetry: bool = False,
+        prefix_lists: NetworkPrefixLists = None,
+        tgw_connect: bool = False,
+        fast_failover: bool = False,
+        vpn_tunnel_options: ipsec_config.TunnelOptions = None,
+        server_port: int = None,
+        **kwargs
+    ):
         super().__init__(scope, id, **kwargs)
         
+        region = Stack.of(self).region
+        
+        router_image_id = lookups.ami(self, "router")
+        
+        # advertise the whole allocation, so new subnets in it need no route changes
+        self._advertised_prefixes = summarize(
+            [cidr_config.ONPREM_PRIVATE_SUBNET_A_CIDR, cidr_config.ONPREM_PRIVATE_SUBNET_B_CIDR],
+            within=[cidr_config.ONPREM_CIDR],
+            max_prefixlen=ipaddress.ip_network(cidr_config.ONPREM_CIDR).prefixlen
+        )
+        
+        if prefix_lists is None:
+            # without a shared set nothing publishes the AWS side, so assume the demo's
+            prefix_lists = NetworkPrefixLists(scope=self, id="PrefixLists")
+            prefix_lists.add_aws_cidr(cidr_config.AWS_VPC_CIDR, description=f"aws-private-network {region}")
+        self._prefix_lists = prefix_lists
+        for prefix in self._advertised_prefixes:
+            self._prefix_lists.add_onprem_cidr(prefix, description="onprem-network")
+        
         self._vpc = ec2.Vpc(
             scope=self,
             id="OnPremVpc",
@@ -27,6 +193,13 @@ class OnPremNetwork(Construct):
             subnet_configuration=[]
         )
         
+        if flow_logs is not None:
+            flow_logs.add_vpc(
+                id="OnPremVpcFlowLog",
+                vpc_id=self._vpc.vpc_id,
+                name="onprem-network-flow-log"
+            )
+        
         self._public_subnet = Subnet(
             scope=self,
             id="OnPremPublicSubnet",
@@ -91,7 +264,7 @@ class OnPremNetwork(Construct):
                 ec2.CfnSecurityGroup.IngressProperty(
                     description="Allow All from AWS Environment",
                     ip_protocol="-1",
-                    cidr_ip=cidr_config.AWS_VPC_CIDR
+                    source_prefix_list_id=self._prefix_lists.aws_prefix_list_id
                 ),   
             ]
         )
@@ -108,6 +281,7 @@ class OnPremNetwork(Construct):
             id="OnPremRouterAPrivateNetworkInterface",
             subnet_id=self._private_subnet_A.subnet_id,
             description="OnPrem RouterA Private Interface",
+            private_ip_address=cidr_config.ONPREM_DNS_CACHE_IPS[0] if dns_cache else None,
             source_dest_check=False,
             group_set=[self._ec2_security_group.attr_group_id],
             tags=[CfnTag(
@@ -134,6 +308,7 @@ class OnPremNetwork(Construct):
             id="OnPremRouterBPrivateNetworkInterface",
             subnet_id=self._private_subnet_B.subnet_id,
             description="OnPrem RouterB Private Interface",
+            private_ip_address=cidr_config.ONPREM_DNS_CACHE_IPS[1] if dns_cache else None,
             source_dest_check=False,
             group_set=[self._ec2_security_group.attr_group_id],
             tags=[CfnTag(
@@ -185,16 +360,21 @@ class OnPremNetwork(Construct):
             scope=self,
             id="OnPremPrivateSubnetARouteTableRoute",
             route_table_id=self._private_subnet_A_route_table.attr_route_table_id,
-            network_interface_id=self._router_A_private_network_interface.attr_id,
-            destination_cidr_block=cidr_config.AWS_VPC_CIDR
+            network_interface_id=self._router_A_private_network_interface.attr_id
+        )
+        # CfnRoute in the pinned CDK release has no DestinationPrefixListId property
+        self._private_subnet_A_route_table_route.add_property_override(
+            "DestinationPrefixListId", self._prefix_lists.aws_prefix_list_id
         )
         
         self._private_subnet_B_route_table_route = ec2.CfnRoute(
             scope=self,
             id="OnPremPrivateSubnetBRouteTableRoute",
             route_table_id=self._private_subnet_B_route_table.attr_route_table_id,
-            network_interface_id=self._router_B_private_network_interface.attr_id,
-            destination_cidr_block=cidr_config.AWS_VPC_CIDR
+            network_interface_id=self._router_B_private_network_interface.attr_id
+        )
+        self._private_subnet_B_route_table_route.add_property_override(
+            "DestinationPrefixListId", self._prefix_lists.aws_prefix_list_id
         )
         
         self._public_subnet_route_table_assoc = ec2.CfnSubnetRouteTableAssociation(
@@ -240,7 +420,7 @@ class OnPremNetwork(Construct):
             scope=self,
             id="OnPremEC2MessagesInterfaceEndpoint",
             vpc_id=self._vpc.vpc_id,
-            service_name="com.amazonaws.us-east-1.ec2messages",
+            service_name=f"com.amazonaws.{region}.ec2messages",
             private_dns_enabled=True,
             vpc_endpoint_type="Interface",
             subnet_ids=[self._public_subnet.subnet_id],
@@ -259,7 +439,7 @@ class OnPremNetwork(Construct):
             scope=self,
             id="OnPremSSMMessagesInterfaceEndpoint",
             vpc_id=self._vpc.vpc_id,
-            service_name="com.amazonaws.us-east-1.ssmmessages",
+            service_name=f"com.amazonaws.{region}.ssmmessages",
             private_dns_enabled=True,
             vpc_endpoint_type="Interface",
             subnet_ids=[self._public_subnet.subnet_id],
@@ -270,7 +450,7 @@ class OnPremNetwork(Construct):
             scope=self,
             id="OnPremSSMInterfaceEndpoint",
             vpc_id=self._vpc.vpc_id,
-            service_name="com.amazonaws.us-east-1.ssm",
+            service_name=f"com.amazonaws.{region}.ssm",
             private_dns_enabled=True,
             vpc_endpoint_type="Interface",
             subnet_ids=[self._public_subnet.subnet_id],
@@ -282,7 +462,7 @@ class OnPremNetwork(Construct):
             id="OnPremS3InterfaceEndpoint",
             vpc_id=self._vpc.vpc_id,
             vpc_endpoint_type="Gateway",
-            service_name="com.amazonaws.us-east-1.s3",
+            service_name=f"com.amazonaws.{region}.s3",
             route_table_ids=[
                 self._public_subnet_route_table.attr_route_table_id,
                 self._private_subnet_A_route_table.attr_route_table_id,
@@ -296,65 +476,7 @@ class OnPremNetwork(Construct):
             assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
             path="/",
             role_name="onprem-network-ec2-iam-role",
-            inline_policies={
-                "root": iam.PolicyDocument(
-                    statements=[
-                        iam.PolicyStatement(
-                            actions=[
-                                "ssm:DescribeAssociation",
-                                "ssm:GetDeployablePatchSnapshotForInstance",
-                                "ssm:GetDocument",
-                                "ssm:DescribeDocument",
-                                "ssm:GetManifest",
-                                "ssm:GetParameter",
-                                "ssm:GetParameters",
-                                "ssm:ListAssociations",
-                                "ssm:ListInstanceAssociations",
-                                "ssm:PutInventory",
-                                "ssm:PutComplianceItems",
-                                "ssm:PutConfigurePackageResult",
-                                "ssm:UpdateAssociationStatus",
-                                "ssm:UpdateInstanceAssociationStatus",
-                                "ssm:UpdateInstanceInformation"
-                            ],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=[
-                                "ssmmessages:CreateControlChannel",
-                                "ssmmessages:CreateDataChannel",
-                                "ssmmessages:OpenControlChannel",
-                                "ssmmessages:OpenDataChannel",
-                            ],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=[
-                                "ec2messages:AcknowledgeMessage",
-                                "ec2messages:DeleteMessage",
-                                "ec2messages:FailMessage",
-                                "ec2messages:GetEndpoint",
-                                "ec2messages:GetMessages",
-                                "ec2messages:SendReply"
-                            ],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=["s3:*"],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        ),
-                        iam.PolicyStatement(
-                            actions=["sns:*"],
-                            resources=["*"],
-                            effect=iam.Effect.ALLOW
-                        )
-                    ]
-                )
-            }
+            managed_policies=instance_policies(self).all
         )
         
         self._ec2_instance_profile = iam.CfnInstanceProfile(
@@ -365,6 +487,9 @@ class OnPremNetwork(Construct):
         )
         
         shell_commands = ec2.UserData.for_linux()
+        if dns_cache:
+            # the DHCP options point the routers at themselves, so bootstrap must not depend on their cache
+            shell_commands.add_commands(*dns_cache_config.resolver_commands())
         shell_commands.add_commands(
             "apt-get update && apt-get install -y strongswan wget",
             "mkdir /home/ubuntu/demo_assets",
@@ -378,6 +503,85 @@ class OnPremNetwork(Construct):
             "cp /home/ubuntu/demo_assets/51-eth1.yaml /etc/netplan",
             "netplan --debug apply"
         )
+        if dns_cache:
+            shell_commands.add_commands(*dns_cache_config.install_commands(
+                dns_cache_config.render_unbound_conf(
+                    allowed_cidrs=[cidr_config.ONPREM_CIDR, cidr_config.AWS_VPC_CIDR],
+                    min_ttl=dns_cache_min_ttl,
+                    prefetch=dns_cache_prefetch
+                )
+            ))
+            
+            self._dhcp_options = ec2.CfnDHCPOptions(
+                scope=self,
+                id="OnPremDHCPOptions",
+                domain_name=cidr_config.ONPREM_DOMAIN,
+                domain_name_servers=cidr_config.ONPREM_DNS_CACHE_IPS,
+                tags=[CfnTag(
+                    key="Name",
+                    value="onprem-network-dhcp-options"
+                )]
+            )
+            
+            self._dhcp_options_assoc = ec2.CfnVPCDHCPOptionsAssociation(
+                scope=self,
+                id="OnPremDHCPOptionsAssoc",
+                dhcp_options_id=self._dhcp_options.ref,
+                vpc_id=self._vpc.vpc_id
+            )
+        
+        if router_telemetry:
+            shell_commands.add_commands(*router_telemetry_config.install_commands())
+            self._ec2_iam_role.add_to_principal_policy(iam.PolicyStatement(
+                actions=["cloudwatch:PutMetricData"],
+                resources=["*"],
+                effect=iam.Effect.ALLOW,
+                conditions={
+                    "StringEquals": {
+                        "cloudwatch:namespace": router_telemetry_config.NAMESPACE
+                    }
+                }
+            ))
+        
+        if vpn_tunnel_options:
+            self._ec2_iam_role.add_to_policy(iam.PolicyStatement(
+                actions=["ec2:DescribeVpnConnections"],
+                resources=["*"],
+                effect=iam.Effect.ALLOW
+            ))
+        
+        router_user_data = []
+        for index, subnet_cidr in enumerate([cidr_config.ONPREM_PRIVATE_SUBNET_A_CIDR, cidr_config.ONPREM_PRIVATE_SUBNET_B_CIDR]):
+            inside_cidrs = ipsec_config.TUNNEL_INSIDE_CIDRS[index]
+            vpn_neighbors = {
+                ipsec_config.inside_addresses(inside_cidr)[0]: bgp_config.TRANSIT_GATEWAY_ASN
+                for inside_cidr in inside_cidrs
+            } if vpn_tunnel_options else None
+            if tgw_connect:
+                peer = connect_config.CONNECT_PEERS[index]
+                router_commands = connect_config.install_commands(peer, subnet_cidr)
+                bgpd_conf = connect_config.render_bgpd_conf(
+                    peer,
+                    self._advertised_prefixes,
+                    fast_failover=fast_failover,
+                    neighbors=vpn_neighbors
+                )
+            else:
+                # AWS VPN tunnels have no BFD, the timers apply to the sessions the demo scripts add
+                router_commands = []
+                bgpd_conf = bgp_config.render_bgpd_conf(
+                    self._advertised_prefixes,
+                    neighbors=vpn_neighbors,
+                    timers=bgp_config.FAST_FAILOVER_TIMERS if fast_failover else None
+                )
+            if vpn_tunnel_options:
+                router_commands += ipsec_config.install_commands(
+                    vpn_tunnel_options,
+                    inside_cidrs,
+                    ipsec_config.VPN_CONNECTION_NAMES[index]
+                )
+            router_commands += bgp_config.install_commands(bgpd_conf, bfd=fast_failover and tgw_connect)
+            router_user_data.append(Fn.base64("\n".join([shell_commands.render()] + router_commands)))
         
         self._router_A_ec2 = ec2.CfnInstance(
             scope=self,
@@ -394,13 +598,13 @@ class OnPremNetwork(Construct):
                 )
             ],
             availability_zone=azs[0],
-            image_id="ami-0ac80df6eff0e70b5",
+            image_id=router_image_id,
             iam_instance_profile=self._ec2_instance_profile.ref,
             tags=[CfnTag(
                 key="Name",
                 value="onprem-router-A"
             )],
-            user_data=Fn.base64(shell_commands.render())
+            user_data=router_user_data[0]
         )
         
         self._router_B_ec2 = ec2.CfnInstance(
@@ -418,14 +622,37 @@ class OnPremNetwork(Construct):
                 )
             ],
             availability_zone=azs[0],
-            image_id="ami-0ac80df6eff0e70b5",
+            image_id=router_image_id,
             iam_instance_profile=self._ec2_instance_profile.ref,
             tags=[CfnTag(
                 key="Name",
                 value="onprem-router-B"
             )],
-            user_data=Fn.base64(shell_commands.render())
-        )
+            user_data=router_user_data[1]
+        )
+        
+        if router_telemetry:
+            router_telemetry_config.RouterDashboard(
+                scope=self,
+                id="OnPremRouterDashboard",
+                routers={
+                    "RouterA": self._router_A_ec2.ref,
+                    "RouterB": self._router_B_ec2.ref
+                }
+            )
+        
+        server_user_data = None
+        if server_port:
+            server_commands = ec2.UserData.for_linux()
+            # service and chkconfig work on both Amazon Linux generations
+            server_commands.add_commands(
+                "yum install -y httpd",
+                f"sed -i 's/^Listen 80$/Listen {server_port}/' /etc/httpd/conf/httpd.conf",
+                "hostname > /var/www/html/index.html",
+                "service httpd start",
+                "chkconfig httpd on"
+            )
+            server_user_data = Fn.base64(server_commands.render())
         
         self._onprem_server_A = ec2.CfnInstance(
             scope=self,
@@ -435,6 +662,7 @@ class OnPremNetwork(Construct):
             image_id=ec2.MachineImage.latest_amazon_linux().get_image(self).image_id,
             iam_instance_profile=self._ec2_instance_profile.ref,
             subnet_id=self._private_subnet_A.subnet_id,
+            user_data=server_user_data,
             tags=[CfnTag(
                 key="Name",
                 value="onprem-server-a"
@@ -449,6 +677,7 @@ class OnPremNetwork(Construct):
             image_id=ec2.MachineImage.latest_amazon_linux().get_image(self).image_id,
             iam_instance_profile=self._ec2_instance_profile.ref,
             subnet_id=self._private_subnet_B.subnet_id,
+            user_data=server_user_data,
             tags=[CfnTag(
                 key="Name",
                 value="onprem-server-b"
@@ -458,7 +687,7 @@ class OnPremNetwork(Construct):
         self._router_A_customer_gateway = ec2.CfnCustomerGateway(
             scope=self,
             id="OnPremRouterACGW",
-            bgp_asn=65016,
+            bgp_asn=bgp_config.ONPREM_ASN,
             type='ipsec.1',
             ip_address=self._router_A_ec2.attr_public_ip,
             device_name="onprem-router-A-cgw",
@@ -473,7 +702,7 @@ class OnPremNetwork(Construct):
         self._router_B_customer_gateway = ec2.CfnCustomerGateway(
             scope=self,
             id="OnPremRouterBCGW",
-            bgp_asn=65016,
+            bgp_asn=bgp_config.ONPREM_ASN,
             type='ipsec.1',
             ip_address=self._router_B_ec2.attr_public_ip,
             device_name="onprem-router-B-cgw",
@@ -508,4 +737,16 @@ class OnPremNetwork(Construct):
             id="RouterBPrivateIP",
             description="Private IP of Router B",
             value=self._router_B_ec2.attr_private_ip
+        )
+        CfnOutput(
+            scope=self,
+            id="ServerAPrivateIP",
+            description="Private IP of Server A",
+            value=self._onprem_server_A.attr_private_ip
+        )
+        CfnOutput(
+            scope=self,
+            id="ServerBPrivateIP",
+            description="Private IP of Server B",
+            value=self._onprem_server_B.attr_private_ip
         )
\ No newline at end of file
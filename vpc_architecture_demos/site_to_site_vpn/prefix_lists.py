@@ -0,0 +1,128 @@
+#pylint: disable-all
+
+from aws_cdk import (
+    CfnTag,
+    Token,
+    aws_ec2 as ec2,
+)
+
+from constructs import Construct
+
+DEFAULT_MAX_ENTRIES = 10
+"""
+The default capacity of each prefix list.
+
+A security group rule that references a prefix list counts as ``max_entries`` rules
+against the security group rule quota, whatever the number of entries in use, so the
+capacity should be sized to the expected number of networks rather than generously.
+
+:type: int
+"""
+
+
+class NetworkPrefixLists(Construct):
+    """
+    Managed prefix lists that hold the CIDR blocks of the on-prem networks and of the
+    AWS networks.
+
+    Security group rules and route entries reference the prefix lists instead of
+    copying CIDR blocks, so adding a network changes one prefix list entry rather
+    than a rule and a route in every VPC.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param max_entries: The capacity of each prefix list.
+    :type max_entries: int
+    """
+
+    @property
+    def onprem_prefix_list_id(self) -> str:
+        """
+        The ID of the prefix list of the on-prem networks.
+        """
+        return self._onprem_prefix_list.attr_prefix_list_id
+
+    @property
+    def aws_prefix_list_id(self) -> str:
+        """
+        The ID of the prefix list of the AWS networks.
+        """
+        return self._aws_prefix_list.attr_prefix_list_id
+
+    @property
+    def onprem_cidrs(self) -> list:
+        """
+        The CIDR blocks in the prefix list of the on-prem networks.
+        """
+        return [entry.cidr for entry in self._onprem_entries]
+
+    @property
+    def aws_cidrs(self) -> list:
+        """
+        The CIDR blocks in the prefix list of the AWS networks.
+        """
+        return [entry.cidr for entry in self._aws_entries]
+
+    def __init__(self, scope: Construct, id: str, max_entries: int = DEFAULT_MAX_ENTRIES, **kwargs):
+        super().__init__(scope, id, **kwargs)
+
+        self._max_entries = max_entries
+        self._onprem_entries = []
+        self._aws_entries = []
+
+        self._onprem_prefix_list = self._prefix_list(id="OnPremPrefixList", name="onprem-networks")
+        self._aws_prefix_list = self._prefix_list(id="AWSPrefixList", name="aws-networks")
+
+    def add_onprem_cidr(self, cidr: str, description: str = None):
+        """
+        Adds the CIDR block of an on-prem network.
+
+        :param cidr: The CIDR block.
+        :type cidr: str
+        :param description: The description of the entry.
+        :type description: str
+        """
+        self._add_entry(self._onprem_prefix_list, self._onprem_entries, cidr, description)
+
+    def add_aws_cidr(self, cidr: str, description: str = None):
+        """
+        Adds the CIDR block of an AWS network.
+
+        :param cidr: The CIDR block.
+        :type cidr: str
+        :param description: The description of the entry.
+        :type description: str
+        """
+        self._add_entry(self._aws_prefix_list, self._aws_entries, cidr, description)
+
+    def _prefix_list(self, id: str, name: str) -> ec2.CfnPrefixList:
+        """
+        Creates an empty IPv4 prefix list.
+        """
+        return ec2.CfnPrefixList(
+            scope=self,
+            id=id,
+            prefix_list_name=name,
+            address_family="IPv4",
+            max_entries=self._max_entries,
+            entries=[],
+            tags=[CfnTag(
+                key="Name",
+                value=name
+            )]
+        )
+
+    def _add_entry(self, prefix_list: ec2.CfnPrefixList, entries: list, cidr: str, description: str):
+        """
+        Adds an entry to a prefix list unless the CIDR block is already in it.
+        """
+        if not Token.is_unresolved(cidr) and cidr in [entry.cidr for entry in entries]:
+            return
+        if len(entries) >= self._max_entries:
+            raise ValueError(
+                f"prefix list {prefix_list.prefix_list_name} is full ({self._max_entries} entries), cannot add {cidr}"
+            )
+        entries.append(ec2.CfnPrefixList.EntryProperty(cidr=cidr, description=description))
+        prefix_list.entries = list(entries)
@@ -0,0 +1,193 @@
+#pylint: disable-all
+"""
+Summarizes the prefixes a site advertises into as few aggregates as possible.
+
+Prefixes are kept in a binary trie, one level per address bit. Sibling prefixes that
+together fill their parent are merged into the parent, which gives the smallest set
+of prefixes covering exactly the same addresses. Two optional steps trade precision
+for fewer routes:
+
+- ``max_prefixlen`` widens every prefix to at most that length first, so that new
+  subnets inside the same block are already covered and do not change the routes.
+- ``max_prefixes`` then collapses trie nodes into their supernet until the budget is
+  met. Each step picks the node that adds the least uncovered address space per route
+  saved, so the result is greedy rather than optimal.
+
+Both steps only widen prefixes up to the ``within`` blocks, e.g. a site's allocation,
+so aggregates never claim addresses outside of it.
+"""
+import ipaddress
+
+DEFAULT_MAX_PREFIXES = 100
+"""
+The default route budget of a site, the number of routes a customer gateway may
+advertise to a VPN connection.
+
+:type: int
+"""
+
+
+class _Node:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children = [None, None]
+        self.terminal = False
+
+
+class PrefixTrie:
+    """
+    A binary trie of the prefixes of one IP version.
+
+    :param version: The IP version, 4 or 6.
+    :type version: int
+    """
+
+    def __init__(self, version: int = 4):
+        self._version = version
+        self._bits = 32 if version == 4 else 128
+        self._root = _Node()
+
+    def _bit(self, address: int, depth: int) -> int:
+        return (address >> (self._bits - 1 - depth)) & 1
+
+    def _network(self, address: int, depth: int):
+        return (ipaddress.IPv4Network if self._version == 4 else ipaddress.IPv6Network)((address, depth))
+
+    def add(self, prefix):
+        """
+        Adds a prefix. Prefixes covered by one already in the trie are ignored, and
+        prefixes already in the trie that the new one covers are dropped.
+
+        :param prefix: The prefix, e.g. ``"192.168.10.0/24"``.
+        """
+        network = ipaddress.ip_network(prefix)
+        if network.version != self._version:
+            raise ValueError(f"{prefix} is not an IPv{self._version} prefix")
+
+        address = int(network.network_address)
+        node = self._root
+        for depth in range(network.prefixlen):
+            if node.terminal:
+                return
+            bit = self._bit(address, depth)
+            if node.children[bit] is None:
+                node.children[bit] = _Node()
+            node = node.children[bit]
+        node.terminal = True
+        node.children = [None, None]
+
+    def merge(self):
+        """
+        Merges sibling prefixes that fill their parent, bottom up.
+        """
+        def merge(node):
+            if node is None or node.terminal:
+                return
+            for child in node.children:
+                merge(child)
+            if all(child is not None and child.terminal for child in node.children):
+                node.terminal = True
+                node.children = [None, None]
+
+        merge(self._root)
+
+    def prefixes(self) -> list:
+        """
+        Returns the prefixes in the trie in address order.
+
+        :rtype: list
+        """
+        prefixes = []
+
+        def walk(node, address, depth):
+            if node.terminal:
+                prefixes.append(self._network(address, depth))
+                return
+            for bit, child in enumerate(node.children):
+                if child is not None:
+                    walk(child, address | (bit << (self._bits - 1 - depth)), depth + 1)
+
+        walk(self._root, 0, 0)
+        return prefixes
+
+    def collapse(self, max_prefixes: int, within: list = None):
+        """
+        Collapses nodes into supernets until at most ``max_prefixes`` prefixes remain.
+
+        :param max_prefixes: The route budget.
+        :type max_prefixes: int
+        :param within: The blocks that supernets must stay inside. Unrestricted if None.
+        :type within: list
+        :raises ValueError: If the budget cannot be met inside the blocks.
+        """
+        self.merge()
+        while len(self.prefixes()) > max_prefixes:
+            best = None
+
+            def visit(node, address, depth):
+                nonlocal best
+                if node.terminal:
+                    return 1, 2 ** (self._bits - depth)
+                count, covered = 0, 0
+                for bit, child in enumerate(node.children):
+                    if child is not None:
+                        child_count, child_covered = visit(child, address | (bit << (self._bits - 1 - depth)), depth + 1)
+                        count, covered = count + child_count, covered + child_covered
+                network = self._network(address, depth)
+                if count > 1 and (within is None or any(network.subnet_of(block) for block in within)):
+                    waste = 2 ** (self._bits - depth) - covered
+                    key = (waste / (count - 1), waste, -depth)
+                    if best is None or key < best[0]:
+                        best = (key, node)
+                return count, covered
+
+            visit(self._root, 0, 0)
+            if best is None:
+                raise ValueError(f"cannot summarize into {max_prefixes} prefixes inside {within}")
+            node = best[1]
+            node.terminal = True
+            node.children = [None, None]
+            self.merge()
+
+
+def summarize(prefixes: list, within: list = None, max_prefixes: int = None, max_prefixlen: int = None) -> list:
+    """
+    Returns the aggregates that cover a list of prefixes, in address order.
+
+    :param prefixes: The prefixes to summarize, IPv4 and IPv6 may be mixed.
+    :type prefixes: list
+    :param within: The blocks aggregates must stay inside, e.g. the site's allocation.
+    :type within: list
+    :param max_prefixes: The route budget per IP version. Unlimited if None.
+    :type max_prefixes: int
+    :param max_prefixlen: Widen every prefix to at most this length, so later subnets
+        in the same block are already covered.
+    :type max_prefixlen: int
+    :rtype: list
+    """
+    blocks = [ipaddress.ip_network(block) for block in within] if within is not None else None
+    tries = {}
+    for prefix in prefixes:
+        network = ipaddress.ip_network(prefix)
+        if max_prefixlen is not None and network.prefixlen > max_prefixlen:
+            new_prefix = max_prefixlen
+            if blocks is not None:
+                # never widen past the block the prefix is in, and leave prefixes outside every block alone
+                containing = [
+                    block.prefixlen for block in blocks if block.version == network.version and network.subnet_of(block)
+                ]
+                new_prefix = max([max_prefixlen] + containing) if containing else network.prefixlen
+            if new_prefix < network.prefixlen:
+                network = network.supernet(new_prefix=new_prefix)
+        trie = tries.setdefault(network.version, PrefixTrie(network.version))
+        trie.add(network)
+
+    result = []
+    for version in sorted(tries):
+        trie = tries[version]
+        trie.merge()
+        if max_prefixes is not None:
+            trie.collapse(max_prefixes, [block for block in blocks if block.version == version] if blocks is not None else None)
+        result += trie.prefixes()
+    return [str(network) for network in result]
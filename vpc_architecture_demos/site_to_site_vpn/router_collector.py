@@ -0,0 +1,168 @@
+#pylint: disable-all
+"""
+Publishes strongSwan and FRR metrics from an on-prem router to the CloudWatch agent.
+
+This file is copied onto the routers by :mod:`router_telemetry` and runs there as a
+service, so it only uses the standard library and stays compatible with the
+Python 3.6 that ships with the router image. Every interval it reads
+``ipsec statusall`` and ``vtysh -c 'show bgp summary json'`` and sends the results
+to the agent's StatsD listener, tagged with the IPsec connection or BGP peer:
+
+- ``ipsec_bytes_in``/``ipsec_bytes_out``/``ipsec_packets_in``/``ipsec_packets_out``:
+  traffic since the previous sample, summed over the connection's CHILD_SAs
+- ``ipsec_rekeys``: CHILD_SAs of the connection that were replaced since the previous sample
+- ``ipsec_sa_established``: 1 while the connection has an installed CHILD_SA
+- ``bgp_session_established``: 1 while the BGP session is established
+- ``bgp_prefixes_received``: prefixes accepted from the peer
+"""
+import argparse
+import json
+import re
+import socket
+import subprocess
+import time
+
+STATSD_ADDRESS = ("127.0.0.1", 8125)
+
+_INSTALLED_PATTERN = re.compile(
+    r"^\s*(?P<name>[\w.-]+)\{(?P<id>\d+)\}:\s+INSTALLED\b.*SPIs:\s+(?P<spi_in>[0-9a-f]+)_i\s+(?P<spi_out>[0-9a-f]+)_o"
+)
+_TRAFFIC_PATTERN = re.compile(
+    r"^\s*(?P<name>[\w.-]+)\{(?P<id>\d+)\}:\s+.*?"
+    r"(?P<bytes_in>\d+) bytes_i(?: \((?P<packets_in>\d+) pkts?[^)]*\))?, "
+    r"(?P<bytes_out>\d+) bytes_o(?: \((?P<packets_out>\d+) pkts?[^)]*\))?"
+)
+
+
+def parse_ipsec_statusall(output):
+    """
+    Returns the installed CHILD_SAs per connection from ``ipsec statusall`` output.
+
+    :param output: The command output.
+    :type output: str
+    :return: ``{connection: {(spi_in, spi_out): {"bytes_in": .., "bytes_out": .., "packets_in": .., "packets_out": ..}}}``
+    :rtype: dict
+    """
+    spis = {}
+    traffic = {}
+    for line in output.splitlines():
+        match = _INSTALLED_PATTERN.match(line)
+        if match:
+            spis[(match.group("name"), match.group("id"))] = (match.group("spi_in"), match.group("spi_out"))
+            continue
+        match = _TRAFFIC_PATTERN.match(line)
+        if match:
+            traffic[(match.group("name"), match.group("id"))] = {
+                key: int(match.group(key) or 0) for key in ("bytes_in", "bytes_out", "packets_in", "packets_out")
+            }
+
+    connections = {}
+    for (name, sa_id), spi_pair in spis.items():
+        counters = traffic.get((name, sa_id), {"bytes_in": 0, "bytes_out": 0, "packets_in": 0, "packets_out": 0})
+        connections.setdefault(name, {})[spi_pair] = counters
+    return connections
+
+
+def parse_bgp_summary(output):
+    """
+    Returns the state of each BGP peer from ``show bgp summary json`` output.
+
+    :param output: The command output.
+    :type output: str
+    :return: ``{peer: {"established": 0 or 1, "prefixes_received": n}}``
+    :rtype: dict
+    """
+    summary = json.loads(output or "{}")
+    peers = {}
+    for address_family in summary.values():
+        if not isinstance(address_family, dict):
+            continue
+        for peer, details in address_family.get("peers", {}).items():
+            peers[peer] = {
+                "established": 1 if details.get("state") == "Established" else 0,
+                "prefixes_received": int(details.get("pfxRcd", details.get("prefixReceivedCount", 0)) or 0),
+            }
+    return peers
+
+
+class Collector:
+    """
+    Turns successive router snapshots into StatsD lines.
+    """
+
+    def __init__(self):
+        self._previous_sas = {}
+
+    def ipsec_lines(self, connections):
+        """
+        Returns the StatsD lines for a snapshot from :func:`parse_ipsec_statusall`.
+
+        Traffic is reported as the difference to the previous snapshot per CHILD_SA;
+        a CHILD_SA that was not seen before contributes all of its counters.
+        """
+        lines = []
+        names = sorted(set(connections) | set(self._previous_sas))
+        for name in names:
+            current = connections.get(name, {})
+            previous = self._previous_sas.get(name, {})
+            tag = "|#connection:%s" % name
+
+            totals = {"bytes_in": 0, "bytes_out": 0, "packets_in": 0, "packets_out": 0}
+            for spi_pair, counters in current.items():
+                before = previous.get(spi_pair, {})
+                for key in totals:
+                    delta = counters[key] - before.get(key, 0)
+                    totals[key] += delta if delta >= 0 else counters[key]
+
+            rekeys = len(set(previous) - set(current)) if current and previous else 0
+            for key in sorted(totals):
+                lines.append("ipsec_%s:%d|c%s" % (key, totals[key], tag))
+            lines.append("ipsec_rekeys:%d|c%s" % (rekeys, tag))
+            lines.append("ipsec_sa_established:%d|g%s" % (1 if current else 0, tag))
+
+        self._previous_sas = connections
+        return lines
+
+    @staticmethod
+    def bgp_lines(peers):
+        """
+        Returns the StatsD lines for a snapshot from :func:`parse_bgp_summary`.
+        """
+        lines = []
+        for peer in sorted(peers):
+            tag = "|#peer:%s" % peer
+            lines.append("bgp_session_established:%d|g%s" % (peers[peer]["established"], tag))
+            lines.append("bgp_prefixes_received:%d|g%s" % (peers[peer]["prefixes_received"], tag))
+        return lines
+
+
+def _run(command):
+    try:
+        return subprocess.run(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True, timeout=5
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish strongSwan and FRR metrics to the CloudWatch agent.")
+    parser.add_argument("--interval", type=float, default=10, help="seconds between samples")
+    args = parser.parse_args(argv)
+
+    collector = Collector()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    while True:
+        started = time.monotonic()
+        lines = collector.ipsec_lines(parse_ipsec_statusall(_run(["ipsec", "statusall"])))
+        try:
+            lines += collector.bgp_lines(parse_bgp_summary(_run(["vtysh", "-c", "show bgp summary json"])))
+        except ValueError:
+            pass
+        for line in lines:
+            sock.sendto(line.encode(), STATSD_ADDRESS)
+        time.sleep(max(0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#pylint: disable-all
+import os
+
+from aws_cdk import (
+    Duration,
+    Stack,
+    aws_ec2 as ec2,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+from vpc_architecture_demos.site_to_site_vpn.tgw_peering import FUNCTIONS_DIR
+
+PROBE_PORT = 179
+"""
+The port the controller probes on the routers. BGP listens on it once FRR runs, and
+the kernel refuses the connection before, which proves the router is up until it
+first accepted a connection; after that a refused connection means FRR is down.
+
+:type: int
+"""
+
+
+class RouterFailover(Construct):
+    """
+    Deploys a controller that moves the on-prem private subnet routes to AWS off a
+    failed router.
+
+    Each private subnet sends AWS traffic to its own router, so a router failure
+    blackholes its subnet until the route changes. The controller runs in the on-prem
+    network, probes both routers every ``probe_interval`` and replaces the route
+    through a router that missed ``failure_threshold`` probes in a row with a route
+    through the surviving one, and back once the router recovers. See
+    ``functions/router_failover/index.py``.
+
+    The controller changes the routes outside of CloudFormation: a deployment that
+    updates a route puts it back on its preferred router, which the controller moves
+    again if that router is still down.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param onprem_network: The on-prem network.
+    :type onprem_network: OnPremNetwork
+    :param probe_interval: The time between probes.
+    :type probe_interval: Duration
+    :param failure_threshold: The probes in a row that fail or recover a router.
+    :type failure_threshold: int
+    """
+
+    @property
+    def function_name(self) -> str:
+        """
+        The name of the controller function.
+        """
+        return self._function.function_name
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        onprem_network: OnPremNetwork,
+        probe_interval: Duration = Duration.seconds(2),
+        failure_threshold: int = 3,
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        stack = Stack.of(self)
+        route_table_ids = onprem_network.private_route_table_ids
+
+        # the function runs in a private subnet without internet access
+        ec2.CfnVPCEndpoint(
+            scope=self,
+            id="OnPremEC2InterfaceEndpoint",
+            vpc_id=onprem_network.vpc_id,
+            service_name=f"com.amazonaws.{stack.region}.ec2",
+            private_dns_enabled=True,
+            vpc_endpoint_type="Interface",
+            subnet_ids=onprem_network.private_subnet_ids[:1],
+            security_group_ids=[onprem_network.security_group_id]
+        )
+
+        routers = [
+            {"name": name, "address": address, "network_interface_id": network_interface_id}
+            for name, address, network_interface_id in zip(
+                "AB", onprem_network.router_private_ips, onprem_network.router_private_network_interface_ids
+            )
+        ]
+        routes = [
+            {"route_table_id": route_table_id, "preferred": name}
+            for name, route_table_id in zip("AB", route_table_ids)
+        ]
+
+        self._function = lambda_.Function(
+            scope=self,
+            id="RouterFailoverFunction",
+            runtime=lambda_.Runtime.PYTHON_3_9,
+            handler="index.handler",
+            code=lambda_.Code.from_asset(os.path.join(FUNCTIONS_DIR, "router_failover")),
+            timeout=Duration.seconds(70),
+            environment={
+                "ROUTERS": stack.to_json_string(routers),
+                "ROUTES": stack.to_json_string(routes),
+                "DESTINATION_PREFIX_LIST_ID": onprem_network.prefix_lists.aws_prefix_list_id,
+                "PROBE_PORT": str(PROBE_PORT),
+                "PROBE_INTERVAL": str(probe_interval.to_seconds()),
+                "FAILURE_THRESHOLD": str(failure_threshold),
+            },
+            initial_policy=[
+                iam.PolicyStatement(
+                    actions=["ec2:DescribeRouteTables"],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW
+                ),
+                iam.PolicyStatement(
+                    actions=["ec2:ReplaceRoute"],
+                    resources=[
+                        stack.format_arn(service="ec2", resource="route-table", resource_name=route_table_id)
+                        for route_table_id in route_table_ids
+                    ],
+                    effect=iam.Effect.ALLOW
+                ),
+            ]
+        )
+        self._function.role.add_managed_policy(
+            iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AWSLambdaVPCAccessExecutionRole")
+        )
+        # the routers and subnets are L1 resources, so the VPC configuration is set on the L1 function
+        self._function.node.default_child.vpc_config = lambda_.CfnFunction.VpcConfigProperty(
+            subnet_ids=onprem_network.private_subnet_ids,
+            security_group_ids=[onprem_network.security_group_id]
+        )
+
+        events.Rule(
+            scope=self,
+            id="RouterFailoverSchedule",
+            schedule=events.Schedule.rate(Duration.minutes(1)),
+            targets=[targets.LambdaFunction(self._function)]
+        )
@@ -0,0 +1,182 @@
+#pylint: disable-all
+"""
+Host-level telemetry for the on-prem routers.
+
+The routers run the CloudWatch agent with high-resolution collection of per-core CPU
+(including softirq time, where IPsec and forwarding work shows up) and the ENA
+``*_allowance_exceeded`` counters from ``ethtool``. The agent also listens for StatsD,
+which :mod:`router_collector` uses to publish strongSwan SA and FRR BGP metrics.
+"""
+import json
+import os
+
+from aws_cdk import (
+    aws_cloudwatch as cloudwatch,
+)
+
+from constructs import Construct
+
+NAMESPACE = "OnPremRouters"
+"""
+The CloudWatch namespace of all router metrics.
+
+:type: str
+"""
+
+DEFAULT_INTERVAL = 10
+"""
+The default collection interval in seconds. Anything below 60 is stored as a high-resolution metric.
+
+:type: int
+"""
+
+ENA_ALLOWANCE_METRICS = [
+    "bw_in_allowance_exceeded",
+    "bw_out_allowance_exceeded",
+    "pps_allowance_exceeded",
+    "conntrack_allowance_exceeded",
+    "linklocal_allowance_exceeded",
+]
+"""
+The ENA driver counters that count packets queued or dropped because an instance allowance was exceeded.
+
+:type: list
+"""
+
+ETHTOOL_METRIC_PREFIX = "ethtool_"
+"""
+The prefix the CloudWatch agent's ``ethtool`` plugin adds to the counter names it publishes.
+
+:type: str
+"""
+
+AGENT_CONFIG_PATH = "/opt/aws/amazon-cloudwatch-agent/etc/amazon-cloudwatch-agent.json"
+COLLECTOR_PATH = "/opt/router-telemetry/router_collector.py"
+
+
+def render_agent_config(interval: int = DEFAULT_INTERVAL) -> str:
+    """
+    Renders the CloudWatch agent configuration for a router.
+
+    :param interval: The collection interval in seconds.
+    :type interval: int
+    :rtype: str
+    """
+    config = {
+        "agent": {
+            "metrics_collection_interval": interval,
+        },
+        "metrics": {
+            "namespace": NAMESPACE,
+            "append_dimensions": {
+                "InstanceId": "${aws:InstanceId}",
+            },
+            "metrics_collected": {
+                "cpu": {
+                    "resources": ["*"],
+                    "totalcpu": False,
+                    "measurement": ["usage_softirq", "usage_system", "usage_user", "usage_idle"],
+                    "metrics_collection_interval": interval,
+                },
+                "ethtool": {
+                    "metrics_include": ENA_ALLOWANCE_METRICS,
+                },
+                "statsd": {
+                    "service_address": ":8125",
+                    "metrics_collection_interval": interval,
+                    "metrics_aggregation_interval": interval,
+                },
+            },
+        },
+    }
+    return json.dumps(config, indent=2, sort_keys=True)
+
+
+def install_commands(interval: int = DEFAULT_INTERVAL) -> list:
+    """
+    Returns the shell commands that install the CloudWatch agent and the collector service.
+
+    :param interval: The collection interval in seconds.
+    :type interval: int
+    :rtype: list
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_collector.py")) as collector_file:
+        collector = collector_file.read()
+
+    return [
+        "wget -q -O /tmp/amazon-cloudwatch-agent.deb https://s3.amazonaws.com/amazoncloudwatch-agent/ubuntu/amd64/latest/amazon-cloudwatch-agent.deb",
+        "dpkg -i -E /tmp/amazon-cloudwatch-agent.deb",
+        f"cat > {AGENT_CONFIG_PATH} <<'EOF'\n{render_agent_config(interval)}\nEOF",
+        f"/opt/aws/amazon-cloudwatch-agent/bin/amazon-cloudwatch-agent-ctl -a fetch-config -m ec2 -s -c file:{AGENT_CONFIG_PATH}",
+        f"mkdir -p {os.path.dirname(COLLECTOR_PATH)}",
+        f"cat > {COLLECTOR_PATH} <<'EOF'\n{collector}EOF",
+        "printf '[Unit]\\nDescription=Router telemetry collector\\nAfter=network-online.target\\n\\n"
+        f"[Service]\\nExecStart=/usr/bin/python3 {COLLECTOR_PATH} --interval {interval}\\nRestart=always\\n\\n"
+        "[Install]\\nWantedBy=multi-user.target\\n' > /etc/systemd/system/router-telemetry.service",
+        "systemctl daemon-reload",
+        "systemctl enable --now router-telemetry",
+    ]
+
+
+class RouterDashboard(Construct):
+    """
+    Creates a dashboard with the host-level metrics of the on-prem routers.
+
+    Per-core, per-interface, per-connection and per-peer series are discovered with
+    search expressions, so the dashboard does not need to know them at synth time.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param routers: The routers' instance IDs keyed by display name.
+    :type routers: dict
+    :param dashboard_name: The name of the dashboard.
+    :type dashboard_name: str
+    :param interval: The collection interval in seconds.
+    :type interval: int
+    """
+
+    @property
+    def dashboard(self) -> cloudwatch.Dashboard:
+        """
+        The dashboard.
+        """
+        return self._dashboard
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        routers: dict,
+        dashboard_name: str = "onprem-routers",
+        interval: int = DEFAULT_INTERVAL,
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        self._interval = interval
+        self._dashboard = cloudwatch.Dashboard(scope=self, id="Dashboard", dashboard_name=dashboard_name)
+
+        for name, instance_id in routers.items():
+            self._dashboard.add_widgets(
+                self._search_widget(f"{name} softirq per core", "{%s,InstanceId,cpu}" % NAMESPACE, ["cpu_usage_softirq"], instance_id, "Average"),
+                self._search_widget(f"{name} ENA allowance exceeded", "{%s,InstanceId,driver,interface}" % NAMESPACE, [ETHTOOL_METRIC_PREFIX + metric for metric in ENA_ALLOWANCE_METRICS], instance_id, "Sum"),
+            )
+            self._dashboard.add_widgets(
+                self._search_widget(f"{name} IPsec bytes", "{%s,InstanceId,connection}" % NAMESPACE, ["ipsec_bytes_in", "ipsec_bytes_out"], instance_id, "Sum"),
+                self._search_widget(f"{name} IPsec rekeys and SAs", "{%s,InstanceId,connection}" % NAMESPACE, ["ipsec_rekeys", "ipsec_sa_established"], instance_id, "Maximum"),
+                self._search_widget(f"{name} BGP sessions and prefixes", "{%s,InstanceId,peer}" % NAMESPACE, ["bgp_session_established", "bgp_prefixes_received"], instance_id, "Minimum"),
+            )
+
+    def _search_widget(self, title: str, schema: str, metric_names: list, instance_id: str, statistic: str) -> cloudwatch.GraphWidget:
+        names = " OR ".join(f'MetricName="{name}"' for name in metric_names)
+        return cloudwatch.GraphWidget(
+            title=title,
+            width=8,
+            left=[cloudwatch.MathExpression(
+                expression=f"SEARCH('{schema} ({names}) InstanceId=\"{instance_id}\"', '{statistic}', {self._interval})",
+                using_metrics={},
+                label=""
+            )]
+        )
@@ -3,24 +3,153 @@ from aws_cdk import Stack
     
 from constructs import Construct
 
+from vpc_architecture_demos import lookups
+from vpc_architecture_demos.flow_logs import FlowLogs
+from vpc_architecture_demos.monitoring import NetworkMonitoring
+
+from vpc_architecture_demos.site_to_site_vpn import cidr_config
 from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.hybrid_dns import HybridDns
+from vpc_architecture_demos.site_to_site_vpn import hybrid_load_balancer as hybrid_load_balancer_config
+from vpc_architecture_demos.site_to_site_vpn.hybrid_load_balancer import HybridLoadBalancer
+from vpc_architecture_demos.site_to_site_vpn import ipsec_config
+from vpc_architecture_demos.site_to_site_vpn.latency_probe import InterRegionLatencyProbe
+from vpc_architecture_demos.site_to_site_vpn import load_generator as load_generator_config
+from vpc_architecture_demos.site_to_site_vpn.load_generator import LoadGenerator
 from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+from vpc_architecture_demos.site_to_site_vpn.prefix_lists import NetworkPrefixLists
+from vpc_architecture_demos.site_to_site_vpn.router_failover import RouterFailover
+from vpc_architecture_demos.site_to_site_vpn.tgw_connect import TransitGatewayConnect
+from vpc_architecture_demos.site_to_site_vpn.tgw_peering import TransitGatewayPeering
+from vpc_architecture_demos.site_to_site_vpn.vpn_connections import VpnConnections
 
 class SiteToSiteVpnStack(Stack):
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        onprem_dns_cache: bool = False,
+        hybrid_dns: bool = False,
+        flow_logs: bool = False,
+        monitoring: bool = False,
+        router_telemetry: bool = False,
+        aws_vpc_cidr: str = cidr_config.AWS_VPC_CIDR,
+        peer_regions: list = None,
+        load_generator: bool = False,
+        load_generator_fleet_size: int = load_generator_config.DEFAULT_FLEET_SIZE,
+        load_generator_flows: int = load_generator_config.DEFAULT_FLOWS,
+        tgw_connect: bool = False,
+        router_failover: bool = False,
+        vpn_connections: bool = False,
+        vpn_tunnel_options: ipsec_config.TunnelOptions = ipsec_config.DEFAULT_TUNNEL_OPTIONS,
+        share_subnets_with: list = None,
+        hybrid_load_balancer: bool = False,
+        hybrid_load_balancer_port: int = hybrid_load_balancer_config.DEFAULT_PORT,
+        **kwargs
+    ) -> None:
         super().__init__(scope, construct_id, **kwargs)
         
+        azs = lookups.availability_zones(self)
+        
+        flow_log_destination = FlowLogs(scope=self, id="FlowLogs") if flow_logs else None
+        
+        network_monitoring = NetworkMonitoring(
+            scope=self,
+            id="Monitoring",
+            dashboard_name="site-to-site-vpn"
+        ) if monitoring else None
+        
+        prefix_lists = NetworkPrefixLists(scope=self, id="PrefixLists")
         
         aws_private_network = AWSPrivateNetwork(
             scope=self,
             id="AWSPrivateNetwork",
-            azs=self.availability_zones
+            azs=azs,
+            vpc_cidr=aws_vpc_cidr,
+            flow_logs=flow_log_destination,
+            monitoring=network_monitoring,
+            prefix_lists=prefix_lists,
+            transit_gateway_cidr_blocks=[cidr_config.TRANSIT_GATEWAY_CIDR] if tgw_connect else None,
+            share_with=share_subnets_with
         )
         
         onprem_network = OnPremNetwork(
             scope=self,
             id="OnPremNetwork",
-            azs=self.availability_zones
+            azs=azs,
+            dns_cache=onprem_dns_cache,
+            flow_logs=flow_log_destination,
+            router_telemetry=router_telemetry,
+            prefix_lists=prefix_lists,
+            tgw_connect=tgw_connect,
+            fast_failover=router_failover,
+            vpn_tunnel_options=vpn_tunnel_options if vpn_connections else None,
+            server_port=hybrid_load_balancer_port if hybrid_load_balancer else None
         )
         
+        if hybrid_dns:
+            HybridDns(
+                scope=self,
+                id="HybridDns",
+                aws_network=aws_private_network,
+                onprem_network=onprem_network
+            )
+        
+        if tgw_connect:
+            TransitGatewayConnect(
+                scope=self,
+                id="TransitGatewayConnect",
+                aws_network=aws_private_network,
+                onprem_network=onprem_network
+            )
+        
+        if hybrid_load_balancer:
+            HybridLoadBalancer(
+                scope=self,
+                id="HybridLoadBalancer",
+                aws_network=aws_private_network,
+                onprem_network=onprem_network,
+                port=hybrid_load_balancer_port
+            )
+        
+        if vpn_connections:
+            VpnConnections(
+                scope=self,
+                id="VpnConnections",
+                aws_network=aws_private_network,
+                onprem_network=onprem_network,
+                tunnel_options=vpn_tunnel_options,
+                monitoring=network_monitoring
+            )
+        
+        if router_failover:
+            RouterFailover(
+                scope=self,
+                id="RouterFailover",
+                onprem_network=onprem_network
+            )
+        
+        if peer_regions:
+            TransitGatewayPeering(
+                scope=self,
+                id="TransitGatewayPeering",
+                network=aws_private_network,
+                peer_regions=peer_regions
+            )
+            
+            InterRegionLatencyProbe(
+                scope=self,
+                id="InterRegionLatencyProbe",
+                regions=peer_regions
+            )
+        
+        if load_generator:
+            LoadGenerator(
+                scope=self,
+                id="LoadGenerator",
+                aws_network=aws_private_network,
+                onprem_network=onprem_network,
+                fleet_size=load_generator_fleet_size,
+                flows=load_generator_flows
+            )
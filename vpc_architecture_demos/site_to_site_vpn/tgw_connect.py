@@ -0,0 +1,143 @@
+#pylint: disable-all
+import ipaddress
+
+from aws_cdk import (
+    CfnTag,
+    aws_ec2 as ec2,
+    custom_resources as cr,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.site_to_site_vpn import bgp_config
+from vpc_architecture_demos.site_to_site_vpn import connect_config
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+
+
+class TransitGatewayConnect(Construct):
+    """
+    Connects the on-prem routers to the transit gateway of the AWS private network with
+    a Connect attachment, as an alternative to the IPsec VPN.
+
+    A Connect peer carries up to 5 Gbps of GRE traffic, against about 1.25 Gbps for a
+    VPN tunnel, and the transit gateway balances across the peers of both routers with
+    ECMP. The GRE tunnels run over a VPC attachment of the on-prem network, standing in
+    for the Direct Connect transport of a real site, so Connect and VPN can be compared
+    on the same topology.
+
+    The AWS private network must be created with :data:`cidr_config.TRANSIT_GATEWAY_CIDR`
+    as a transit gateway CIDR block, and the on-prem network with ``tgw_connect=True``
+    so the routers bring up their side of the tunnels, see :mod:`connect_config`.
+    Connect peers have no CloudFormation resource, so they are created with SDK calls.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param aws_network: The AWS private network.
+    :type aws_network: AWSPrivateNetwork
+    :param onprem_network: The on-prem network.
+    :type onprem_network: OnPremNetwork
+    """
+
+    @property
+    def attachment_id(self) -> str:
+        """
+        The ID of the Connect attachment.
+        """
+        return self._connect_attachment.attr_transit_gateway_attachment_id
+
+    @property
+    def peer_ids(self) -> list:
+        """
+        The IDs of the Connect peers, in router order (A, B).
+        """
+        return [peer.get_response_field("TransitGatewayConnectPeer.TransitGatewayConnectPeerId") for peer in self._peers]
+
+    def __init__(self, scope: Construct, id: str, aws_network: AWSPrivateNetwork, onprem_network: OnPremNetwork, **kwargs):
+        super().__init__(scope, id, **kwargs)
+
+        transit_gateway_cidr_blocks = [ipaddress.ip_network(cidr) for cidr in aws_network.transit_gateway_cidr_blocks]
+        for peer in connect_config.CONNECT_PEERS:
+            address = ipaddress.ip_address(peer.transit_gateway_address)
+            if not any(address in cidr for cidr in transit_gateway_cidr_blocks):
+                raise ValueError(
+                    f"the Connect peer address {address} is not in a transit gateway CIDR block, "
+                    f"got {aws_network.transit_gateway_cidr_blocks}"
+                )
+
+        # a VPC attachment takes one subnet per availability zone, and the on-prem subnets share one
+        self._transport_attachment = ec2.CfnTransitGatewayAttachment(
+            scope=self,
+            id="OnPremTGWTransportAttachment",
+            subnet_ids=onprem_network.private_subnet_ids[:1],
+            transit_gateway_id=aws_network.transit_gateway_id,
+            vpc_id=onprem_network.vpc_id,
+            tags=[CfnTag(
+                key="Name",
+                value="onprem-network-transit-gateway-transport-attach"
+            )]
+        )
+
+        for index, route_table_id in enumerate(onprem_network.private_route_table_ids):
+            route = ec2.CfnRoute(
+                scope=self,
+                id=f"OnPremTGWCidrRoute{'AB'[index]}",
+                route_table_id=route_table_id,
+                transit_gateway_id=aws_network.transit_gateway_id,
+                destination_cidr_block=str(transit_gateway_cidr_blocks[0])
+            )
+            route.add_dependency(target=self._transport_attachment)
+
+        ec2.CfnSecurityGroupIngress(
+            scope=self,
+            id="OnPremGreIngress",
+            group_id=onprem_network.security_group_id,
+            description="Allow GRE from the transit gateway",
+            ip_protocol="47",
+            cidr_ip=str(transit_gateway_cidr_blocks[0])
+        )
+
+        self._connect_attachment = ec2.CfnTransitGatewayConnect(
+            scope=self,
+            id="OnPremTGWConnectAttachment",
+            transport_transit_gateway_attachment_id=self._transport_attachment.attr_id,
+            options=ec2.CfnTransitGatewayConnect.TransitGatewayConnectOptionsProperty(protocol="gre"),
+            tags=[CfnTag(
+                key="Name",
+                value="onprem-network-transit-gateway-connect-attach"
+            )]
+        )
+
+        self._peers = []
+        for index, (peer, router_ip) in enumerate(zip(connect_config.CONNECT_PEERS, onprem_network.router_private_ips)):
+            name = f"onprem-router-{'AB'[index]}-connect-peer"
+            self._peers.append(cr.AwsCustomResource(
+                scope=self,
+                id=f"ConnectPeer{'AB'[index]}",
+                on_create=cr.AwsSdkCall(
+                    service="EC2",
+                    action="createTransitGatewayConnectPeer",
+                    parameters={
+                        "TransitGatewayAttachmentId": self.attachment_id,
+                        "TransitGatewayAddress": peer.transit_gateway_address,
+                        "PeerAddress": router_ip,
+                        "BgpOptions": {"PeerAsn": bgp_config.ONPREM_ASN},
+                        "InsideCidrBlocks": [peer.inside_cidr],
+                        "TagSpecifications": [{
+                            "ResourceType": "transit-gateway-connect-peer",
+                            "Tags": [{"Key": "Name", "Value": name}]
+                        }]
+                    },
+                    physical_resource_id=cr.PhysicalResourceId.from_response(
+                        "TransitGatewayConnectPeer.TransitGatewayConnectPeerId"
+                    )
+                ),
+                on_delete=cr.AwsSdkCall(
+                    service="EC2",
+                    action="deleteTransitGatewayConnectPeer",
+                    parameters={"TransitGatewayConnectPeerId": cr.PhysicalResourceIdReference()}
+                ),
+                policy=cr.AwsCustomResourcePolicy.from_sdk_calls(resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE)
+            ))
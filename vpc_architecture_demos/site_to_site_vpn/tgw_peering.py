@@ -0,0 +1,208 @@
+#pylint: disable-all
+import os
+
+from aws_cdk import (
+    Duration,
+    Stack,
+    CfnTag,
+    CustomResource,
+    aws_ec2 as ec2,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_ssm as ssm,
+    custom_resources as cr,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+
+PARAMETER_PREFIX = "/hybrid-network/aws-private-network"
+"""
+The SSM parameter path under which each region publishes its transit gateway ID, VPC
+CIDR block and AWS prefix list ID.
+
+:type: str
+"""
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "functions")
+
+
+class TransitGatewayPeering(Construct):
+    """
+    Peers the transit gateway of an AWS private network with the ones in other regions
+    and adds static routes for each side's VPC CIDR block.
+
+    Every region publishes its transit gateway ID, VPC CIDR block and AWS prefix list
+    ID as SSM parameters. Of each pair of regions, the one that sorts later requests the
+    peering and reads the other's parameters, so the earlier region must be deployed
+    first. Acceptance and the routes in both default transit gateway route tables are
+    handled by a custom resource, since CloudFormation can do neither across regions.
+
+    The VPC CIDR blocks of peered regions must not overlap. Each side's CIDR block is
+    added to the other's AWS prefix list, which opens its security group to the peer:
+    the requester adds the accepter's in its template, and the custom resource adds the
+    requester's to the accepter's list, since the accepter is deployed first.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param network: The AWS private network of this region.
+    :type network: AWSPrivateNetwork
+    :param peer_regions: The regions to peer with.
+    :type peer_regions: list
+    """
+
+    @property
+    def attachments(self) -> dict:
+        """
+        The peering attachments requested by this region, keyed by peer region.
+        """
+        return dict(self._attachments)
+
+    def __init__(self, scope: Construct, id: str, network: AWSPrivateNetwork, peer_regions: list, **kwargs):
+        super().__init__(scope, id, **kwargs)
+
+        stack = Stack.of(self)
+        region = stack.region
+        self._attachments = {}
+
+        ssm.StringParameter(
+            scope=self,
+            id="TransitGatewayIdParameter",
+            parameter_name=f"{PARAMETER_PREFIX}/transit-gateway-id",
+            string_value=network.transit_gateway_id
+        )
+        ssm.StringParameter(
+            scope=self,
+            id="VpcCidrParameter",
+            parameter_name=f"{PARAMETER_PREFIX}/vpc-cidr",
+            string_value=network.vpc_cidr
+        )
+        ssm.StringParameter(
+            scope=self,
+            id="PrefixListIdParameter",
+            parameter_name=f"{PARAMETER_PREFIX}/prefix-list-id",
+            string_value=network.prefix_lists.aws_prefix_list_id
+        )
+
+        for peer_region in sorted(set(peer_regions) - {region}):
+            if peer_region > region:
+                # the peer requests this pair, see the class docstring
+                continue
+
+            peer_transit_gateway_id = self._peer_parameter(peer_region, "transit-gateway-id")
+            peer_vpc_cidr = self._peer_parameter(peer_region, "vpc-cidr")
+            peer_prefix_list_id = self._peer_parameter(peer_region, "prefix-list-id")
+
+            attachment = ec2.CfnTransitGatewayPeeringAttachment(
+                scope=self,
+                id=f"PeeringAttachment-{peer_region}",
+                transit_gateway_id=network.transit_gateway_id,
+                peer_transit_gateway_id=peer_transit_gateway_id,
+                peer_region=peer_region,
+                peer_account_id=stack.account,
+                tags=[CfnTag(
+                    key="Name",
+                    value=f"aws-private-network-{region}-to-{peer_region}"
+                )]
+            )
+            self._attachments[peer_region] = attachment
+
+            CustomResource(
+                scope=self,
+                id=f"PeeringRoutes-{peer_region}",
+                service_token=self._provider().service_token,
+                properties={
+                    "AttachmentId": attachment.attr_transit_gateway_attachment_id,
+                    "LocalRegion": region,
+                    "LocalTransitGatewayId": network.transit_gateway_id,
+                    "LocalCidrs": [network.vpc_cidr],
+                    "PeerRegion": peer_region,
+                    "PeerTransitGatewayId": peer_transit_gateway_id,
+                    "PeerCidrs": [peer_vpc_cidr],
+                    "PeerPrefixListId": peer_prefix_list_id,
+                }
+            )
+
+            network.prefix_lists.add_aws_cidr(peer_vpc_cidr, description=f"aws-private-network {peer_region}")
+
+    def _peer_parameter(self, peer_region: str, name: str) -> str:
+        """
+        Reads a parameter published by the peer region.
+        """
+        parameter_name = f"{PARAMETER_PREFIX}/{name}"
+        reader = cr.AwsCustomResource(
+            scope=self,
+            id=f"PeerParameter-{peer_region}-{name}",
+            on_update=cr.AwsSdkCall(
+                service="SSM",
+                action="getParameter",
+                parameters={"Name": parameter_name},
+                region=peer_region,
+                physical_resource_id=cr.PhysicalResourceId.of(f"{peer_region}:{parameter_name}")
+            ),
+            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(resources=[
+                Stack.of(self).format_arn(
+                    service="ssm",
+                    region=peer_region,
+                    resource="parameter",
+                    resource_name=parameter_name.lstrip("/")
+                )
+            ])
+        )
+        return reader.get_response_field("Parameter.Value")
+
+    def _provider(self) -> cr.Provider:
+        """
+        Returns the stack-wide provider of the peering route custom resources.
+        """
+        stack = Stack.of(self)
+        provider = stack.node.try_find_child("TransitGatewayPeeringProvider")
+        if provider is not None:
+            return provider
+
+        code = lambda_.Code.from_asset(os.path.join(FUNCTIONS_DIR, "peering_routes"))
+        policy = [iam.PolicyStatement(
+            actions=[
+                "ec2:AcceptTransitGatewayPeeringAttachment",
+                "ec2:AssociateTransitGatewayRouteTable",
+                "ec2:CreateTransitGatewayRoute",
+                "ec2:DeleteTransitGatewayRoute",
+                "ec2:DescribeManagedPrefixLists",
+                "ec2:DescribeTransitGatewayPeeringAttachments",
+                "ec2:DescribeTransitGateways",
+                "ec2:GetManagedPrefixListEntries",
+                "ec2:ModifyManagedPrefixList",
+                "ec2:ReplaceTransitGatewayRoute",
+            ],
+            resources=["*"],
+            effect=iam.Effect.ALLOW
+        )]
+        on_event = lambda_.Function(
+            scope=self,
+            id="PeeringRoutesOnEvent",
+            runtime=lambda_.Runtime.PYTHON_3_9,
+            handler="index.on_event",
+            code=code,
+            timeout=Duration.minutes(1),
+            initial_policy=policy
+        )
+        is_complete = lambda_.Function(
+            scope=self,
+            id="PeeringRoutesIsComplete",
+            runtime=lambda_.Runtime.PYTHON_3_9,
+            handler="index.is_complete",
+            code=code,
+            timeout=Duration.minutes(1),
+            initial_policy=policy
+        )
+        return cr.Provider(
+            scope=stack,
+            id="TransitGatewayPeeringProvider",
+            on_event_handler=on_event,
+            is_complete_handler=is_complete,
+            query_interval=Duration.seconds(30),
+            total_timeout=Duration.minutes(30)
+        )
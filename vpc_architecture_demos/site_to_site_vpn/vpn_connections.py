@@ -0,0 +1,93 @@
+#pylint: disable-all
+from aws_cdk import (
+    CfnOutput,
+    CfnTag,
+    aws_ec2 as ec2,
+)
+
+from constructs import Construct
+
+from vpc_architecture_demos.monitoring import NetworkMonitoring
+from vpc_architecture_demos.site_to_site_vpn import ipsec_config
+from vpc_architecture_demos.site_to_site_vpn.aws_network import AWSPrivateNetwork
+from vpc_architecture_demos.site_to_site_vpn.onprem_network import OnPremNetwork
+
+
+class VpnConnections(Construct):
+    """
+    Connects each on-prem router's customer gateway to the transit gateway of the AWS
+    private network with a dynamic-routing VPN connection and explicit tunnel options.
+
+    The on-prem network must be created with the same ``vpn_tunnel_options``, so the
+    routers' strongSwan and BGP configuration matches the tunnels, see :mod:`ipsec_config`.
+    The installed CDK version has no properties for most tunnel options yet, so they are
+    set as overrides of the CloudFormation properties.
+
+    The connection IDs are stack outputs, which the health probe checks the tunnels of.
+
+    :param scope: The construct scope.
+    :type scope: Construct
+    :param id: The construct ID.
+    :type id: str
+    :param aws_network: The AWS private network.
+    :type aws_network: AWSPrivateNetwork
+    :param onprem_network: The on-prem network.
+    :type onprem_network: OnPremNetwork
+    :param tunnel_options: The options of all tunnels.
+    :type tunnel_options: ipsec_config.TunnelOptions
+    :param monitoring: Where to add dashboards and alarms for the connections, if anywhere.
+    :type monitoring: NetworkMonitoring
+    """
+
+    @property
+    def vpn_connection_ids(self) -> list:
+        """
+        The IDs of the VPN connections, in router order (A, B).
+        """
+        return [connection.ref for connection in self._connections]
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        aws_network: AWSPrivateNetwork,
+        onprem_network: OnPremNetwork,
+        tunnel_options: ipsec_config.TunnelOptions = ipsec_config.DEFAULT_TUNNEL_OPTIONS,
+        monitoring: NetworkMonitoring = None,
+        **kwargs
+    ):
+        super().__init__(scope, id, **kwargs)
+
+        ipsec_config.validate(tunnel_options)
+
+        self._connections = []
+        for index, customer_gateway_id in enumerate(onprem_network.customer_gateway_ids):
+            connection = ec2.CfnVPNConnection(
+                scope=self,
+                id=f"OnPremRouter{'AB'[index]}VpnConnection",
+                customer_gateway_id=customer_gateway_id,
+                transit_gateway_id=aws_network.transit_gateway_id,
+                type="ipsec.1",
+                static_routes_only=False,
+                tags=[CfnTag(
+                    key="Name",
+                    value=ipsec_config.VPN_CONNECTION_NAMES[index]
+                )]
+            )
+            connection.add_property_override("VpnTunnelOptionsSpecifications", [
+                ipsec_config.tunnel_options_specification(tunnel_options, inside_cidr)
+                for inside_cidr in ipsec_config.TUNNEL_INSIDE_CIDRS[index]
+            ])
+            self._connections.append(connection)
+
+            if monitoring is not None:
+                monitoring.add_vpn_connection(
+                    name=f"OnPremRouter{'AB'[index]}VpnConnection",
+                    vpn_connection_id=connection.ref
+                )
+            CfnOutput(
+                scope=self,
+                id=f"Router{'AB'[index]}VpnConnectionId",
+                description=f"ID of the VPN connection of Router {'AB'[index]}",
+                value=connection.ref
+            )
@@ -0,0 +1,143 @@
+#pylint: disable-all
+"""
+Synthesizes several regions in parallel and merges them into one cloud assembly.
+
+jsii runs one node process per Python process and handles calls one at a time, so
+adding N regions to one ``cdk.App`` makes synth N times slower. :func:`synthesize`
+instead builds each region's app in its own worker process, writes it to its own
+assembly directory and then merges the assemblies, so synth time for many regions
+stays close to the time for the slowest one.
+
+Workers are started with the ``spawn`` method: forking a process that already talks
+to a jsii kernel would share the kernel's pipes between processes.
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import aws_cdk as cdk
+
+DEFAULT_REGIONS = ["us-east-1"]
+"""
+The regions synthesized when none are given.
+
+:type: list
+"""
+
+REGIONS_CONTEXT_KEY = "regions"
+"""
+The CDK context key holding a comma-separated list of regions.
+
+:type: str
+"""
+
+MANIFEST_FILE = "manifest.json"
+TREE_ARTIFACT_TYPE = "cdk:tree"
+
+
+def regions_from_context(app: cdk.App) -> list:
+    """
+    Returns the regions requested with ``-c regions=...``, or the default regions.
+
+    :param app: The app whose context is read.
+    :type app: cdk.App
+    :rtype: list
+    """
+    value = app.node.try_get_context(REGIONS_CONTEXT_KEY)
+    if not value:
+        return list(DEFAULT_REGIONS)
+    if isinstance(value, str):
+        value = value.split(",")
+    return [region.strip() for region in value if region.strip()]
+
+
+def _synthesize_region(add_stacks, region: str, outdir: str, context: dict) -> str:
+    app = cdk.App(outdir=outdir, context=context)
+    add_stacks(app, region)
+    app.synth()
+    return outdir
+
+
+def merge_assemblies(assembly_dirs: list, outdir: str):
+    """
+    Merges cloud assemblies into one.
+
+    Artifacts and files are copied as they are, so artifact IDs and file names must
+    not collide between assemblies unless the files are identical (e.g. assets, which
+    are named by content hash). Construct tree artifacts are dropped because each
+    assembly has its own.
+
+    :param assembly_dirs: The assembly directories to merge.
+    :type assembly_dirs: list
+    :param outdir: The directory of the merged assembly.
+    :type outdir: str
+    """
+    os.makedirs(outdir, exist_ok=True)
+    manifest = None
+
+    for assembly_dir in assembly_dirs:
+        with open(os.path.join(assembly_dir, MANIFEST_FILE)) as manifest_file:
+            assembly_manifest = json.load(manifest_file)
+
+        if manifest is None:
+            manifest = {key: value for key, value in assembly_manifest.items() if key != "artifacts"}
+            manifest["artifacts"] = {}
+
+        for artifact_id, artifact in assembly_manifest.get("artifacts", {}).items():
+            if artifact.get("type") == TREE_ARTIFACT_TYPE:
+                continue
+            if artifact_id in manifest["artifacts"]:
+                raise ValueError(f"artifact {artifact_id} exists in more than one assembly")
+            manifest["artifacts"][artifact_id] = artifact
+
+        if assembly_manifest.get("missing"):
+            manifest.setdefault("missing", []).extend(assembly_manifest["missing"])
+
+        for entry in os.listdir(assembly_dir):
+            if entry in (MANIFEST_FILE, "tree.json"):
+                continue
+            source = os.path.join(assembly_dir, entry)
+            target = os.path.join(outdir, entry)
+            if os.path.isdir(source):
+                shutil.copytree(source, target, dirs_exist_ok=True)
+            else:
+                shutil.copyfile(source, target)
+
+    with open(os.path.join(outdir, MANIFEST_FILE), "w") as manifest_file:
+        json.dump(manifest or {"artifacts": {}}, manifest_file, indent=2)
+
+
+def synthesize(add_stacks, regions: list, outdir: str, context: dict = None, max_workers: int = None) -> str:
+    """
+    Synthesizes each region in its own worker process and merges the results.
+
+    :param add_stacks: A module-level function ``add_stacks(app, region)`` that adds a region's stacks to an app.
+    :param regions: The regions to synthesize.
+    :type regions: list
+    :param outdir: The directory of the merged assembly.
+    :type outdir: str
+    :param context: Extra context for every region's app. Context passed to the
+        ``cdk`` CLI reaches the workers through the environment.
+    :type context: dict
+    :param max_workers: The number of worker processes. Defaults to one per region, capped at the CPU count.
+    :type max_workers: int
+    :return: The directory of the merged assembly.
+    :rtype: str
+    """
+    if len(set(regions)) != len(regions):
+        raise ValueError(f"regions must be unique, got {regions}")
+
+    max_workers = max_workers or min(len(regions), os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory(prefix="cdk-regions-") as workdir:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(_synthesize_region, add_stacks, region, os.path.join(workdir, region), context or {})
+                for region in regions
+            ]
+            assembly_dirs = [future.result() for future in futures]
+
+        merge_assemblies(assembly_dirs, outdir)
+    return outdir
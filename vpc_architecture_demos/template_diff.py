@@ -0,0 +1,371 @@
+#pylint: disable-all
+"""
+Compares two synthesized CloudFormation templates without a deployed stack.
+
+Each resource is normalized and hashed once, so unchanged resources, usually nearly
+all of them, cost one hash comparison and the whole diff is linear in template size.
+Only resources whose hashes differ are compared property by property. Normalization
+drops what changes without changing the deployed resource: resource metadata such as
+construct paths and asset paths, the order of ``DependsOn``, and asset hashes, which
+are replaced by a placeholder wherever they appear::
+
+    $ cdk synth -o before.out && git checkout my-branch && cdk synth -o after.out
+    $ python -m vpc_architecture_demos.template_diff before.out after.out --fail-on replace
+
+Each changed property is classified by what CloudFormation does to update it:
+``replace`` creates a new resource, e.g. a subnet CIDR block or a router's network
+interfaces; ``interrupt`` stops or reboots it, e.g. an instance's user data; anything
+else is an ``update``. A replacement changes the ID of the resource, so every
+resource that references it changes too, even if its own template did not; those
+are reported with the resource that caused them.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import defaultdict, deque, namedtuple
+
+IMPACTS = ("update", "interrupt", "replace")
+"""
+The update impacts from least to most disruptive.
+
+:type: tuple
+"""
+
+REPLACEMENT_PROPERTIES = {
+    "AWS::EC2::VPC": {"CidrBlock"},
+    "AWS::EC2::Subnet": {"AvailabilityZone", "AvailabilityZoneId", "CidrBlock", "OutpostArn", "VpcId"},
+    "AWS::EC2::NetworkInterface": {"InterfaceType", "PrivateIpAddress", "SubnetId"},
+    "AWS::EC2::Instance": {
+        "AvailabilityZone", "ImageId", "KeyName", "LaunchTemplate", "NetworkInterfaces", "PlacementGroupName",
+        "PrivateIpAddress", "SecurityGroups", "SubnetId", "Tenancy",
+    },
+    "AWS::EC2::SecurityGroup": {"GroupDescription", "GroupName", "VpcId"},
+    "AWS::EC2::SecurityGroupIngress": {
+        "CidrIp", "FromPort", "GroupId", "IpProtocol", "SourcePrefixListId", "SourceSecurityGroupId", "ToPort",
+    },
+    "AWS::EC2::RouteTable": {"VpcId"},
+    "AWS::EC2::Route": {"DestinationCidrBlock", "DestinationIpv6CidrBlock", "DestinationPrefixListId", "RouteTableId"},
+    "AWS::EC2::SubnetRouteTableAssociation": {"SubnetId"},
+    "AWS::EC2::VPCEndpoint": {"ServiceName", "VpcEndpointType", "VpcId"},
+    "AWS::EC2::CustomerGateway": {"BgpAsn", "DeviceName", "IpAddress", "Type"},
+    "AWS::EC2::VPNConnection": {
+        "CustomerGatewayId", "StaticRoutesOnly", "TransitGatewayId", "Type", "VpnGatewayId",
+        "VpnTunnelOptionsSpecifications",
+    },
+    "AWS::EC2::TransitGatewayAttachment": {"TransitGatewayId", "VpcId"},
+    "AWS::EC2::TransitGatewayConnect": {"Options", "TransportTransitGatewayAttachmentId"},
+    "AWS::EC2::TransitGatewayPeeringAttachment": {"PeerAccountId", "PeerRegion", "PeerTransitGatewayId", "TransitGatewayId"},
+    "AWS::EC2::PrefixList": {"AddressFamily"},
+    "AWS::EC2::ClientVpnEndpoint": {"AuthenticationOptions", "ClientCidrBlock", "TransportProtocol"},
+    "AWS::EC2::ClientVpnTargetNetworkAssociation": {"ClientVpnEndpointId", "SubnetId"},
+    "AWS::EC2::ClientVpnAuthorizationRule": {
+        "AccessGroupId", "AuthorizeAllGroups", "ClientVpnEndpointId", "Description", "TargetNetworkCidr",
+    },
+    "AWS::EC2::ClientVpnRoute": {"ClientVpnEndpointId", "Description", "DestinationCidrBlock", "TargetVpcSubnetId"},
+    "AWS::EC2::LaunchTemplate": {"LaunchTemplateName"},
+    "AWS::AutoScaling::AutoScalingGroup": {"AutoScalingGroupName"},
+    "AWS::IAM::Role": {"Path", "RoleName"},
+    "AWS::IAM::ManagedPolicy": {"ManagedPolicyName", "Path"},
+    "AWS::IAM::InstanceProfile": {"InstanceProfileName", "Path"},
+    "AWS::Lambda::Function": {"FunctionName", "PackageType"},
+    "AWS::S3::Bucket": {"BucketName"},
+    "AWS::SSM::Document": {"Name"},
+    "AWS::SSM::Parameter": {"Name"},
+    "AWS::Route53Resolver::ResolverEndpoint": {"Direction"},
+}
+"""
+The properties whose update replaces the resource, by resource type.
+
+:type: dict
+"""
+
+INTERRUPTION_PROPERTIES = {
+    "AWS::EC2::Instance": {"EbsOptimized", "InstanceType", "KernelId", "RamdiskId", "UserData"},
+}
+"""
+The properties whose update stops or reboots the resource, by resource type.
+
+:type: dict
+"""
+
+IGNORED_TYPES = ("AWS::CDK::Metadata",)
+"""
+The resource types left out of the diff. CDK metadata changes with every CDK release.
+
+:type: tuple
+"""
+
+_ASSET_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+_SUB_REFERENCE_PATTERN = re.compile(r"\$\{([A-Za-z0-9]+)(?:\.[A-Za-z0-9.]+)?\}")
+
+PropertyChange = namedtuple("PropertyChange", ["name", "impact"])
+"""
+A changed top-level property of a resource and its update impact.
+"""
+
+ResourceChange = namedtuple("ResourceChange", ["logical_id", "resource_type", "change", "impact", "properties", "caused_by"])
+"""
+An added, removed or changed resource. ``impact`` is the most disruptive impact of
+its properties, and ``caused_by`` the replaced resource it references, for resources
+that only change because of a replacement.
+"""
+
+
+def normalize(value):
+    """
+    Returns a value with asset hashes replaced by a placeholder, recursively.
+    """
+    if isinstance(value, str):
+        return _ASSET_HASH_PATTERN.sub("<asset-hash>", value)
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    return value
+
+
+def fingerprint(value) -> str:
+    """
+    Returns a hash of a normalized value that does not depend on key order.
+
+    :rtype: str
+    """
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _canonical_resource(resource: dict) -> dict:
+    canonical = {key: normalize(value) for key, value in resource.items() if key != "Metadata"}
+    depends_on = canonical.get("DependsOn")
+    if isinstance(depends_on, list):
+        canonical["DependsOn"] = sorted(depends_on)
+    return canonical
+
+
+def _canonical_resources(template: dict) -> dict:
+    return {
+        logical_id: _canonical_resource(resource)
+        for logical_id, resource in template.get("Resources", {}).items()
+        if resource.get("Type") not in IGNORED_TYPES
+    }
+
+
+def references(value) -> set:
+    """
+    Returns the logical IDs a value refers to with ``Ref``, ``Fn::GetAtt`` or ``Fn::Sub``.
+
+    :rtype: set
+    """
+    found = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, nested in item.items():
+                if key == "Ref" and isinstance(nested, str):
+                    found.add(nested)
+                elif key == "Fn::GetAtt":
+                    target = nested[0] if isinstance(nested, list) else str(nested).split(".")[0]
+                    found.add(target)
+                elif key == "Fn::Sub":
+                    template = nested[0] if isinstance(nested, list) else nested
+                    if isinstance(template, str):
+                        found.update(_SUB_REFERENCE_PATTERN.findall(template))
+                    if isinstance(nested, list):
+                        stack.extend(nested[1:])
+                else:
+                    stack.append(nested)
+        elif isinstance(item, list):
+            stack.extend(item)
+    return found
+
+
+def property_impact(resource_type: str, name: str) -> str:
+    """
+    Returns the update impact of a property of a resource type.
+
+    :rtype: str
+    """
+    if name in REPLACEMENT_PROPERTIES.get(resource_type, ()):
+        return "replace"
+    if name in INTERRUPTION_PROPERTIES.get(resource_type, ()):
+        return "interrupt"
+    return "update"
+
+
+def _worst(impacts) -> str:
+    return max(impacts, key=IMPACTS.index, default="update")
+
+
+def _diff_resource(logical_id: str, old: dict, new: dict) -> ResourceChange:
+    resource_type = new.get("Type")
+    if old.get("Type") != resource_type:
+        return ResourceChange(logical_id, resource_type, "changed", "replace", [PropertyChange("Type", "replace")], None)
+
+    changes = []
+    old_properties = old.get("Properties", {})
+    new_properties = new.get("Properties", {})
+    for name in sorted(set(old_properties) | set(new_properties)):
+        if name not in old_properties or name not in new_properties or \
+                fingerprint(old_properties[name]) != fingerprint(new_properties[name]):
+            changes.append(PropertyChange(name, property_impact(resource_type, name)))
+    for attribute in ("DependsOn", "Condition", "DeletionPolicy", "UpdateReplacePolicy", "UpdatePolicy", "CreationPolicy"):
+        if fingerprint(old.get(attribute)) != fingerprint(new.get(attribute)):
+            changes.append(PropertyChange(attribute, "update"))
+    return ResourceChange(logical_id, resource_type, "changed", _worst(change.impact for change in changes), changes, None)
+
+
+def diff_templates(old: dict, new: dict) -> list:
+    """
+    Returns the resource changes between two templates, sorted by logical ID.
+
+    :param old: The template before the change.
+    :type old: dict
+    :param new: The template after the change.
+    :type new: dict
+    :rtype: list
+    """
+    old_resources = _canonical_resources(old)
+    new_resources = _canonical_resources(new)
+
+    changes = {}
+    for logical_id in old_resources.keys() - new_resources.keys():
+        changes[logical_id] = ResourceChange(logical_id, old_resources[logical_id].get("Type"), "removed", "replace", [], None)
+    for logical_id, resource in new_resources.items():
+        if logical_id not in old_resources:
+            changes[logical_id] = ResourceChange(logical_id, resource.get("Type"), "added", "update", [], None)
+        elif fingerprint(old_resources[logical_id]) != fingerprint(resource):
+            changes[logical_id] = _diff_resource(logical_id, old_resources[logical_id], resource)
+
+    # replacements change the IDs that other resources reference, see the module docstring
+    referrers = defaultdict(list)
+    for logical_id, resource in new_resources.items():
+        for name, value in resource.get("Properties", {}).items():
+            for target in references(value):
+                referrers[target].append((logical_id, name))
+
+    queue = deque(
+        logical_id for logical_id, change in changes.items() if change.change == "changed" and change.impact == "replace"
+    )
+    while queue:
+        replaced = queue.popleft()
+        for logical_id, name in referrers.get(replaced, ()):
+            change = changes.get(logical_id)
+            if logical_id not in old_resources or (change is not None and any(p.name == name for p in change.properties)):
+                continue
+            resource_type = new_resources[logical_id].get("Type")
+            properties = (change.properties if change is not None else []) + [
+                PropertyChange(name, property_impact(resource_type, name))
+            ]
+            impact = _worst(p.impact for p in properties)
+            caused_by = change.caused_by if change is not None else replaced
+            changes[logical_id] = ResourceChange(logical_id, resource_type, "changed", impact, properties, caused_by)
+            if impact == "replace" and (change is None or change.impact != "replace"):
+                queue.append(logical_id)
+
+    return [changes[logical_id] for logical_id in sorted(changes)]
+
+
+def summarize(changes: list) -> dict:
+    """
+    Returns the number of changes by kind and by impact.
+
+    :param changes: The changes returned by :func:`diff_templates`.
+    :type changes: list
+    :rtype: dict
+    """
+    summary = {"added": 0, "removed": 0, "changed": 0}
+    summary.update({impact: 0 for impact in IMPACTS})
+    for change in changes:
+        summary[change.change] += 1
+        if change.change == "changed":
+            summary[change.impact] += 1
+    return summary
+
+
+def load_templates(path: str) -> dict:
+    """
+    Loads every template in a cloud assembly directory, keyed by file name, or a
+    single template file, keyed by ``template``.
+
+    :rtype: dict
+    """
+    if not os.path.isdir(path):
+        with open(path) as file:
+            return {"template": json.load(file)}
+    templates = {}
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".template.json"):
+            with open(os.path.join(path, name)) as file:
+                templates[name] = json.load(file)
+    return templates
+
+
+def format_changes(changes: list) -> str:
+    """
+    Renders changes one resource per line, e.g. ``~ SubnetA AWS::EC2::Subnet replace CidrBlock``.
+
+    :rtype: str
+    """
+    symbols = {"added": "+", "removed": "-", "changed": "~"}
+    lines = []
+    for change in changes:
+        line = f"{symbols[change.change]} {change.logical_id} {change.resource_type}"
+        if change.change == "changed":
+            line += f" {change.impact} " + ", ".join(
+                f"{p.name}" if p.impact == change.impact else f"{p.name} ({p.impact})" for p in change.properties
+            )
+            if change.caused_by:
+                line += f" (references {change.caused_by})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare synthesized CloudFormation templates.")
+    parser.add_argument("old", help="template file or cloud assembly directory before the change")
+    parser.add_argument("new", help="template file or cloud assembly directory after the change")
+    parser.add_argument("--json", action="store_true", help="print the changes as JSON")
+    parser.add_argument(
+        "--fail-on", choices=IMPACTS, help="exit with status 1 if a resource changes with this impact or worse"
+    )
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.old) != os.path.isdir(args.new):
+        parser.error("compare two template files or two cloud assembly directories")
+    old_templates = load_templates(args.old)
+    new_templates = load_templates(args.new)
+
+    report = {}
+    for name in sorted(old_templates.keys() | new_templates.keys()):
+        changes = diff_templates(old_templates.get(name, {}), new_templates.get(name, {}))
+        if changes:
+            report[name] = changes
+
+    if args.json:
+        print(json.dumps({
+            name: {
+                "summary": summarize(changes),
+                "changes": [
+                    dict(change._asdict(), properties=[p._asdict() for p in change.properties]) for change in changes
+                ],
+            }
+            for name, changes in report.items()
+        }, indent=2))
+    else:
+        for name, changes in report.items():
+            print(f"{name}: " + ", ".join(f"{count} {kind}" for kind, count in summarize(changes).items() if count))
+            print(format_changes(changes))
+
+    if args.fail_on:
+        threshold = IMPACTS.index(args.fail_on)
+        if any(IMPACTS.index(change.impact) >= threshold for changes in report.values() for change in changes):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())